@@ -1,8 +1,7 @@
 import os
 import re
-import matplotlib
-# Set matplotlib backend to 'Agg' to avoid GUI warnings
-matplotlib.use('Agg')
+# Use the non-GUI 'Agg' backend without importing matplotlib at startup
+os.environ.setdefault('MPLBACKEND', 'Agg')
 from dotenv import load_dotenv
 import pandas as pd
 import joblib
@@ -13,22 +12,39 @@ from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import json
-import plotly.graph_objs as go
-import plotly.utils
+import hashlib
 import uuid
 import numpy as np
-import google.generativeai as genai
 import sys
-import matplotlib.pyplot as plt
-import seaborn as sns
-from docx import Document
-from docx.shared import Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.enum.style import WD_STYLE_TYPE
 import io
 import base64
 import time
 from datetime import datetime
+from prediction_cache import PredictionCache, model_fingerprint
+from shadow_scoring import ShadowScorer
+from session_store import SessionStore
+from janitor import ArtifactJanitor, open_artifact, resolve_artifact, session_id_from_filename
+from frame_cache import FrameCache
+from http_caching import register_http_caching
+import fast_json
+from fast_json import FastJSONProvider, plotly_json
+from artifact_export import (EXPORT_FORMATS, STREAMABLE_FORMATS, derived_path, materialize,
+                             parse_export_request, stream_and_keep)
+from row_index import ensure_row_index, query_rows, row_index_path
+from rollups import DIMENSIONS, LeakageRollups
+from single_flight import KeyedLocks, SingleFlight
+from scoring_jobs import ScoringJobs
+from chart_aggregation import SUPERMARKET_CHARTS, TELECOM_CHARTS, ProgressiveCharts, amount_stats, build_chart_list
+from histograms import numeric_histogram
+from cube import build_cube, cube_dimensions, cube_path, dimension_values, query_cube, read_cube, write_cube
+from timeseries import DEFAULT_POINTS, MAX_POINTS, downsample, resample_metric
+from report_figures import (DPI_PRESETS, FIGURE_FORMATS, REPORT_FIGURE_WIDTH_INCHES, FigureCache, report_dpi,
+                            supermarket_figure_spec, telecom_figure_spec)
+from concurrent.futures import ThreadPoolExecutor
+
+# The plotting, docx and LLM stacks (matplotlib, seaborn, plotly, python-docx,
+# google.generativeai, requests, integrated_analysis) are imported inside the
+# functions that use them so worker cold start only pays for the scoring path.
 
 # Add the report_generation directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'report_generation'))
@@ -72,121 +88,28 @@ This report was generated automatically by the AI Revenue Leakage Detection Syst
     except Exception as e:
         return f"Error generating basic report: {str(e)}"
 
-def create_supermarket_visualizations(leakage_data):
-    """Create visualizations for supermarket data"""
+def report_figure_images(spec, dpi, fmt):
+    """{format: BytesIO} for a report figure. SVG comes with a draft-resolution PNG for
+    Word versions that can't display SVG."""
+    images = {fmt: io.BytesIO(figure_cache.render(spec, dpi, fmt))}
+    if fmt == 'svg':
+        images['png'] = io.BytesIO(figure_cache.render(spec, report_dpi('draft'), 'png'))
+    return images
+
+def create_supermarket_visualizations(leakage_data, monthly_leakages=None, dpi=report_dpi('print'), fmt='png'):
+    """Create visualizations for supermarket data. monthly_leakages, a resampled
+    (period, value) frame, saves re-parsing the dates when the caller has it cached."""
     try:
-        # Set style for plots
-        plt.style.use('default')
-        sns.set_palette("husl")
-        
-        # Create figure with subplots
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        fig.suptitle('Supermarket Revenue Leakage Analysis', fontsize=16, fontweight='bold')
-        
-        # 1. Anomaly Types Distribution
-        if 'Anomaly_Type_Pred' in leakage_data.columns:
-            anomaly_counts = leakage_data['Anomaly_Type_Pred'].value_counts()
-            axes[0, 0].pie(anomaly_counts.values, labels=anomaly_counts.index, autopct='%1.1f%%', startangle=90)
-            axes[0, 0].set_title('Distribution of Anomaly Types')
-        
-        # 2. Store Branch Analysis
-        if 'Store_Branch' in leakage_data.columns:
-            top_branches = leakage_data['Store_Branch'].value_counts().head(10)
-            axes[0, 1].barh(range(len(top_branches)), top_branches.values)
-            axes[0, 1].set_yticks(range(len(top_branches)))
-            axes[0, 1].set_yticklabels(top_branches.index)
-            axes[0, 1].set_title('Top 10 Branches with Leakages')
-            axes[0, 1].set_xlabel('Number of Leakages')
-        
-        # 3. Balance Amount Distribution
-        if 'Balance_Amount' in leakage_data.columns:
-            axes[1, 0].hist(leakage_data['Balance_Amount'], bins=20, alpha=0.7, color='red', edgecolor='black')
-            axes[1, 0].set_title('Distribution of Leakage Amounts')
-            axes[1, 0].set_xlabel('Balance Amount ($)')
-            axes[1, 0].set_ylabel('Frequency')
-        
-        # 4. Monthly Trend (if date column exists)
-        if 'Billing_Date' in leakage_data.columns:
-            try:
-                leakage_data['Billing_Date'] = pd.to_datetime(leakage_data['Billing_Date'])
-                monthly_leakages = leakage_data.groupby(leakage_data['Billing_Date'].dt.to_period('M')).size()
-                axes[1, 1].plot(range(len(monthly_leakages)), monthly_leakages.values, marker='o', linewidth=2)
-                axes[1, 1].set_title('Monthly Leakage Trend')
-                axes[1, 1].set_xlabel('Month')
-                axes[1, 1].set_ylabel('Number of Leakages')
-                axes[1, 1].tick_params(axis='x', rotation=45)
-            except:
-                # If date parsing fails, show a different chart
-                axes[1, 1].text(0.5, 0.5, 'Date analysis not available', ha='center', va='center', transform=axes[1, 1].transAxes)
-                axes[1, 1].set_title('Date Analysis')
-        
-        plt.tight_layout()
-        
-        # Save to bytes buffer
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+        return report_figure_images(supermarket_figure_spec(leakage_data, monthly_leakages), dpi, fmt)
         
     except Exception as e:
         print(f"Error creating supermarket visualizations: {e}")
         return None
 
-def create_telecom_visualizations(leakage_data):
+def create_telecom_visualizations(leakage_data, dpi=report_dpi('print'), fmt='png'):
     """Create visualizations for telecom data"""
     try:
-        # Set style for plots
-        plt.style.use('default')
-        sns.set_palette("husl")
-        
-        # Create figure with subplots
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-        fig.suptitle('Telecom Revenue Leakage Analysis', fontsize=16, fontweight='bold')
-        
-        # 1. Anomaly Types Distribution
-        if 'Anomaly_type' in leakage_data.columns:
-            anomaly_counts = leakage_data['Anomaly_type'].value_counts()
-            axes[0, 0].pie(anomaly_counts.values, labels=anomaly_counts.index, autopct='%1.1f%%', startangle=90)
-            axes[0, 0].set_title('Distribution of Anomaly Types')
-        
-        # 2. Zone Area Analysis
-        if 'Zone_area' in leakage_data.columns:
-            top_zones = leakage_data['Zone_area'].value_counts().head(10)
-            axes[0, 1].barh(range(len(top_zones)), top_zones.values)
-            axes[0, 1].set_yticks(range(len(top_zones)))
-            axes[0, 1].set_yticklabels(top_zones.index)
-            axes[0, 1].set_title('Top 10 Zones with Leakages')
-            axes[0, 1].set_xlabel('Number of Leakages')
-        
-        # 3. Balance Amount Distribution
-        if 'Balance_amount' in leakage_data.columns:
-            axes[1, 0].hist(leakage_data['Balance_amount'], bins=20, alpha=0.7, color='red', edgecolor='black')
-            axes[1, 0].set_title('Distribution of Leakage Amounts')
-            axes[1, 0].set_xlabel('Balance Amount ($)')
-            axes[1, 0].set_ylabel('Frequency')
-        
-        # 4. Data Usage vs Bought (if available)
-        if 'Data_used' in leakage_data.columns and 'Data_bought' in leakage_data.columns:
-            axes[1, 1].scatter(leakage_data['Data_bought'], leakage_data['Data_used'], alpha=0.6)
-            axes[1, 1].plot([0, leakage_data['Data_bought'].max()], [0, leakage_data['Data_bought'].max()], 'r--', alpha=0.8)
-            axes[1, 1].set_title('Data Usage vs Data Bought')
-            axes[1, 1].set_xlabel('Data Bought (GB)')
-            axes[1, 1].set_ylabel('Data Used (GB)')
-        else:
-            axes[1, 1].text(0.5, 0.5, 'Data usage analysis not available', ha='center', va='center', transform=axes[1, 1].transAxes)
-            axes[1, 1].set_title('Data Usage Analysis')
-        
-        plt.tight_layout()
-        
-        # Save to bytes buffer
-        img_buffer = io.BytesIO()
-        plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-        img_buffer.seek(0)
-        plt.close()
-        
-        return img_buffer
+        return report_figure_images(telecom_figure_spec(leakage_data), dpi, fmt)
         
     except Exception as e:
         print(f"Error creating telecom visualizations: {e}")
@@ -196,7 +119,6 @@ def generate_ollama_report(domain, leakage_data, total_leakage_inr, leakage_perc
     """Generate detailed report using Ollama3"""
     try:
         import requests
-        import json
         
         # Convert leakage data to string for context (limit to 1000 tokens)
         leakage_info = leakage_data.head(100).to_string()
@@ -251,6 +173,7 @@ def generate_ai_recommendations(domain, leakage_data, total_leakage_inr, leakage
         if not gemini_api_key:
             return "Error: Gemini API key not configured"
             
+        import google.generativeai as genai
         genai.configure(api_key=gemini_api_key)
         
         # Select the appropriate model
@@ -566,9 +489,37 @@ Focus on providing specific, actionable recommendations that address the root ca
         traceback.print_exc()
         return None
 
-def create_word_document(domain, leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations_buffer):
+def add_svg_picture(doc, svg_buffer, fallback_buffer, width):
+    """Add an SVG picture the way Word 2016+ stores one: a PNG picture whose blip also
+    references the SVG part. Readers without SVG support show the PNG.
+    python-docx itself only embeds raster images."""
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.opc.packuri import PackURI
+    from docx.opc.part import Part
+    from docx.oxml import parse_xml
+
+    fallback_buffer.seek(0)
+    picture = doc.add_picture(fallback_buffer, width=width)
+    package = doc.part.package
+    svg_part = Part(PackURI(package.next_partname('/word/media/image%d.svg')), 'image/svg+xml',
+                    svg_buffer.getvalue(), package)
+    rel_id = doc.part.relate_to(svg_part, RT.IMAGE)
+    blip = picture._inline.xpath('.//a:blip')[0]
+    blip.append(parse_xml(
+        '<a:extLst xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+        'xmlns:asvg="http://schemas.microsoft.com/office/drawing/2016/SVG/main">'
+        '<a:ext uri="{96DAC541-7B7A-43D3-8B79-37D633B846F1}">'
+        f'<asvg:svgBlip r:embed="{rel_id}"/></a:ext></a:extLst>'))
+    return picture
+
+def create_word_document(domain, leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations):
     """Create a Word document with the report and visualizations"""
     try:
+        from docx import Document
+        from docx.shared import Inches
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        
         # Create a new Document
         doc = Document()
         
@@ -600,14 +551,18 @@ def create_word_document(domain, leakage_data, total_leakage_inr, leakage_percen
         doc.add_paragraph('')
         
         # Add visualizations
-        if visualizations_buffer:
+        if visualizations:
             doc.add_heading('Data Visualizations', level=1)
             doc.add_paragraph('The following charts provide detailed insights into the revenue leakage patterns:')
             doc.add_paragraph('')
             
             # Add the visualization image
-            visualizations_buffer.seek(0)
-            doc.add_picture(visualizations_buffer, width=Inches(6))
+            width = Inches(REPORT_FIGURE_WIDTH_INCHES)
+            if 'svg' in visualizations:
+                add_svg_picture(doc, visualizations['svg'], visualizations['png'], width)
+            else:
+                visualizations['png'].seek(0)
+                doc.add_picture(visualizations['png'], width=width)
             doc.add_paragraph('')
         
         # Add detailed analysis
@@ -743,30 +698,138 @@ This report was generated automatically by the AI Revenue Leakage Detection Syst
         return f"Error generating basic report: {str(e)}"
 
 app = Flask(__name__)
+# jsonify() through orjson: NumPy values encoded natively, much faster on big chart payloads
+app.json = FastJSONProvider(app)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'outputs'
+app.config['CACHE_FOLDER'] = 'cache'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.secret_key = 'your-secret-key-here'  # Change this in production
 
 # Enable CORS for React frontend
 CORS(app, origins=['http://localhost:5173'])
 
+# ETags, 304s and gzip/brotli for the heavy JSON endpoints. Session payloads only change
+# when a report is attached, so browsers may reuse them briefly; "latest" views revalidate.
+session_cache_control = f"private, max-age={int(os.getenv('HTTP_CACHE_MAX_AGE', 300))}"
+register_http_caching(app, cache_control={
+    'api_results': session_cache_control,
+    'api_visualize_session': session_cache_control,
+    'session_summary': session_cache_control,
+    'session_timeseries_endpoint': session_cache_control,
+    'session_cube_endpoint': session_cache_control,
+    'api_visualize_telecom': 'private, no-cache',
+    'api_visualize_supermarket': 'private, no-cache'
+})
+
 # Create directories if they don't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+os.makedirs(app.config['CACHE_FOLDER'], exist_ok=True)
+
+# Figure render processes (FIGURE_RENDER_WORKERS > 0) are spawned, and with `python app.py`
+# each one re-runs this script as __mp_main__. They only need report_figures, so they skip
+# the session stores, the janitor, the prediction cache and model loading.
+APP_PROCESS = __name__ != '__mp_main__'
+
+# Session results persist in SQLite next to the artifacts they point to, so they
+# survive restarts and are shared between workers
+app.config['SESSION_DB_PATH'] = os.getenv('SESSION_DB_PATH', os.path.join(app.config['OUTPUT_FOLDER'], 'sessions.sqlite'))
+results_store = SessionStore(app.config['SESSION_DB_PATH']) if APP_PROCESS else None
+# Cross-session daily rollups live in the same database so they outlive expired sessions
+leakage_rollups = LeakageRollups(app.config['SESSION_DB_PATH']) if APP_PROCESS else None
+
+def _env_hours(name, default=None):
+    """Read a duration in hours from the environment as seconds (empty or 0 disables it)"""
+    value = os.getenv(name, default)
+    return float(value) * 3600 if value and float(value) > 0 else None
+
+# Background cleanup of uploads/ and outputs/: sessions idle past the TTL or beyond the
+# disk quota (least recently used first) lose their files and answer 410 afterwards
+quota_mb = float(os.getenv('ARTIFACT_QUOTA_MB', 0) or 0)
+artifact_janitor = ArtifactJanitor(
+    results_store,
+    folders=[app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER']],
+    ttl_seconds=_env_hours('ARTIFACT_TTL_HOURS', '168'),
+    quota_bytes=quota_mb * 1024 * 1024 if quota_mb > 0 else None,
+    compress_after_seconds=_env_hours('ARTIFACT_COMPRESS_AFTER_HOURS'),
+    interval_seconds=float(os.getenv('JANITOR_INTERVAL_SECONDS', 600)),
+    protected_paths=[app.config['SESSION_DB_PATH']]
+)
+if APP_PROCESS and os.getenv('JANITOR_ENABLED', 'true').lower() == 'true':
+    artifact_janitor.start()
+
+# Parsed processed CSVs (and their anomaly subsets) kept in memory for repeated dashboard requests
+frame_cache = FrameCache(max_bytes=int(float(os.getenv('FRAME_CACHE_MB', 512)) * 1024 * 1024))
+
+# Identical concurrent heavy operations on a session (reports, chart rebuilds) share one run,
+# and read-modify-write updates of a session's stored results are serialized per session
+session_flights = SingleFlight()
+session_locks = KeyedLocks()
+
+# Report figures: content-addressed images shared across sessions, drawn in the request
+# thread (one at a time) unless FIGURE_RENDER_WORKERS asks for render processes
+figure_cache = FigureCache(
+    os.path.join(app.config['CACHE_FOLDER'], 'figures'),
+    workers=int(os.getenv('FIGURE_RENDER_WORKERS', 0)),
+    max_bytes=int(float(os.getenv('FIGURE_CACHE_MB', 256)) * 1024 * 1024)
+)
+REPORT_FIGURE_QUALITY = os.getenv('REPORT_FIGURE_QUALITY', 'print')
+REPORT_FIGURE_FORMAT = os.getenv('REPORT_FIGURE_FORMAT', 'png')
+
+# Uploads sent with ?async=1 are scored here, publishing per-chunk progress for /api/jobs/<id>/events
+SCORING_CHUNK_ROWS = int(os.getenv('SCORING_CHUNK_ROWS', 25000))
+scoring_executor = ThreadPoolExecutor(max_workers=int(os.getenv('SCORING_JOB_WORKERS', 1)), thread_name_prefix='scoring')
+scoring_jobs = ScoringJobs()
+
+# Indexed per-session row copies behind /api/session/<id>/rows, built off the request path
+row_index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='row-index')
+
+def ensure_session_row_index(session_id, session_data):
+    """Return the path of a session's row index, building it from the processed CSV if missing"""
+    return ensure_row_index(
+        row_index_path(app.config['OUTPUT_FOLDER'], session_id),
+        session_data.get('domain'),
+        lambda: frame_cache.read_csv(session_data['processed_data_path'])
+    )
 
-# Store results in memory (use Redis or database in production)
-results_store = {}
+def ensure_session_cube(session_id, session_data, df=None):
+    """Return the path of a session's leakage cube, building it from df (or the processed CSV) if missing"""
+    path = cube_path(app.config['OUTPUT_FOLDER'], session_id)
+    if os.path.exists(resolve_artifact(path)):
+        return path
+    def build():
+        frame = df if df is not None else frame_cache.read_csv(session_data['processed_data_path'])
+        return write_cube(build_cube(frame, session_data.get('domain')), path)
+    return session_flights.do(('cube', session_id), build)
+
+def missing_session(session_id):
+    """(error message, status) for a session that can't be served: 410 once expired, else 404"""
+    if results_store.is_expired(session_id):
+        return 'Session expired and its files were cleaned up', 410
+    return 'Session not found', 404
 
 # Load trained models and encoders
-SUPERMARKET_MODEL_PATH = r"model\super_market\saved_models\trained_pipeline.pkl"
-SUPERMARKET_LEAKAGE_ENCODER_PATH = r"model\super_market\saved_models\leakage_encoder.pkl"
-SUPERMARKET_ANOMALY_ENCODER_PATH = r"model\super_market\saved_models\anomaly_encoder.pkl"
+SUPERMARKET_MODEL_PATH = os.path.join("model", "super_market", "saved_models", "trained_pipeline.pkl")
+SUPERMARKET_LEAKAGE_ENCODER_PATH = os.path.join("model", "super_market", "saved_models", "leakage_encoder.pkl")
+SUPERMARKET_ANOMALY_ENCODER_PATH = os.path.join("model", "super_market", "saved_models", "anomaly_encoder.pkl")
+SUPERMARKET_ONNX_MODEL_PATH = os.path.join("model", "super_market", "saved_models", "trained_pipeline.onnx")
 
 # Telecom model paths
-TELECOM_MODEL_PATH = r"model\Telecom\saved_model\telecom_pipeline.pkl"
-TELECOM_LEAKAGE_ENCODER_PATH = r"model\Telecom\saved_model\le_leakage.pkl"
-TELECOM_ANOMALY_ENCODER_PATH = r"model\Telecom\saved_model\le_anomaly.pkl"
+TELECOM_MODEL_PATH = os.path.join("model", "Telecom", "saved_model", "telecom_pipeline.pkl")
+TELECOM_LEAKAGE_ENCODER_PATH = os.path.join("model", "Telecom", "saved_model", "le_leakage.pkl")
+TELECOM_ANOMALY_ENCODER_PATH = os.path.join("model", "Telecom", "saved_model", "le_anomaly.pkl")
+TELECOM_ONNX_MODEL_PATH = os.path.join("model", "Telecom", "saved_model", "telecom_pipeline.onnx")
+
+ONNX_MODEL_PATHS = {
+    'supermarket': SUPERMARKET_ONNX_MODEL_PATH,
+    'telecom': TELECOM_ONNX_MODEL_PATH
+}
+
+# Inference backend: 'joblib' runs the pickled sklearn pipelines, 'onnx' runs the graphs
+# exported by onnx_backend.py under onnxruntime and skips unpickling the pipelines,
+# 'server' sends rows to the per-host model_server.py process (see MODEL_SERVER_ADDRESS)
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'joblib').lower()
 
 # Initialize model variables
 supermarket_pipeline = None
@@ -777,23 +840,101 @@ telecom_pipeline = None
 telecom_leakage_encoder = None
 telecom_anomaly_encoder = None
 
-try:
-    # Load supermarket models
-    supermarket_pipeline = joblib.load(SUPERMARKET_MODEL_PATH)
-    supermarket_leakage_encoder = joblib.load(SUPERMARKET_LEAKAGE_ENCODER_PATH)
-    supermarket_anomaly_encoder = joblib.load(SUPERMARKET_ANOMALY_ENCODER_PATH)
-    print("✅ Supermarket models loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading supermarket models: {e}")
-
-try:
-    # Load telecom models
-    telecom_pipeline = joblib.load(TELECOM_MODEL_PATH)
-    telecom_leakage_encoder = joblib.load(TELECOM_LEAKAGE_ENCODER_PATH)
-    telecom_anomaly_encoder = joblib.load(TELECOM_ANOMALY_ENCODER_PATH)
-    print("✅ Telecom models loaded successfully!")
-except Exception as e:
-    print(f"❌ Error loading telecom models: {e}")
+# Model versions (content hashes of the pipeline pickles) key the prediction cache
+supermarket_model_version = None
+telecom_model_version = None
+
+# onnxruntime sessions by domain, created on first use of the 'onnx' backend
+onnx_pipelines = {}
+
+# Model server clients by domain, created on first use of the 'server' backend
+remote_pipelines = {}
+
+# Row-level prediction cache so recurring records skip pipeline.predict on re-upload
+prediction_cache = None
+if APP_PROCESS and os.getenv('PREDICTION_CACHE_ENABLED', 'true').lower() == 'true':
+    try:
+        prediction_cache = PredictionCache(
+            os.path.join(app.config['CACHE_FOLDER'], 'predictions.sqlite'),
+            max_entries=int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 1000000))
+        )
+    except Exception as e:
+        print(f"❌ Error initializing prediction cache: {e}")
+
+def get_onnx_pipeline(domain):
+    """Return the onnxruntime pipeline for a domain, loading it on first use"""
+    if domain not in onnx_pipelines:
+        from onnx_backend import OnnxPipeline
+        onnx_pipelines[domain] = OnnxPipeline(ONNX_MODEL_PATHS[domain])
+    return onnx_pipelines[domain]
+
+def get_remote_pipeline(domain):
+    """Return the model server client for a domain, connecting on first use"""
+    if domain not in remote_pipelines:
+        from model_server import RemotePipeline
+        remote_pipelines[domain] = RemotePipeline(domain)
+    return remote_pipelines[domain]
+
+if APP_PROCESS:
+    try:
+        # Load supermarket models
+        # With the model server the pipelines live in another process; only the encoders load here
+        if INFERENCE_BACKEND == 'onnx':
+            get_onnx_pipeline('supermarket')
+        elif INFERENCE_BACKEND != 'server':
+            supermarket_pipeline = joblib.load(SUPERMARKET_MODEL_PATH)
+            supermarket_model_version = model_fingerprint(SUPERMARKET_MODEL_PATH)
+        supermarket_leakage_encoder = joblib.load(SUPERMARKET_LEAKAGE_ENCODER_PATH)
+        supermarket_anomaly_encoder = joblib.load(SUPERMARKET_ANOMALY_ENCODER_PATH)
+        print(f"✅ Supermarket models loaded successfully! ({INFERENCE_BACKEND} backend)")
+    except Exception as e:
+        print(f"❌ Error loading supermarket models: {e}")
+
+    try:
+        # Load telecom models
+        if INFERENCE_BACKEND == 'onnx':
+            get_onnx_pipeline('telecom')
+        elif INFERENCE_BACKEND != 'server':
+            telecom_pipeline = joblib.load(TELECOM_MODEL_PATH)
+            telecom_model_version = model_fingerprint(TELECOM_MODEL_PATH)
+        telecom_leakage_encoder = joblib.load(TELECOM_LEAKAGE_ENCODER_PATH)
+        telecom_anomaly_encoder = joblib.load(TELECOM_ANOMALY_ENCODER_PATH)
+        print(f"✅ Telecom models loaded successfully! ({INFERENCE_BACKEND} backend)")
+    except Exception as e:
+        print(f"❌ Error loading telecom models: {e}")
+
+def get_pipeline(domain, backend=None):
+    """Return (pipeline, model_version) for a domain on the requested inference backend"""
+    global supermarket_pipeline, supermarket_model_version, telecom_pipeline, telecom_model_version
+    backend = (backend or INFERENCE_BACKEND).lower()
+
+    if backend in ('onnx', 'server'):
+        pipeline = get_onnx_pipeline(domain) if backend == 'onnx' else get_remote_pipeline(domain)
+        return pipeline, pipeline.version
+    if backend != 'joblib':
+        raise Exception(f"Unknown inference backend: {backend}")
+
+    # The pickles are only loaded on demand when the server started on the ONNX backend
+    if domain == 'supermarket':
+        if supermarket_pipeline is None:
+            supermarket_pipeline = joblib.load(SUPERMARKET_MODEL_PATH)
+            supermarket_model_version = model_fingerprint(SUPERMARKET_MODEL_PATH)
+        return supermarket_pipeline, supermarket_model_version
+
+    if telecom_pipeline is None:
+        telecom_pipeline = joblib.load(TELECOM_MODEL_PATH)
+        telecom_model_version = model_fingerprint(TELECOM_MODEL_PATH)
+    return telecom_pipeline, telecom_model_version
+
+def run_pipeline(pipeline, X, model_version):
+    """Run pipeline.predict, serving previously scored rows from the prediction cache"""
+    if prediction_cache is None or model_version is None:
+        return pipeline.predict(X)
+    try:
+        return prediction_cache.predict(pipeline, X, model_version)
+    except Exception as e:
+        print(f"Prediction cache unavailable, scoring all rows: {e}")
+        return pipeline.predict(X)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ['csv', 'xlsx', 'xls']
@@ -854,21 +995,23 @@ def preprocess_data(df):
 
     return X, df
 
-def predict_supermarket_leakage(X):
-    """Make predictions using the trained supermarket model"""
-    if supermarket_pipeline is None or supermarket_leakage_encoder is None or supermarket_anomaly_encoder is None:
+def predict_supermarket_leakage(X, backend=None):
+    """Make predictions using the trained supermarket model ('joblib', 'onnx' or 'server' backend)"""
+    if supermarket_leakage_encoder is None or supermarket_anomaly_encoder is None:
         raise Exception("Supermarket models not loaded properly")
     
     # Make predictions
-    y_pred = supermarket_pipeline.predict(X)
+    pipeline, model_version = get_pipeline('supermarket', backend)
+    y_pred = run_pipeline(pipeline, X, model_version)
     
-    # Decode predictions
-    pred_df = pd.DataFrame({
+    return decode_supermarket_predictions(y_pred)
+
+def decode_supermarket_predictions(y_pred):
+    """Turn raw supermarket pipeline output into labelled prediction columns"""
+    return pd.DataFrame({
         "Leakage_Flag_Pred": supermarket_leakage_encoder.inverse_transform(y_pred[:, 0]),
         "Anomaly_Type_Pred": supermarket_anomaly_encoder.inverse_transform(y_pred[:, 1])
     })
-    
-    return pred_df
 
 def preprocess_telecom_data(df):
     """Preprocess telecom data EXACTLY like the training notebook logic with safety checks"""
@@ -921,28 +1064,50 @@ def preprocess_telecom_data(df):
 
     return X, df
 
-def predict_telecom_leakage(X):
-    """Make predictions using the trained telecom model"""
-    if telecom_pipeline is None or telecom_leakage_encoder is None or telecom_anomaly_encoder is None:
+def predict_telecom_leakage(X, backend=None):
+    """Make predictions using the trained telecom model ('joblib', 'onnx' or 'server' backend)"""
+    if telecom_leakage_encoder is None or telecom_anomaly_encoder is None:
         raise Exception("Telecom models not loaded properly")
     
     try:
         # Make predictions
-        y_pred = telecom_pipeline.predict(X)
+        pipeline, model_version = get_pipeline('telecom', backend)
+        y_pred = run_pipeline(pipeline, X, model_version)
         
-        # Decode predictions
-        pred_df = pd.DataFrame({
-            "Leakage": telecom_leakage_encoder.inverse_transform(y_pred[:, 1]),
-            "Anomaly_type": telecom_anomaly_encoder.inverse_transform(y_pred[:, 0])
-        })
-        
-        return pred_df
+        return decode_telecom_predictions(y_pred)
     except Exception as e:
         print(f"Error during telecom prediction: {str(e)}")
         raise Exception(f"Telecom prediction failed: {str(e)}")
 
+def decode_telecom_predictions(y_pred):
+    """Turn raw telecom pipeline output into labelled prediction columns"""
+    return pd.DataFrame({
+        "Leakage": telecom_leakage_encoder.inverse_transform(y_pred[:, 1]),
+        "Anomaly_type": telecom_anomaly_encoder.inverse_transform(y_pred[:, 0])
+    })
+
+# Shadow scoring: a retrained candidate pipeline is scored on live uploads in the
+# background and compared with the served model before it gets promoted
+shadow_scorer = ShadowScorer(
+    candidate_paths={
+        'supermarket': os.getenv('SUPERMARKET_CANDIDATE_MODEL_PATH'),
+        'telecom': os.getenv('TELECOM_CANDIDATE_MODEL_PATH')
+    },
+    decoders={
+        'supermarket': decode_supermarket_predictions,
+        'telecom': decode_telecom_predictions
+    },
+    log_path=os.path.join(app.config['CACHE_FOLDER'], 'shadow_scores.jsonl'),
+    store=results_store,
+    n_jobs=int(os.getenv('SHADOW_SCORING_THREADS', 1)),
+    max_results=int(os.getenv('SHADOW_SCORING_MAX_RESULTS', 1000)),
+    max_pending=int(os.getenv('SHADOW_SCORING_MAX_PENDING', 4))
+)
+
 def generate_visualizations(df_with_preds):
     """Generate visualizations for the results"""
+    import plotly.graph_objs as go
+    
     # Leakage Flag distribution
     leakage_counts = df_with_preds['Leakage_Flag_Pred'].value_counts()
     
@@ -974,12 +1139,14 @@ def generate_visualizations(df_with_preds):
     )
     
     return {
-        'leakage_chart': json.dumps(fig1, cls=plotly.utils.PlotlyJSONEncoder),
-        'anomaly_chart': json.dumps(fig2, cls=plotly.utils.PlotlyJSONEncoder)
+        'leakage_chart': plotly_json(fig1),
+        'anomaly_chart': plotly_json(fig2)
     }
 
 def generate_telecom_visualizations(df):
     """Generate visualizations specifically for telecom data"""
+    import plotly.graph_objs as go
+    
     # Leakage distribution
     leakage_counts = df['Leakage'].value_counts()
     
@@ -1025,15 +1192,27 @@ def generate_telecom_visualizations(df):
         )
     
     return {
-        'leakage_chart': json.dumps(fig1, cls=plotly.utils.PlotlyJSONEncoder),
-        'anomaly_chart': json.dumps(fig2, cls=plotly.utils.PlotlyJSONEncoder)
+        'leakage_chart': plotly_json(fig1),
+        'anomaly_chart': plotly_json(fig2)
     }
 
 # New visualization functions integrated from visualise folder
+def telecom_anomaly_rows(df):
+    """Rows of a processed telecom frame flagged as leakage"""
+    return df[df['Leakage'] == 'Yes']
+
+def supermarket_leakage_rows(df):
+    """Rows of a processed supermarket frame flagged as leakage"""
+    return df[df['Leakage_Flag_Pred'] == 'Anomaly']
+
+# Most points a dashboard trend line gets; longer series are LTTB-downsampled
+TREND_CHART_POINTS = 120
+
 def generate_telecom_chart_list(df=None):
     """
     Processes the telecom dataframe and returns a list of dictionaries for charting.
-    An anomaly is identified where 'Leakage' is 'Yes'.
+    An anomaly is identified where 'Leakage' is 'Yes'. Charts are declared in
+    chart_aggregation.TELECOM_CHARTS and computed in one grouped pass per column.
     """
     if df is None:
         return {
@@ -1041,23 +1220,37 @@ def generate_telecom_chart_list(df=None):
             "stats": {}
         }
     
-    # Clean up column names to remove leading/trailing whitespace
-    df.columns = df.columns.str.strip()
+    # Clean up column names to remove leading/trailing whitespace (without touching a cached frame)
+    if any(column != column.strip() for column in df.columns):
+        df = df.rename(columns=str.strip)
 
-    # Calculate overall statistics
+    aggregator, chart_list = build_chart_list(df, TELECOM_CHARTS)
+
+    # Monthly billed trend, resampled and downsampled instead of one point per raw date
+    if 'error' not in chart_list[-1] and 'Billed_amount' in df.columns and 'Billing_date' in df.columns:
+        trend = downsample(resample_metric(df, 'telecom', 'billed', 'month'), TREND_CHART_POINTS)
+        chart_list.append({
+            "title": "Billed Amount Trend Over Time",
+            "type": "line",
+            "data": dict(zip(trend['period'], trend['value'].round(2).tolist()))
+        })
+
+    # Calculate overall statistics from the same grouped counts the charts use
     total_records = len(df)
-    leakage_count = len(df[df['Leakage'] == 'Yes'])
-    no_leakage_count = len(df[df['Leakage'] == 'No'])
+    leakage_counts = aggregator.counts('Leakage')
+    leakage_count = leakage_counts.get('Yes', 0)
+    no_leakage_count = leakage_counts.get('No', 0)
     data_columns = len(df.columns)
     
     # Calculate billed amount statistics if column exists
     billed_stats = {}
     if 'Billed_amount' in df.columns:
+        billed = amount_stats(df, 'Billed_amount')
         billed_stats = {
-            'total_billed': df['Billed_amount'].sum(),
-            'avg_billed': df['Billed_amount'].mean(),
-            'max_billed': df['Billed_amount'].max(),
-            'min_billed': df['Billed_amount'].min()
+            'total_billed': billed['sum'],
+            'avg_billed': billed['mean'],
+            'max_billed': billed['max'],
+            'min_billed': billed['min']
         }
 
     stats = {
@@ -1069,66 +1262,13 @@ def generate_telecom_chart_list(df=None):
         **billed_stats
     }
 
-    # Create chart list
-    chart_list = [
-        {
-            "title": "Overall Leakage Status",
-            "type": "doughnut",
-            "data": df['Leakage'].value_counts().to_dict()
-        }
-    ]
-
-    anomalies_df = df[df['Leakage'] == 'Yes'].copy()
-
-    if anomalies_df.empty:
-        chart_list.append({"error": "No specific anomalies found to detail."})
-        return {"charts": chart_list, "stats": stats}
-
-    # Add various chart types for different insights
-    chart_list.extend([
-        {
-            "title": "Anomalies by Type",
-            "type": "bar",
-            "data": anomalies_df['Anomaly_type'].value_counts().to_dict()
-        },
-        {
-            "title": "Plan Category Distribution (Anomalies)",
-            "type": "pie",
-            "data": anomalies_df['Plan_category'].value_counts().to_dict()
-        },
-        {
-            "title": "Zone Area Analysis",
-            "type": "horizontalBar",
-            "data": anomalies_df['Zone_area'].value_counts().to_dict()
-        },
-        {
-            "title": "Payment Status Overview",
-            "type": "polarArea",
-            "data": anomalies_df['Payment_status'].value_counts().to_dict()
-        },
-        {
-            "title": "Top Plan Categories (Anomalies)",
-            "type": "bar",
-            "data": anomalies_df['Plan_category'].value_counts().to_dict()
-        }
-    ])
-
-    # Add line chart for billed amount trend if available
-    if 'Billed_amount' in df.columns and 'Date' in df.columns:
-        # Group by date and sum billed amounts
-        date_trend = df.groupby('Date')['Billed_amount'].sum().to_dict()
-        chart_list.append({
-            "title": "Billed Amount Trend Over Time",
-            "type": "line",
-            "data": date_trend
-        })
-
     return {"charts": chart_list, "stats": stats}
 
 def generate_supermarket_chart_list(df=None):
     """
     Processes the supermarket dataframe and returns a list of dictionaries for charting.
-    An anomaly is identified where 'Anomaly_Type_Pred' is not 'No Anomaly'.
+    An anomaly is identified where 'Anomaly_Type_Pred' is not 'No Anomaly'. Charts are
+    declared in chart_aggregation.SUPERMARKET_CHARTS and computed in one grouped pass per column.
     """
     if df is None:
         return {
@@ -1136,30 +1276,28 @@ def generate_supermarket_chart_list(df=None):
             "stats": {}
         }
     
-    # Clean up column names to remove leading/trailing whitespace
-    df.columns = df.columns.str.strip()
+    # Clean up column names to remove leading/trailing whitespace (without touching a cached frame)
+    if any(column != column.strip() for column in df.columns):
+        df = df.rename(columns=str.strip)
 
-    # Calculate overall statistics
+    aggregator, chart_list = build_chart_list(df, SUPERMARKET_CHARTS)
+
+    # Calculate overall statistics from the same grouped counts the charts use
     total_records = len(df)
-    anomaly_count = len(df[df['Anomaly_Type_Pred'] != 'No Anomaly'])
-    no_anomaly_count = len(df[df['Anomaly_Type_Pred'] == 'No Anomaly'])
+    anomaly_count = aggregator.flagged_count()
+    no_anomaly_count = aggregator.counts('Anomaly_Type_Pred').get('No Anomaly', 0)
     data_columns = len(df.columns)
     
     # Calculate sales/amount statistics if relevant columns exist
-    amount_stats = {}
-    if 'Billed_Amount' in df.columns:
-        amount_stats = {
-            'total_sales': df['Billed_Amount'].sum(),
-            'avg_sales': df['Billed_Amount'].mean(),
-            'max_sales': df['Billed_Amount'].max(),
-            'min_sales': df['Billed_Amount'].min()
-        }
-    elif 'Amount' in df.columns:
-        amount_stats = {
-            'total_sales': df['Amount'].sum(),
-            'avg_sales': df['Amount'].mean(),
-            'max_sales': df['Amount'].max(),
-            'min_sales': df['Amount'].min()
+    amount_column = 'Billed_Amount' if 'Billed_Amount' in df.columns else 'Amount' if 'Amount' in df.columns else None
+    sales_stats = {}
+    if amount_column:
+        amounts = amount_stats(df, amount_column)
+        sales_stats = {
+            'total_sales': amounts['sum'],
+            'avg_sales': amounts['mean'],
+            'max_sales': amounts['max'],
+            'min_sales': amounts['min']
         }
 
     stats = {
@@ -1168,53 +1306,9 @@ def generate_supermarket_chart_list(df=None):
         'no_anomaly_count': no_anomaly_count,
         'data_columns': data_columns,
         'anomaly_percentage': round((anomaly_count / total_records) * 100, 2),
-        **amount_stats
+        **sales_stats
     }
 
-    # Create chart list with different chart types
-    chart_list = [
-        {
-            "title": "Overall Anomaly Detection",
-            "type": "doughnut",
-            "data": df['Anomaly_Type_Pred'].value_counts().to_dict()
-        },
-        {
-            "title": "Predicted Leakage Status",
-            "type": "pie",
-            "data": df['Leakage_Flag_Pred'].value_counts().to_dict()
-        }
-    ]
-    
-    anomalies_df = df[df['Anomaly_Type_Pred'] != 'No Anomaly'].copy()
-
-    if anomalies_df.empty:
-        chart_list.append({"error": "No specific anomalies found to detail."})
-        return {"charts": chart_list, "stats": stats}
-
-    # Add various chart types for different insights
-    chart_list.extend([
-        {
-            "title": "Specific Anomaly Types",
-            "type": "bar",
-            "data": anomalies_df['Anomaly_Type_Pred'].value_counts().to_dict()
-        },
-        {
-            "title": "Customer Type Distribution (Anomalies)",
-            "type": "horizontalBar",
-            "data": anomalies_df['Customer_Type'].value_counts().to_dict()
-        },
-        {
-            "title": "Order Channel Analysis",
-            "type": "polarArea",
-            "data": anomalies_df['Order_Channel'].value_counts().to_dict()
-        },
-        {
-            "title": "Top Product Categories (Anomalies)",
-            "type": "bar",
-            "data": anomalies_df['Product_Category'].value_counts().head(8).to_dict()
-        }
-    ])
-
     return {"charts": chart_list, "stats": stats}
 
 def generate_generic_chart_list(df):
@@ -1239,14 +1333,14 @@ def generate_generic_chart_list(df):
         }
     ]
     
-    # Add charts for numeric columns
+    # Add charts for numeric columns, binned here so the payload size doesn't grow with the rows
     numeric_columns = df.select_dtypes(include=[np.number]).columns
     for col in numeric_columns[:5]:  # Limit to first 5 numeric columns
         if df[col].notna().sum() > 0:
             chart_list.append({
                 "title": f"{col} Distribution",
                 "type": "histogram",
-                "data": df[col].dropna().tolist()
+                "data": numeric_histogram(df[col])
             })
     
     # Add charts for categorical columns
@@ -1261,6 +1355,45 @@ def generate_generic_chart_list(df):
     
     return {"charts": chart_list, "stats": stats}
 
+# Chart payloads are computed once at scoring time and stored with the session. Bump
+# this when the chart-list logic changes so stored payloads are rebuilt on next request.
+CHART_PAYLOAD_VERSION = '3'
+
+def chart_payload_version(model_version):
+    """Version tag of a stored payload: chart logic version plus the model that scored the session"""
+    return f"{CHART_PAYLOAD_VERSION}/{model_version}"
+
+def chart_payload_is_current(version):
+    # A session's predictions are fixed by the model that scored it, so only a change
+    # in the chart logic makes its stored payload stale
+    return bool(version) and version.split('/')[0] == CHART_PAYLOAD_VERSION
+
+def build_chart_payload(df):
+    """Chart list and stats for a processed frame, picked by its prediction columns"""
+    if 'Leakage_Flag_Pred' in df.columns and 'Anomaly_Type_Pred' in df.columns:
+        # This is supermarket data
+        return generate_supermarket_chart_list(df)
+    elif 'Leakage' in df.columns:
+        # This is telecom data
+        return generate_telecom_chart_list(df)
+    # Generic dataset
+    return generate_generic_chart_list(df)
+
+def session_chart_response(session_id, charts, version):
+    """Serve a session's stored chart JSON as is, rebuilding it first if it is missing or stale"""
+    if chart_payload_is_current(version):
+        return app.response_class(charts, mimetype='application/json')
+
+    session_data = results_store.get(session_id, touch=False)
+    if not session_data or 'processed_data_path' not in session_data:
+        return jsonify({"charts": [{"error": "No processed data available"}], "stats": {}}), 404
+    def rebuild():
+        data_path = session_data['processed_data_path']
+        payload = build_chart_payload(frame_cache.read_csv(data_path))
+        results_store.put_charts(session_id, payload, chart_payload_version(session_data.get('model_version')))
+        return payload
+    return jsonify(session_flights.do(('charts', session_id), rebuild))
+
 # API Routes
 @app.route('/api/health')
 def health_check():
@@ -1269,10 +1402,12 @@ def health_check():
 
 @app.route('/api/results/<session_id>')
 def api_results(session_id):
-    if session_id in results_store:
-        return jsonify(results_store[session_id])
+    results = results_store.get(session_id)
+    if results is not None:
+        return jsonify(results)
     else:
-        return jsonify({'success': False, 'error': 'Results not found or expired'}), 404
+        error, status = missing_session(session_id)
+        return jsonify({'success': False, 'error': error}), status
 
 @app.route('/upload/supermarket', methods=['POST'])
 def upload_supermarket():
@@ -1284,8 +1419,141 @@ def upload_telecom():
     """Handle telecom data upload and processing"""
     return process_upload('telecom')
 
+def score_in_chunks(predict, X, original_df, progress=None):
+    """predict(X), or with a progress callback, predict SCORING_CHUNK_ROWS rows at a time and
+    hand each scored chunk (original rows plus prediction columns) to progress(chunk, total_rows)"""
+    if progress is None or len(X) <= SCORING_CHUNK_ROWS:
+        predictions = predict(X)
+        if progress is not None:
+            progress(pd.concat([original_df.reset_index(drop=True), predictions], axis=1), len(X))
+        return predictions
+    parts = []
+    for start in range(0, len(X), SCORING_CHUNK_ROWS):
+        part = predict(X.iloc[start:start + SCORING_CHUNK_ROWS])
+        parts.append(part)
+        rows = original_df.iloc[start:start + SCORING_CHUNK_ROWS].reset_index(drop=True)
+        progress(pd.concat([rows, part], axis=1), len(X))
+    return pd.concat(parts, ignore_index=True)
+
+def score_upload(session_id, domain, filename, filepath, progress=None):
+    """Score a saved upload and store the session's results and derived artifacts.
+    progress, when given, receives each scored chunk as it completes (see score_in_chunks)."""
+    # Read and process the CSV
+    df = pd.read_csv(filepath)
+    
+    if domain == 'supermarket':
+        # Use existing supermarket processing
+        X, original_df = preprocess_data(df)
+        predictions = score_in_chunks(predict_supermarket_leakage, X, original_df, progress)
+        shadow_scorer.submit(session_id, domain, X, predictions)
+        df_with_preds = pd.concat([original_df.reset_index(drop=True), predictions], axis=1)
+        # Generate visualizations
+        visualizations = generate_visualizations(df_with_preds)
+        chart_payload = generate_supermarket_chart_list(df_with_preds)
+        
+        # Calculate summary statistics
+        total_records = len(df_with_preds)
+        anomaly_count = len(df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "Anomaly"])
+        no_leakage_count = len(df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "No Leakage"])
+        
+        # Generate separate files for anomalies and no leakage
+        no_leakage_df = df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "No Leakage"]
+        anomaly_df = df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "Anomaly"]
+        
+    elif domain == 'telecom':
+        # Telecom-specific processing using ML model
+        X, original_df = preprocess_telecom_data(df)
+        predictions = score_in_chunks(predict_telecom_leakage, X, original_df, progress)
+        shadow_scorer.submit(session_id, domain, X, predictions)
+        df_with_preds = pd.concat([original_df.reset_index(drop=True), predictions], axis=1)
+        
+        # Generate telecom visualizations
+        visualizations = generate_telecom_visualizations(df_with_preds)
+        chart_payload = generate_telecom_chart_list(df_with_preds)
+        
+        # Calculate summary statistics for telecom
+        total_records = len(df_with_preds)
+        anomaly_count = len(df_with_preds[df_with_preds["Leakage"] == "Yes"])
+        no_leakage_count = len(df_with_preds[df_with_preds["Leakage"] == "No"])
+        
+        # Generate separate files for anomalies and no leakage
+        no_leakage_df = df_with_preds[df_with_preds["Leakage"] == "No"]
+        anomaly_df = df_with_preds[df_with_preds["Leakage"] == "Yes"]
+    
+    # Save results with session ID
+    output_filename = f"{session_id}_processed_{filename}"
+    output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_filename)
+    df_with_preds.to_csv(output_path, index=False)
+    
+    no_leakage_filename = f"{session_id}_no_leakage_{filename}"
+    anomaly_filename = f"{session_id}_anomaly_{filename}"
+    
+    no_leakage_path = os.path.join(app.config['OUTPUT_FOLDER'], no_leakage_filename)
+    anomaly_path = os.path.join(app.config['OUTPUT_FOLDER'], anomaly_filename)
+    
+    no_leakage_df.to_csv(no_leakage_path, index=False)
+    anomaly_df.to_csv(anomaly_path, index=False)
+    
+    results = {
+        'success': True,
+        'message': f'{domain.title()} file processed successfully!',
+        'summary': {
+            'total_records': total_records,
+            'anomaly_count': anomaly_count,
+            'no_leakage_count': no_leakage_count,
+            'anomaly_percentage': round((anomaly_count / total_records) * 100, 2)
+        },
+        'visualizations': visualizations,
+        'download_links': {
+            'all_results': output_filename,
+            'anomalies_only': anomaly_filename,
+            'no_leakage_only': no_leakage_filename
+        },
+        'processed_data_path': output_path,
+        'timestamp': pd.Timestamp.now().timestamp(),
+        'domain': domain,
+        'session_id': session_id,
+        'model_version': get_pipeline(domain)[1]
+    }
+    
+    # Store results for the session, with the dashboard charts ready to serve
+    results_store[session_id] = results
+    results_store.put_charts(session_id, chart_payload, chart_payload_version(results['model_version']))
+    row_index_executor.submit(ensure_session_row_index, session_id, results)
+    try:
+        leakage_rollups.apply_session(session_id, domain, df_with_preds)
+    except Exception as e:
+        # The session itself is fine; running "python rollups.py [--db ...]" adds it later
+        print(f"❌ Could not update leakage rollups for {session_id}: {e}")
+    try:
+        ensure_session_cube(session_id, results, df_with_preds)
+    except Exception as e:
+        # The cube endpoint builds it on first use instead
+        print(f"❌ Could not build the leakage cube for {session_id}: {e}")
+    
+    return results
+
+def run_scoring_job(session_id, domain, filename, filepath):
+    """Background upload scoring that publishes converging chart/stats snapshots per chunk"""
+    definition = SUPERMARKET_CHARTS if domain == 'supermarket' else TELECOM_CHARTS
+    charts = None
+    def progress(chunk, total_rows):
+        nonlocal charts
+        if charts is None:
+            charts = ProgressiveCharts(definition, expected_rows=total_rows)
+        charts.add(chunk)
+        scoring_jobs.publish(session_id, 'progress', {'stage': 'scoring', **charts.snapshot()})
+    try:
+        scoring_jobs.publish(session_id, 'progress', {'stage': 'reading'})
+        results = score_upload(session_id, domain, filename, filepath, progress)
+        scoring_jobs.publish(session_id, 'done', {'session_id': session_id, 'summary': results['summary']})
+    except Exception as e:
+        print(f"❌ Scoring job {session_id} failed: {e}")
+        scoring_jobs.publish(session_id, 'failed', {'error': f'Error processing {domain} file: {str(e)}'})
+
 def process_upload(domain):
-    """Generic upload processing function"""
+    """Generic upload processing function. With ?async=1 the file is scored in a background
+    job and the response (202) carries the job's event stream URL; otherwise it waits."""
     if 'file' not in request.files:
         return jsonify({'error': 'No file selected'}), 400
     
@@ -1301,83 +1569,15 @@ def process_upload(domain):
             filename = secure_filename(file.filename)
             filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"{session_id}_{filename}")
             file.save(filepath)
-            
-            # Read and process the CSV
-            df = pd.read_csv(filepath)
-            
-            if domain == 'supermarket':
-                # Use existing supermarket processing
-                X, original_df = preprocess_data(df)
-                predictions = predict_supermarket_leakage(X)
-                df_with_preds = pd.concat([original_df.reset_index(drop=True), predictions], axis=1)
-                # Generate visualizations
-                visualizations = generate_visualizations(df_with_preds)
-                
-                # Calculate summary statistics
-                total_records = len(df_with_preds)
-                anomaly_count = len(df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "Anomaly"])
-                no_leakage_count = len(df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "No Leakage"])
-                
-                # Generate separate files for anomalies and no leakage
-                no_leakage_df = df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "No Leakage"]
-                anomaly_df = df_with_preds[df_with_preds["Leakage_Flag_Pred"] == "Anomaly"]
-                
-            elif domain == 'telecom':
-                # Telecom-specific processing using ML model
-                X, original_df = preprocess_telecom_data(df)
-                predictions = predict_telecom_leakage(X)
-                df_with_preds = pd.concat([original_df.reset_index(drop=True), predictions], axis=1)
-                
-                # Generate telecom visualizations
-                visualizations = generate_telecom_visualizations(df_with_preds)
-                
-                # Calculate summary statistics for telecom
-                total_records = len(df_with_preds)
-                anomaly_count = len(df_with_preds[df_with_preds["Leakage"] == "Yes"])
-                no_leakage_count = len(df_with_preds[df_with_preds["Leakage"] == "No"])
-                
-                # Generate separate files for anomalies and no leakage
-                no_leakage_df = df_with_preds[df_with_preds["Leakage"] == "No"]
-                anomaly_df = df_with_preds[df_with_preds["Leakage"] == "Yes"]
-            
-            # Save results with session ID
-            output_filename = f"{session_id}_processed_{filename}"
-            output_path = os.path.join(app.config['OUTPUT_FOLDER'], output_filename)
-            df_with_preds.to_csv(output_path, index=False)
-            
-            no_leakage_filename = f"{session_id}_no_leakage_{filename}"
-            anomaly_filename = f"{session_id}_anomaly_{filename}"
-            
-            no_leakage_path = os.path.join(app.config['OUTPUT_FOLDER'], no_leakage_filename)
-            anomaly_path = os.path.join(app.config['OUTPUT_FOLDER'], anomaly_filename)
-            
-            no_leakage_df.to_csv(no_leakage_path, index=False)
-            anomaly_df.to_csv(anomaly_path, index=False)
-            
-            results = {
-                'success': True,
-                'message': f'{domain.title()} file processed successfully!',
-                'summary': {
-                    'total_records': total_records,
-                    'anomaly_count': anomaly_count,
-                    'no_leakage_count': no_leakage_count,
-                    'anomaly_percentage': round((anomaly_count / total_records) * 100, 2)
-                },
-                'visualizations': visualizations,
-                'download_links': {
-                    'all_results': output_filename,
-                    'anomalies_only': anomaly_filename,
-                    'no_leakage_only': no_leakage_filename
-                },
-                'processed_data_path': output_path,
-                'timestamp': pd.Timestamp.now().timestamp(),
-                'domain': domain,
-                'session_id': session_id
-            }
-            
-            # Store results for the session
-            results_store[session_id] = results
-            
+
+            if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+                # The session id doubles as the job id
+                scoring_jobs.create(session_id, domain)
+                scoring_executor.submit(run_scoring_job, session_id, domain, filename, filepath)
+                return jsonify({'success': True, 'session_id': session_id, 'job_id': session_id,
+                                'events_url': f'/api/jobs/{session_id}/events'}), 202
+
+            score_upload(session_id, domain, filename, filepath)
             return jsonify({'success': True, 'session_id': session_id})
             
         except Exception as e:
@@ -1385,316 +1585,479 @@ def process_upload(domain):
     
     return jsonify({'error': 'Invalid file format. Please upload a CSV, XLSX, or XLS file.'}), 400
 
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Latest progress snapshot of a background scoring job (for clients without EventSource)"""
+    status = scoring_jobs.status(job_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, **status})
+
+@app.route('/api/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events for a background scoring job: 'progress' with partial charts and stats
+    after each scored chunk, then 'done' (with the session id) or 'failed'"""
+    if scoring_jobs.get(job_id) is None:
+        # Unknown here (another worker, or a restart), but a finished session needs no progress
+        session_data = results_store.get(job_id, touch=False)
+        if session_data is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        event = {'session_id': job_id, 'summary': session_data.get('summary', {})}
+        return app.response_class(f"event: done\ndata: {fast_json.dumps(event)}\n\n", mimetype='text/event-stream')
+
+    try:
+        last_seq = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_seq = 0
+    response = app.response_class(scoring_jobs.stream(job_id, last_seq), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/download/<filename>')
 def download_file(filename):
+    """Download a session artifact, optionally converted (?format=csv|jsonl|parquet|xlsx)
+    and/or projected (?columns=a,b,c). Files on disk support Range requests."""
+    path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
+    fmt = request.args.get('format')
+    columns = request.args.get('columns')
     try:
-        return send_file(
-            os.path.join(app.config['OUTPUT_FOLDER'], filename),
-            as_attachment=True,
-            download_name=filename
-        )
+        if not fmt and not columns:
+            if resolve_artifact(path) == path:
+                # Unmodified artifact: conditional/Range-capable send_file, served with the
+                # server's sendfile support where the WSGI server provides a file_wrapper
+                return send_file(path, as_attachment=True, download_name=filename, conditional=True)
+            # Cold artifacts may have been gzipped by the janitor; serve them decompressed
+            return send_file(open_artifact(path), as_attachment=True, download_name=filename)
+
+        try:
+            fmt, columns = parse_export_request(path, fmt, columns)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        download_name = f"{os.path.splitext(filename)[0]}.{extension}"
+        target = derived_path(path, fmt, columns)
+        chunk_rows = int(os.getenv('DOWNLOAD_CHUNK_ROWS', 50000))
+
+        # Converted copies are kept next to the artifact; once written they are served like
+        # plain files. Range requests and xlsx need the finished file, others stream first.
+        if not os.path.exists(target):
+            if request.range is None and fmt in STREAMABLE_FORMATS:
+                response = app.response_class(
+                    stream_and_keep(path, fmt, columns, target, chunk_rows),
+                    mimetype=mimetype
+                )
+                response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+                return response
+            try:
+                materialize(path, fmt, columns, target, chunk_rows)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': str(e)}), 400
+        return send_file(target, mimetype=mimetype, as_attachment=True, download_name=download_name, conditional=True)
     except Exception as e:
+        session_id = session_id_from_filename(filename)
+        if session_id and results_store.is_expired(session_id):
+            return jsonify({'error': 'File expired and was cleaned up'}), 410
         return jsonify({'error': f'File not found: {str(e)}'}), 404
 
 # Visualization API endpoints
 @app.route('/api/visualize/telecom')
 def api_visualize_telecom():
-    """Get telecom visualization data"""
-    # Try to find the most recent processed data
-    latest_df = None
-    latest_session = None
-    
-    if results_store:
-        # Get the most recent session
-        latest_session = max(results_store.keys(), key=lambda x: results_store[x].get('timestamp', 0))
-        if latest_session and 'processed_data_path' in results_store[latest_session]:
-            try:
-                latest_df = pd.read_csv(results_store[latest_session]['processed_data_path'])
-                print(f"Using data from session: {latest_session}")
-            except Exception as e:
-                print(f"Error reading latest data: {e}")
+    """Get telecom visualization data for the most recent telecom session"""
+    # Indexed lookup on domain + timestamp; the stored payload is served without recomputation
+    latest = results_store.latest_charts('telecom')
+    if latest is not None:
+        try:
+            print(f"Using data from session: {latest[0]}")
+            return session_chart_response(*latest)
+        except Exception as e:
+            print(f"Error reading latest data: {e}")
     
-    if latest_df is not None:
-        chart_data = generate_telecom_chart_list(latest_df)
-        return jsonify(chart_data)
-    else:
-        return jsonify({"charts": [{"error": "No telecom data available"}], "stats": {}})
+    return jsonify({"charts": [{"error": "No telecom data available"}], "stats": {}})
 
 @app.route('/api/visualize/supermarket')
 def api_visualize_supermarket():
-    """Get supermarket visualization data"""
-    # Try to find the most recent processed data
-    latest_df = None
-    latest_session = None
-    
-    if results_store:
-        # Get the most recent session
-        latest_session = max(results_store.keys(), key=lambda x: results_store[x].get('timestamp', 0))
-        if latest_session and 'processed_data_path' in results_store[latest_session]:
-            try:
-                latest_df = pd.read_csv(results_store[latest_session]['processed_data_path'])
-                print(f"Using data from session: {latest_session}")
-            except Exception as e:
-                print(f"Error reading latest data: {e}")
+    """Get supermarket visualization data for the most recent supermarket session"""
+    # Indexed lookup on domain + timestamp; the stored payload is served without recomputation
+    latest = results_store.latest_charts('supermarket')
+    if latest is not None:
+        try:
+            print(f"Using data from session: {latest[0]}")
+            return session_chart_response(*latest)
+        except Exception as e:
+            print(f"Error reading latest data: {e}")
     
-    if latest_df is not None:
-        chart_data = generate_supermarket_chart_list(latest_df)
-        return jsonify(chart_data)
-    else:
-        return jsonify({"charts": [{"error": "No supermarket data available"}], "stats": {}})
+    return jsonify({"charts": [{"error": "No supermarket data available"}], "stats": {}})
 
 @app.route('/api/visualize/session/<session_id>')
 def api_visualize_session(session_id):
     """Get visualization data for a specific session"""
-    if session_id not in results_store:
-        return jsonify({"charts": [{"error": "Session not found"}], "stats": {}}), 404
-    
-    session_data = results_store[session_id]
+    charts, version = results_store.get_charts(session_id)
+    if charts is None and session_id not in results_store:
+        error, status = missing_session(session_id)
+        return jsonify({"charts": [{"error": error}], "stats": {}}), status
     
     try:
-        if 'processed_data_path' in session_data:
-            df = pd.read_csv(session_data['processed_data_path'])
-        else:
-            return jsonify({"charts": [{"error": "No processed data available"}], "stats": {}}), 404
-        
-        # Determine dataset type based on columns
-        if 'Leakage_Flag_Pred' in df.columns and 'Anomaly_Type_Pred' in df.columns:
-            # This is supermarket data
-            chart_data = generate_supermarket_chart_list(df)
-        elif 'Leakage' in df.columns:
-            # This is telecom data
-            chart_data = generate_telecom_chart_list(df)
-        else:
-            # Generic dataset
-            chart_data = generate_generic_chart_list(df)
-        
-        return jsonify(chart_data)
-        
+        return session_chart_response(session_id, charts, version)
     except Exception as e:
         return jsonify({"charts": [{"error": f"Error processing data: {str(e)}"}], "stats": {}}), 500
 
 # Additional API endpoints for enhanced functionality
 @app.route('/api/sessions')
 def list_sessions():
-    """List all available sessions"""
-    sessions = []
-    for session_id, data in results_store.items():
-        sessions.append({
-            'session_id': session_id,
-            'domain': data.get('domain'),
-            'timestamp': data.get('timestamp'),
-            'total_records': data.get('summary', {}).get('total_records', 0),
-            'anomaly_count': data.get('summary', {}).get('anomaly_count', 0)
-        })
-    return jsonify({'sessions': sessions})
+    """List available sessions, newest first (?domain=, ?limit=, ?offset= for paging)"""
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit and offset must be integers'}), 400
+    sessions, total = results_store.list_sessions(request.args.get('domain'), limit, offset)
+    return jsonify({'sessions': sessions, 'total': total, 'limit': limit, 'offset': offset})
+
+def rollup_query_args():
+    """Shared ?domain=, ?zone=/?anomaly_type=/?channel= (comma lists), ?date_from=, ?date_to= arguments"""
+    domain = request.args.get('domain')
+    if domain not in ('supermarket', 'telecom'):
+        raise ValueError("domain must be 'supermarket' or 'telecom'")
+    filters = {dimension: [value.strip() for value in request.args.get(dimension, '').split(',') if value.strip()]
+               for dimension in DIMENSIONS}
+    return domain, filters, request.args.get('date_from'), request.args.get('date_to')
+
+@app.route('/api/rollups/trend')
+def rollup_trend():
+    """Leakage counts and amounts over time across every scored session (?granularity=day|week|month)"""
+    try:
+        domain, filters, date_from, date_to = rollup_query_args()
+        granularity = request.args.get('granularity', 'day')
+        series = leakage_rollups.trend(domain, granularity, filters, date_from, date_to)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Error reading rollups: {str(e)}'}), 500
+    return jsonify({'success': True, 'domain': domain, 'granularity': granularity, 'series': series})
+
+@app.route('/api/rollups/compare')
+def rollup_compare():
+    """Leakage totals per zone, anomaly_type or channel (?by=), optionally per period (?granularity=)"""
+    try:
+        domain, filters, date_from, date_to = rollup_query_args()
+        by = request.args.get('by', 'zone')
+        granularity = request.args.get('granularity') or None
+        groups = leakage_rollups.compare(domain, by, filters, date_from, date_to, granularity)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Error reading rollups: {str(e)}'}), 500
+    return jsonify({'success': True, 'domain': domain, 'by': by, 'granularity': granularity, 'groups': groups})
 
 @app.route('/api/session/<session_id>/summary')
 def session_summary(session_id):
     """Get summary for a specific session"""
-    if session_id in results_store:
-        data = results_store[session_id]
+    data = results_store.summary(session_id)
+    if data is not None:
         return jsonify({
             'success': True,
-            'summary': data.get('summary', {}),
-            'domain': data.get('domain'),
-            'timestamp': data.get('timestamp')
+            'summary': data['summary'],
+            'domain': data['domain'],
+            'timestamp': data['timestamp']
         })
     else:
-        return jsonify({'success': False, 'error': 'Session not found'}), 404
+        error, status = missing_session(session_id)
+        return jsonify({'success': False, 'error': error}), status
+
+@app.route('/api/session/<session_id>/rows')
+def session_rows(session_id):
+    """Filtered, sorted, cursor-paginated rows of a session (filters are documented in row_index.query_rows)"""
+    session_data = results_store.get(session_id)
+    if session_data is None:
+        error, status = missing_session(session_id)
+        return jsonify({'success': False, 'error': error}), status
+    if 'processed_data_path' not in session_data:
+        return jsonify({'success': False, 'error': 'No processed data found for this session'}), 404
 
-# Report Generation Endpoints
-@app.route('/api/supermarket/generate-report/<session_id>', methods=['POST'])
-def generate_supermarket_report(session_id):
-    """Generate comprehensive report for supermarket domain"""
     try:
-        # Use the anomaly dataset directly from the model output directory
-        anomaly_data_path = "model/super_market/output_datasets/anomaly_data.csv"
-        
-        if not os.path.exists(anomaly_data_path):
-            return jsonify({'success': False, 'error': 'Anomaly data not found. Please run analysis first.'}), 404
-        
-        # Read the anomaly data
-        leakage_data = pd.read_csv(anomaly_data_path)
-        
-        if leakage_data.empty:
-            return jsonify({'success': False, 'error': 'No anomaly data available for report generation'}), 400
-        
-        # Get a sample of the data for the report
-        leakage_sample = leakage_data.head(10)
-        
-        # Calculate total leakage amount in INR (assuming USD to INR conversion rate of 87.79)
-        total_leakage_inr = leakage_data['Balance_Amount'].sum() * 87.79
-        
-        # Get total records from the full dataset to calculate percentage
-        full_dataset_path = "model/super_market/output_datasets/new_supermarket_with_predictions.csv"
-        if os.path.exists(full_dataset_path):
-            full_dataset = pd.read_csv(full_dataset_path)
-            total_records = len(full_dataset)
-        else:
-            total_records = len(leakage_data)  # Fallback if full dataset not available
-        
-        leakage_percentage = (len(leakage_data) / total_records * 100) if total_records > 0 else 0
-        
-        # Create visualizations
-        visualizations_buffer = create_supermarket_visualizations(leakage_data)
-        
-        # Check if Gemini API key is available
-        gemini_api_key = os.getenv('GEMINI_API_KEY')
-        
-        if gemini_api_key:
-            # Try to generate the report using the integrated analysis with Gemini API
-            try:
-                from integrated_analysis import IntegratedAnalyzer
-                analyzer = IntegratedAnalyzer()
-                # Configure the API key
-                genai.configure(api_key=gemini_api_key)
+        result = query_rows(ensure_session_row_index(session_id, session_data), request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Error querying rows: {str(e)}'}), 500
+    return jsonify({'success': True, **result})
+
+def session_timeseries(session_data, metric, granularity):
+    """A session's resampled (period, value) series, cached with its parsed frame"""
+    return frame_cache.subset(
+        session_data['processed_data_path'], f"timeseries:{metric}:{granularity}",
+        lambda df: resample_metric(df, session_data.get('domain'), metric, granularity)
+    )
+
+@app.route('/api/session/<session_id>/timeseries')
+def session_timeseries_endpoint(session_id):
+    """Resampled trend of a session (?metric=records|billed|leakage_count|leakage_amount,
+    ?granularity=day|week|month), downsampled with LTTB to at most ?points= points"""
+    session_data = results_store.get(session_id)
+    if session_data is None:
+        error, status = missing_session(session_id)
+        return jsonify({'success': False, 'error': error}), status
+    if 'processed_data_path' not in session_data:
+        return jsonify({'success': False, 'error': 'No processed data found for this session'}), 404
+
+    metric = request.args.get('metric', 'billed')
+    granularity = request.args.get('granularity', 'month')
+    try:
+        points = min(max(int(request.args.get('points', DEFAULT_POINTS)), 3), MAX_POINTS)
+        series = session_timeseries(session_data, metric, granularity)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Error building time series: {str(e)}'}), 500
+
+    sampled = downsample(series, points)
+    return jsonify({
+        'success': True,
+        'metric': metric,
+        'granularity': granularity,
+        'total_points': len(series),
+        'series': [{'period': period, 'value': value}
+                   for period, value in zip(sampled['period'], sampled['value'].tolist())]
+    })
+
+@app.route('/api/session/<session_id>/cube')
+def session_cube_endpoint(session_id):
+    """Slice a session's precomputed leakage cube: ?by= (comma list of dimensions to group by),
+    ?<dimension>= (comma list of values to keep), ?month_from=/?month_to= (YYYY-MM), ?limit=,
+    ?values=1 to also list every dimension's values"""
+    session_data = results_store.get(session_id)
+    if session_data is None:
+        error, status = missing_session(session_id)
+        return jsonify({'success': False, 'error': error}), status
+    if 'processed_data_path' not in session_data:
+        return jsonify({'success': False, 'error': 'No processed data found for this session'}), 404
+
+    domain = session_data.get('domain')
+    by = [dimension.strip() for dimension in request.args.get('by', '').split(',') if dimension.strip()]
+    filters = {dimension: [value.strip() for value in request.args.get(dimension, '').split(',') if value.strip()]
+               for dimension in cube_dimensions(domain)}
+    try:
+        limit = min(max(int(request.args.get('limit', 1000)), 1), 10000)
+        cells = frame_cache.parse(ensure_session_cube(session_id, session_data), 'cells', read_cube)
+        groups, totals, total_groups = query_cube(cells, domain, by, filters, request.args.get('month_from'),
+                                                  request.args.get('month_to'), limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': f'Error querying the leakage cube: {str(e)}'}), 500
+
+    response = {
+        'success': True,
+        'dimensions': cube_dimensions(domain),
+        'by': by,
+        'groups': groups,
+        'total_groups': total_groups,
+        'totals': totals,
+        'cube_cells': len(cells)
+    }
+    if request.args.get('values', '').lower() in ('1', 'true', 'yes'):
+        response['values'] = dimension_values(cells, domain)
+    return jsonify(response)
+
+@app.route('/api/session/<session_id>/shadow')
+def session_shadow(session_id):
+    """Get the candidate model comparison for a session (when shadow scoring is enabled)"""
+    shadow = shadow_scorer.get(session_id)
+    if shadow is None:
+        return jsonify({'success': False, 'error': 'No shadow scoring for this session'}), 404
+    return jsonify({'success': True, 'shadow': shadow})
+
+# Report Generation Endpoints
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Bump when the comprehensive report layout changes so cached documents are rebuilt
+REPORT_FORMAT_VERSION = '1'
+
+def report_cache_path(session_id, domain, model_version, options):
+    """Where the comprehensive report for a session, model version and report options is kept.
+    Session-prefixed so the janitor expires it with the session."""
+    key = json.dumps({'format': REPORT_FORMAT_VERSION, 'model_version': model_version, **options}, sort_keys=True)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_report_{domain}_{digest}.docx")
+
+class ReportRequestError(Exception):
+    """A report request that can't be served as asked (bad option, no anomaly data): a 400, not a 500"""
+
+def report_flag(name, default):
+    """Boolean report option from the query string or JSON body"""
+    body = request.get_json(silent=True) or {}
+    value = request.args.get(name, body.get(name, default))
+    return str(value).lower() not in ('0', 'false', 'no', 'off')
+
+def report_quality():
+    """Figure resolution preset ('draft' or 'print') from the query string or JSON body"""
+    body = request.get_json(silent=True) or {}
+    quality = str(request.args.get('quality', body.get('quality', REPORT_FIGURE_QUALITY))).lower()
+    if quality not in DPI_PRESETS:
+        raise ReportRequestError(f"quality must be one of: {', '.join(DPI_PRESETS)}")
+    return quality
+
+def report_figure_format():
+    """Report figure format ('png' or 'svg') from the query string or JSON body"""
+    body = request.get_json(silent=True) or {}
+    fmt = str(request.args.get('format', body.get('format', REPORT_FIGURE_FORMAT))).lower()
+    if fmt not in FIGURE_FORMATS:
+        raise ReportRequestError(f"format must be one of: {', '.join(FIGURE_FORMATS)}")
+    return fmt
+
+def comprehensive_report(domain, session_id):
+    """Build (or serve the cached) comprehensive Word report for one session's own results.
+
+    Options: ai (default true; needs GEMINI_API_KEY) picks the Gemini analysis over the
+    basic one, quality=draft|print sets the figure resolution (REPORT_FIGURE_QUALITY by
+    default), format=png|svg the figure format (REPORT_FIGURE_FORMAT by default),
+    refresh=1 rebuilds a cached report."""
+    if session_id == 'latest':
+        session_data = results_store.latest(domain)
+        if session_data is None:
+            return jsonify({'success': False, 'error': f'No {domain} session found. Please run analysis first.'}), 404
+        session_id = session_data['session_id']
+    else:
+        session_data = results_store.get(session_id)
+        if session_data is None:
+            error, status = missing_session(session_id)
+            return jsonify({'success': False, 'error': error}), status
+    if session_data.get('domain') != domain:
+        return jsonify({'success': False, 'error': f'Session {session_id} is not a {domain} session'}), 400
+    if 'processed_data_path' not in session_data:
+        return jsonify({'success': False, 'error': 'No processed data found for this session'}), 404
+
+    use_ai = report_flag('ai', True) and bool(os.getenv('GEMINI_API_KEY'))
+    quality = report_quality()
+    fmt = report_figure_format()
+    model_version = session_data.get('model_version')
+    report_path = report_cache_path(session_id, domain, model_version, {'ai': use_ai, 'quality': quality, 'format': fmt})
+    # Where the basic report goes if Gemini fails, so it is never cached as the AI report
+    basic_path = report_cache_path(session_id, domain, model_version, {'ai': False, 'quality': quality, 'format': fmt})
+    download_name = f'{domain}_comprehensive_report_{session_id[:8]}.docx'
+    if os.path.exists(report_path) and not report_flag('refresh', False):
+        return send_file(report_path, mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=download_name)
+
+    # Double clicks and other tabs asking for the same report wait for this build instead of starting their own
+    result = session_flights.do(('report', report_path),
+                                lambda: build_comprehensive_report(domain, session_data, use_ai, report_path,
+                                                                  report_dpi(quality), fmt, basic_path))
+    if isinstance(result, dict):
+        return jsonify(result)
+    return send_file(result, mimetype=DOCX_MIMETYPE, as_attachment=True, download_name=download_name)
+
+def build_comprehensive_report(domain, session_data, use_ai, report_path, dpi=report_dpi('print'), fmt='png',
+                               basic_path=None):
+    """Render the comprehensive report to report_path. If the Gemini analysis was asked for
+    but failed, the basic report is written to basic_path (the cache entry of the non-AI
+    report) instead, so the next request for the AI report tries Gemini again.
+    Returns the path of the written document, or a JSON-ready report summary when Word
+    document creation failed."""
+    # The session's leakage rows, shared with the other endpoints through the frame cache
+    data_path = session_data['processed_data_path']
+    if domain == 'supermarket':
+        leakage_data = frame_cache.subset(data_path, 'leakage', supermarket_leakage_rows)
+        amount_column = 'Balance_Amount'
+    else:
+        leakage_data = frame_cache.subset(data_path, 'anomalies', telecom_anomaly_rows)
+        amount_column = 'Balance_amount'
+
+    if leakage_data.empty:
+        raise ReportRequestError('No anomaly data available for report generation')
+
+    # Get a sample of the data for the report
+    leakage_sample = leakage_data.head(10)
+
+    # Calculate total leakage amount in INR (assuming USD to INR conversion rate of 87.79)
+    total_leakage_inr = leakage_data[amount_column].sum() * 87.79
+
+    # Row count comes from the session summary; no need to parse the full predictions again
+    total_records = session_data.get('summary', {}).get('total_records') or len(leakage_data)
+    leakage_percentage = (len(leakage_data) / total_records * 100) if total_records > 0 else 0
+
+    # Create visualizations
+    if domain == 'supermarket':
+        try:
+            monthly_leakages = session_timeseries(session_data, 'leakage_count', 'month')
+        except ValueError:
+            monthly_leakages = None
+        visualizations = create_supermarket_visualizations(leakage_data, monthly_leakages, dpi, fmt)
+    else:
+        visualizations = create_telecom_visualizations(leakage_data, dpi, fmt)
+
+    report_content = None
+    if use_ai:
+        # Try to generate the report using the integrated analysis with Gemini API
+        try:
+            import google.generativeai as genai
+            from integrated_analysis import IntegratedAnalyzer
+            analyzer = IntegratedAnalyzer()
+            # Configure the API key
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            if domain == 'supermarket':
                 report_content = analyzer.generate_sales_api_report(
                     leakage_data, leakage_sample, total_leakage_inr, leakage_percentage
                 )
-                
-                # Create Word document with AI-generated content and visualizations
-                doc_buffer = create_word_document('supermarket', leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations_buffer)
-                
-                if doc_buffer:
-                    return send_file(
-                        doc_buffer,
-                        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                        as_attachment=True,
-                        download_name=f'supermarket_comprehensive_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.docx'
-                    )
-                else:
-                    # Fallback to basic report if Word document creation fails
-                    pass
-                
-            except Exception as e:
-                print(f"Gemini API report generation failed, falling back to basic report: {str(e)}")
-                # Fall through to basic report generation
-        
-        # Generate basic report and Word document
-        report_content = generate_basic_supermarket_report(leakage_data, total_leakage_inr, leakage_percentage)
-        doc_buffer = create_word_document('supermarket', leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations_buffer)
-        
-        if doc_buffer:
-            return send_file(
-                doc_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                as_attachment=True,
-                download_name=f'supermarket_comprehensive_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.docx'
-            )
+            else:
+                report_content = analyzer.generate_telecom_api_report(
+                    leakage_data, leakage_sample, total_leakage_inr, leakage_percentage
+                )
+        except Exception as e:
+            print(f"Gemini API report generation failed, falling back to basic report: {str(e)}")
+
+    if report_content is None:
+        if use_ai and basic_path:
+            report_path = basic_path
+        if domain == 'supermarket':
+            report_content = generate_basic_supermarket_report(leakage_data, total_leakage_inr, leakage_percentage)
         else:
-            # Fallback to JSON response if Word document creation fails
-            return jsonify({
-                'success': True,
-                'report': {
-                    'content': report_content,
-                    'summary': {
-                        'total_leakage_inr': total_leakage_inr,
-                        'leakage_percentage': leakage_percentage,
-                        'total_anomalies': len(leakage_data),
-                        'domain': 'supermarket',
-                        'report_type': 'Basic Analysis'
-                    }
+            report_content = generate_basic_telecom_report(leakage_data, total_leakage_inr, leakage_percentage)
+
+    doc_buffer = create_word_document(domain, leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations)
+    if not doc_buffer:
+        # Fallback to JSON response if Word document creation fails
+        return {
+            'success': True,
+            'report': {
+                'content': report_content,
+                'summary': {
+                    'total_leakage_inr': total_leakage_inr,
+                    'leakage_percentage': leakage_percentage,
+                    'total_anomalies': len(leakage_data),
+                    'domain': domain,
+                    'report_type': 'Basic Analysis'
                 }
-            })
-            
+            }
+        }
+
+    # Written atomically so a request arriving after this flight never serves half a document
+    tmp_path = f"{report_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(doc_buffer.getvalue())
+    os.replace(tmp_path, report_path)
+    return report_path
+
+@app.route('/api/supermarket/generate-report/<session_id>', methods=['POST'])
+def generate_supermarket_report(session_id):
+    """Generate comprehensive report for a supermarket session"""
+    try:
+        return comprehensive_report('supermarket', session_id)
+    except ReportRequestError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error generating supermarket report: {str(e)}")
         return jsonify({'success': False, 'error': f'Report generation failed: {str(e)}'}), 500
 
 @app.route('/api/telecom/generate-report/<session_id>', methods=['POST'])
 def generate_telecom_report(session_id):
-    """Generate comprehensive report for telecom domain"""
+    """Generate comprehensive report for a telecom session"""
     try:
-        # Use the anomaly dataset directly from the model output directory
-        anomaly_data_path = "model/Telecom/output_dataset/telecom_anomaly_data.csv"
-        
-        if not os.path.exists(anomaly_data_path):
-            return jsonify({'success': False, 'error': 'Anomaly data not found. Please run analysis first.'}), 404
-        
-        # Read the anomaly data
-        leakage_data = pd.read_csv(anomaly_data_path)
-        
-        if leakage_data.empty:
-            return jsonify({'success': False, 'error': 'No anomaly data available for report generation'}), 400
-        
-        # Get a sample of the data for the report
-        leakage_sample = leakage_data.head(10)
-        
-        # Calculate total leakage amount in INR (assuming USD to INR conversion rate of 87.79)
-        total_leakage_inr = leakage_data['Balance_amount'].sum() * 87.79
-        
-        # Get total records from the full dataset to calculate percentage
-        full_dataset_path = "model/Telecom/output_dataset/telecom_predictions.csv"
-        if os.path.exists(full_dataset_path):
-            full_dataset = pd.read_csv(full_dataset_path)
-            total_records = len(full_dataset)
-        else:
-            total_records = len(leakage_data)  # Fallback if full dataset not available
-        
-        leakage_percentage = (len(leakage_data) / total_records * 100) if total_records > 0 else 0
-        
-        # Create visualizations
-        visualizations_buffer = create_telecom_visualizations(leakage_data)
-        
-        # Check if Gemini API key is available
-        gemini_api_key = os.getenv('GEMINI_API_KEY')
-        
-        if gemini_api_key:
-            # Try to generate the report using the integrated analysis with Gemini API
-            try:
-                from integrated_analysis import IntegratedAnalyzer
-                analyzer = IntegratedAnalyzer()
-                # Configure the API key
-                genai.configure(api_key=gemini_api_key)
-                report_content = analyzer.generate_telecom_api_report(
-                    leakage_data, leakage_sample, total_leakage_inr, leakage_percentage
-                )
-                
-                # Create Word document with AI-generated content and visualizations
-                doc_buffer = create_word_document('telecom', leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations_buffer)
-                
-                if doc_buffer:
-                    return send_file(
-                        doc_buffer,
-                        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                        as_attachment=True,
-                        download_name=f'telecom_comprehensive_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.docx'
-                    )
-                else:
-                    # Fallback to basic report if Word document creation fails
-                    pass
-                
-            except Exception as e:
-                print(f"Gemini API report generation failed, falling back to basic report: {str(e)}")
-                # Fall through to basic report generation
-        
-        # Generate basic report and Word document
-        report_content = generate_basic_telecom_report(leakage_data, total_leakage_inr, leakage_percentage)
-        doc_buffer = create_word_document('telecom', leakage_data, total_leakage_inr, leakage_percentage, report_content, visualizations_buffer)
-        
-        if doc_buffer:
-            return send_file(
-                doc_buffer,
-                mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                as_attachment=True,
-                download_name=f'telecom_comprehensive_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.docx'
-            )
-        else:
-            # Fallback to JSON response if Word document creation fails
-            return jsonify({
-                'success': True,
-                'report': {
-                    'content': report_content,
-                    'summary': {
-                        'total_leakage_inr': total_leakage_inr,
-                        'leakage_percentage': leakage_percentage,
-                        'total_anomalies': len(leakage_data),
-                        'domain': 'telecom',
-                        'report_type': 'Basic Analysis'
-                    }
-                }
-            })
-            
+        return comprehensive_report('telecom', session_id)
+    except ReportRequestError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         print(f"Error generating telecom report: {str(e)}")
         return jsonify({'success': False, 'error': f'Report generation failed: {str(e)}'}), 500
@@ -1778,8 +2141,16 @@ def get_anomaly_data_info():
 # Test visualization creation endpoint
 @app.route('/api/test-visualizations', methods=['GET'])
 def test_visualizations():
-    """Test endpoint to create and return sample visualizations"""
+    """Test endpoint to create and return sample visualizations (quality=draft|print, default
+    draft; format=png|svg, default png)"""
     try:
+        quality = request.args.get('quality', 'draft')
+        if quality not in DPI_PRESETS:
+            return jsonify({'success': False, 'error': f"quality must be one of: {', '.join(DPI_PRESETS)}"}), 400
+        fmt = request.args.get('format', 'png')
+        if fmt not in FIGURE_FORMATS:
+            return jsonify({'success': False, 'error': f"format must be one of: {', '.join(FIGURE_FORMATS)}"}), 400
+        dpi = report_dpi(quality)
         # Check if anomaly data exists
         supermarket_anomaly_path = "model/super_market/output_datasets/anomaly_data.csv"
         telecom_anomaly_path = "model/Telecom/output_dataset/telecom_anomaly_data.csv"
@@ -1790,13 +2161,13 @@ def test_visualizations():
         if os.path.exists(supermarket_anomaly_path):
             try:
                 leakage_data = pd.read_csv(supermarket_anomaly_path)
-                viz_buffer = create_supermarket_visualizations(leakage_data)
+                viz_buffer = create_supermarket_visualizations(leakage_data, dpi=dpi, fmt=fmt)
                 if viz_buffer:
                     results['supermarket'] = {
                         'success': True,
                         'record_count': len(leakage_data),
                         'columns': list(leakage_data.columns),
-                        'visualization_size': len(viz_buffer.getvalue())
+                        'visualization_size': len(viz_buffer[fmt].getvalue())
                     }
                 else:
                     results['supermarket'] = {'success': False, 'error': 'Visualization creation failed'}
@@ -1809,13 +2180,13 @@ def test_visualizations():
         if os.path.exists(telecom_anomaly_path):
             try:
                 leakage_data = pd.read_csv(telecom_anomaly_path)
-                viz_buffer = create_telecom_visualizations(leakage_data)
+                viz_buffer = create_telecom_visualizations(leakage_data, dpi=dpi, fmt=fmt)
                 if viz_buffer:
                     results['telecom'] = {
                         'success': True,
                         'record_count': len(leakage_data),
                         'columns': list(leakage_data.columns),
-                        'visualization_size': len(viz_buffer.getvalue())
+                        'visualization_size': len(viz_buffer[fmt].getvalue())
                     }
                 else:
                     results['telecom'] = {'success': False, 'error': 'Visualization creation failed'}
@@ -1826,7 +2197,8 @@ def test_visualizations():
         
         return jsonify({
             'success': True,
-            'results': results
+            'results': results,
+            'figure_cache': figure_cache.stats()
         })
         
     except Exception as e:
@@ -1910,145 +2282,157 @@ def test_ai_recommendations():
     except Exception as e:
         return jsonify({'success': False, 'error': f'Error testing AI recommendations: {str(e)}'}), 500
 
+def build_detailed_report(session_id, session_data):
+    """Build the Ollama detailed report for a session, save it with the session and
+    return (docx bytes, file name)"""
+    # Load the processed data (cached; read-only below)
+    data_path = session_data['processed_data_path']
+    processed_data = frame_cache.read_csv(data_path)
+    
+    # Get domain from session data
+    domain = session_data.get('domain', 'supermarket')
+    
+    # Filter for leakage/anomaly data based on domain
+    if domain == 'supermarket':
+        # Filter for anomalies in supermarket data
+        leakage_data = frame_cache.subset(data_path, 'leakage', supermarket_leakage_rows)
+        leakage_column = 'Balance_Amount'
+    else:  # telecom
+        # Filter for leakages in telecom data
+        leakage_data = frame_cache.subset(data_path, 'anomalies', telecom_anomaly_rows)
+        leakage_column = 'Balance_amount'
+    
+    # Calculate total leakage amount
+    if leakage_column in leakage_data.columns:
+        total_leakage = leakage_data[leakage_column].sum() * 87.79  # Convert to INR
+    else:
+        total_leakage = 0
+    
+    # Calculate total revenue from all records in the dataset
+    if leakage_column in processed_data.columns:
+        total_revenue = processed_data[leakage_column].sum() * 87.79  # Convert to INR
+    else:
+        # Fallback: try other amount columns
+        amount_columns = ['Billed_Amount', 'Paid_Amount', 'Billed_amount', 'Paid_amount']
+        total_revenue = 0
+        for col in amount_columns:
+            if col in processed_data.columns:
+                total_revenue = processed_data[col].sum() * 87.79
+                break
+    
+    # Calculate leakage percentage
+    if total_revenue > 0:
+        leakage_percentage = (total_leakage / total_revenue) * 100
+    else:
+        # Alternative calculation: percentage of records with leakage
+        total_records = len(processed_data)
+        leakage_records = len(leakage_data)
+        leakage_percentage = (leakage_records / total_records) * 100 if total_records > 0 else 0
+    
+    # If we still have no leakage data, use the session summary
+    if leakage_percentage == 0 and 'summary' in session_data:
+        summary = session_data['summary']
+        if 'anomaly_percentage' in summary:
+            leakage_percentage = summary['anomaly_percentage']
+        elif 'total_records' in summary and 'anomaly_count' in summary:
+            total_records = summary['total_records']
+            anomaly_count = summary['anomaly_count']
+            leakage_percentage = (anomaly_count / total_records) * 100 if total_records > 0 else 0
+    
+    print(f"Debug - Domain: {domain}")
+    print(f"Debug - Total records: {len(processed_data)}")
+    print(f"Debug - Leakage records: {len(leakage_data)}")
+    print(f"Debug - Total leakage amount: ₹{total_leakage:,.2f}")
+    print(f"Debug - Total revenue: ₹{total_revenue:,.2f}")
+    print(f"Debug - Leakage percentage: {leakage_percentage:.2f}%")
+    
+    # Generate detailed report using Ollama
+    detailed_report = generate_ollama_report(domain, leakage_data, total_leakage, leakage_percentage)
+    
+    # Create Word document
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    doc = Document()
+    
+    # Add title
+    title = doc.add_heading(f'{domain.capitalize()} Detailed Revenue Leakage Report', level=1)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    # Add date and summary
+    doc.add_paragraph(f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    doc.add_paragraph()
+    
+    # Add executive summary
+    doc.add_heading('Executive Summary', level=2)
+    doc.add_paragraph(f"Total Revenue Leakage: ₹{total_leakage:,.2f}")
+    doc.add_paragraph(f"Leakage Percentage: {leakage_percentage:.2f}%")
+    doc.add_paragraph(f"Total Records Analyzed: {len(processed_data):,}")
+    doc.add_paragraph(f"Records with Leakage: {len(leakage_data):,}")
+    doc.add_paragraph()
+    
+    # Add detailed report content
+    doc.add_heading('Detailed Analysis', level=2)
+    for line in detailed_report.split('\n'):
+        if line.strip() == '':
+            doc.add_paragraph()
+        elif line.strip().endswith(':') and len(line.strip()) < 50:  # Likely a heading
+            doc.add_heading(line.strip(' :'), level=3)
+        else:
+            doc.add_paragraph(line)
+    
+    # Save document to buffer
+    doc_buffer = io.BytesIO()
+    doc.save(doc_buffer)
+    doc_buffer.seek(0)
+    
+    # Generate filename
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = f"detailed_{domain}_report_{timestamp}.docx"
+    # Session-prefixed on disk so the janitor cleans it up with the session
+    output_path = os.path.join(app.config['OUTPUT_FOLDER'], f"{session_id}_{filename}")
+    
+    # Ensure output directory exists
+    os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+    
+    # Save to file
+    with open(output_path, 'wb') as f:
+        f.write(doc_buffer.getvalue())
+    
+    # Record the report on the session; update() merges these fields into the stored
+    # results instead of writing back a stale copy over concurrent changes
+    with session_locks.hold(session_id):
+        results_store.update(session_id,
+                             detailed_report_file=f"{session_id}_{filename}",
+                             detailed_report_metrics={
+                                 'total_leakage': total_leakage,
+                                 'leakage_percentage': leakage_percentage,
+                                 'total_records': len(processed_data),
+                                 'leakage_records': len(leakage_data)
+                             })
+    
+    return doc_buffer.getvalue(), filename
+
 @app.route('/api/generate-detailed-report/<session_id>', methods=['POST'])
 def generate_detailed_report(session_id):
     """Generate a detailed report using Ollama3"""
     try:
-        # Check if session exists in memory
-        if session_id not in results_store:
-            return jsonify({"error": "Session not found"}), 404
-            
         # Get session data
-        session_data = results_store[session_id]
+        session_data = results_store.get(session_id)
+        if session_data is None:
+            error, status = missing_session(session_id)
+            return jsonify({"error": error}), status
         
         # Check if we have the processed data path
         if 'processed_data_path' not in session_data:
             return jsonify({"error": "No processed data found for this session"}), 400
             
-        # Load the processed data
-        processed_data = pd.read_csv(session_data['processed_data_path'])
-        
-        # Get domain from session data
-        domain = session_data.get('domain', 'supermarket')
-        
-        # Filter for leakage/anomaly data based on domain
-        if domain == 'supermarket':
-            # Filter for anomalies in supermarket data
-            leakage_data = processed_data[processed_data['Leakage_Flag_Pred'] == 'Anomaly'].copy()
-            leakage_column = 'Balance_Amount'
-        else:  # telecom
-            # Filter for leakages in telecom data
-            leakage_data = processed_data[processed_data['Leakage'] == 'Yes'].copy()
-            leakage_column = 'Balance_amount'
-        
-        # Calculate total leakage amount
-        if leakage_column in leakage_data.columns:
-            total_leakage = leakage_data[leakage_column].sum() * 87.79  # Convert to INR
-        else:
-            total_leakage = 0
-        
-        # Calculate total revenue from all records in the dataset
-        if leakage_column in processed_data.columns:
-            total_revenue = processed_data[leakage_column].sum() * 87.79  # Convert to INR
-        else:
-            # Fallback: try other amount columns
-            amount_columns = ['Billed_Amount', 'Paid_Amount', 'Billed_amount', 'Paid_amount']
-            total_revenue = 0
-            for col in amount_columns:
-                if col in processed_data.columns:
-                    total_revenue = processed_data[col].sum() * 87.79
-                    break
-        
-        # Calculate leakage percentage
-        if total_revenue > 0:
-            leakage_percentage = (total_leakage / total_revenue) * 100
-        else:
-            # Alternative calculation: percentage of records with leakage
-            total_records = len(processed_data)
-            leakage_records = len(leakage_data)
-            leakage_percentage = (leakage_records / total_records) * 100 if total_records > 0 else 0
-        
-        # If we still have no leakage data, use the session summary
-        if leakage_percentage == 0 and 'summary' in session_data:
-            summary = session_data['summary']
-            if 'anomaly_percentage' in summary:
-                leakage_percentage = summary['anomaly_percentage']
-            elif 'total_records' in summary and 'anomaly_count' in summary:
-                total_records = summary['total_records']
-                anomaly_count = summary['anomaly_count']
-                leakage_percentage = (anomaly_count / total_records) * 100 if total_records > 0 else 0
-        
-        print(f"Debug - Domain: {domain}")
-        print(f"Debug - Total records: {len(processed_data)}")
-        print(f"Debug - Leakage records: {len(leakage_data)}")
-        print(f"Debug - Total leakage amount: ₹{total_leakage:,.2f}")
-        print(f"Debug - Total revenue: ₹{total_revenue:,.2f}")
-        print(f"Debug - Leakage percentage: {leakage_percentage:.2f}%")
-        
-        # Generate detailed report using Ollama
-        detailed_report = generate_ollama_report(domain, leakage_data, total_leakage, leakage_percentage)
-        
-        # Create Word document
-        doc = Document()
-        
-        # Add title
-        title = doc.add_heading(f'{domain.capitalize()} Detailed Revenue Leakage Report', level=1)
-        title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        # Add date and summary
-        doc.add_paragraph(f"Report generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        doc.add_paragraph()
-        
-        # Add executive summary
-        doc.add_heading('Executive Summary', level=2)
-        doc.add_paragraph(f"Total Revenue Leakage: ₹{total_leakage:,.2f}")
-        doc.add_paragraph(f"Leakage Percentage: {leakage_percentage:.2f}%")
-        doc.add_paragraph(f"Total Records Analyzed: {len(processed_data):,}")
-        doc.add_paragraph(f"Records with Leakage: {len(leakage_data):,}")
-        doc.add_paragraph()
-        
-        # Add detailed report content
-        doc.add_heading('Detailed Analysis', level=2)
-        for line in detailed_report.split('\n'):
-            if line.strip() == '':
-                doc.add_paragraph()
-            elif line.strip().endswith(':') and len(line.strip()) < 50:  # Likely a heading
-                doc.add_heading(line.strip(' :'), level=3)
-            else:
-                doc.add_paragraph(line)
-        
-        # Save document to buffer
-        doc_buffer = io.BytesIO()
-        doc.save(doc_buffer)
-        doc_buffer.seek(0)
-        
-        # Generate filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"detailed_{domain}_report_{timestamp}.docx"
-        output_path = os.path.join(app.config['OUTPUT_FOLDER'], filename)
-        
-        # Ensure output directory exists
-        os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
-        
-        # Save to file
-        with open(output_path, 'wb') as f:
-            f.write(doc_buffer.getvalue())
-        
-        # Update session with detailed report info
-        session_data['detailed_report_file'] = filename
-        session_data['detailed_report_metrics'] = {
-            'total_leakage': total_leakage,
-            'leakage_percentage': leakage_percentage,
-            'total_records': len(processed_data),
-            'leakage_records': len(leakage_data)
-        }
-        
-        # Update the session in results_store
-        results_store[session_id] = session_data
+        # Concurrent requests for this session's report share one build (and one LLM call)
+        report_bytes, filename = session_flights.do(('detailed_report', session_id),
+                                                    lambda: build_detailed_report(session_id, session_data))
         
         # Prepare response
         response = send_file(
-            doc_buffer,
+            io.BytesIO(report_bytes),
             mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
             as_attachment=True,
             download_name=filename
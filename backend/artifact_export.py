@@ -0,0 +1,231 @@
+import hashlib
+import os
+import uuid
+
+import pandas as pd
+
+from janitor import resolve_artifact
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+# Formats whose bytes can be produced chunk by chunk; xlsx is a zip that is only valid once complete
+STREAMABLE_FORMATS = ('csv', 'jsonl', 'parquet')
+
+EXCEL_MAX_ROWS = 1048576
+
+
+def artifact_columns(path):
+    """Column names of a CSV artifact, read from its header only"""
+    return list(pd.read_csv(resolve_artifact(path), nrows=0).columns)
+
+
+def parse_export_request(path, fmt, columns):
+    """Validate ?format= and ?columns= for an artifact; returns (fmt, columns or None).
+    Raises ValueError for a bad request and FileNotFoundError for a missing artifact."""
+    if not os.path.exists(resolve_artifact(path)):
+        # Checked up front: a streamed response can't turn into a 404 halfway through
+        raise FileNotFoundError(path)
+    fmt = (fmt or 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if not resolve_artifact(path).endswith(('.csv', '.csv.gz')):
+        raise ValueError("Only CSV artifacts can be converted or projected")
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export needs the optional pyarrow package")
+    if fmt == 'xlsx':
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ValueError("Excel export needs the optional openpyxl package")
+
+    if columns:
+        requested = [column.strip() for column in columns.split(',') if column.strip()]
+        unknown = [column for column in requested if column not in artifact_columns(path)]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        columns = list(dict.fromkeys(requested))
+    return fmt, columns or None
+
+
+def derived_path(path, fmt, columns):
+    """Where the converted/projected copy of an artifact is kept. It keeps the artifact's
+    session prefix so the janitor expires it with the session."""
+    stem = os.path.basename(path)
+    if stem.endswith('.csv'):
+        stem = stem[:-4]
+    tag = hashlib.sha1(','.join(columns).encode()).hexdigest()[:10] if columns else 'all'
+    return os.path.join(os.path.dirname(path), f"{stem}.{tag}.{EXPORT_FORMATS[fmt][1]}")
+
+
+def _chunks(path, columns, chunk_rows, dtype=None):
+    for chunk in pd.read_csv(resolve_artifact(path), usecols=columns, chunksize=chunk_rows, dtype=dtype):
+        # usecols keeps file order; honour the order the columns were requested in
+        yield chunk[columns] if columns else chunk
+
+
+def _column_kind(series):
+    if series.isna().all():
+        return None
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int'
+    if pd.api.types.is_float_dtype(series):
+        return 'float'
+    return 'string'
+
+
+def column_kinds(path, columns, chunk_rows):
+    """Type of each column over the whole file ('int', 'float', 'bool' or 'string').
+
+    pandas infers dtypes per chunk, so a column can be integral (or empty) in the first
+    chunk and fractional or text later. A streamed parquet file can't change its schema
+    halfway, so it is fixed from this scan, which unifies the chunks the way one full
+    read_csv would (int + float -> float, anything mixed with text -> string). An empty
+    chunk counts as missing values: int becomes float and bool becomes string.
+    """
+    seen = {}
+    for chunk in _chunks(path, columns, chunk_rows):
+        for column, series in chunk.items():
+            seen.setdefault(column, set()).add(_column_kind(series))
+    kinds = {}
+    for column, column_seen in seen.items():
+        if None in column_seen:
+            column_seen.discard(None)
+            # Missing values don't fit int64/bool; a full read_csv would widen the column
+            column_seen = {{'int': 'float', 'bool': 'string'}.get(kind, kind) for kind in column_seen}
+        if not column_seen:
+            kinds[column] = 'float'  # all empty: what read_csv makes of it
+        elif len(column_seen) == 1:
+            kinds[column] = column_seen.pop()
+        elif column_seen <= {'int', 'float'}:
+            kinds[column] = 'float'
+        else:
+            kinds[column] = 'string'
+    return kinds
+
+
+class _ByteSink:
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def encode_chunks(path, fmt, columns, chunk_rows):
+    """Yield the artifact as bytes in the requested format, reading chunk_rows rows at a time"""
+    if fmt == 'csv':
+        for i, chunk in enumerate(_chunks(path, columns, chunk_rows)):
+            yield chunk.to_csv(index=False, header=(i == 0)).encode('utf-8')
+    elif fmt == 'jsonl':
+        for chunk in _chunks(path, columns, chunk_rows):
+            yield chunk.to_json(orient='records', lines=True, date_format='iso').encode('utf-8')
+    elif fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Every chunk is read with the whole-file types (text columns as the raw strings),
+        # so each one matches the schema written up front
+        kinds = column_kinds(path, columns, chunk_rows)
+        arrow_types = {'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_(), 'string': pa.string()}
+        pandas_types = {'int': 'int64', 'float': 'float64', 'bool': 'bool', 'string': str}
+        schema = pa.schema([(column, arrow_types[kind]) for column, kind in kinds.items()])
+        sink = _ByteSink()
+        writer = None
+        try:
+            dtype = {column: pandas_types[kind] for column, kind in kinds.items()}
+            for chunk in _chunks(path, columns, chunk_rows, dtype):
+                if writer is None:
+                    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                yield sink.drain()
+        finally:
+            if writer is not None:
+                writer.close()
+        yield sink.drain()
+    else:
+        raise ValueError(f"{fmt} can't be streamed")
+
+
+def write_xlsx(path, columns, target, chunk_rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('data')
+    rows = 0
+    for i, chunk in enumerate(_chunks(path, columns, chunk_rows)):
+        if i == 0:
+            sheet.append(list(chunk.columns))
+        rows += len(chunk)
+        if rows >= EXCEL_MAX_ROWS:
+            raise ValueError(f"Too many rows for Excel (limit {EXCEL_MAX_ROWS - 1:,}); use csv, jsonl or parquet")
+        # Excel has no NaN; write empty cells instead
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(target)
+
+
+def materialize(path, fmt, columns, target, chunk_rows):
+    """Write the converted artifact to target (atomically) so it can be served with Range/sendfile"""
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    try:
+        if fmt == 'xlsx':
+            write_xlsx(path, columns, tmp, chunk_rows)
+        else:
+            with open(tmp, 'wb') as f:
+                for data in encode_chunks(path, fmt, columns, chunk_rows):
+                    f.write(data)
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return target
+
+
+def stream_and_keep(path, fmt, columns, target, chunk_rows):
+    """Stream the converted artifact while teeing it to target, so a resumed (Range) download
+    or a repeat request can be served from the finished file"""
+    tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+    completed = False
+    try:
+        with open(tmp, 'wb') as f:
+            for data in encode_chunks(path, fmt, columns, chunk_rows):
+                f.write(data)
+                yield data
+        os.replace(tmp, target)
+        completed = True
+    finally:
+        # Client went away mid-download: drop the partial copy
+        if not completed and os.path.exists(tmp):
+            os.remove(tmp)
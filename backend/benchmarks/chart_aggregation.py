@@ -0,0 +1,184 @@
+"""
+Dashboard chart-list benchmark: single-pass aggregation vs the previous mask-and-count code.
+
+Builds synthetic processed frames shaped like the telecom and supermarket outputs,
+times generate_*_chart_list from app.py against the pre-aggregation implementations
+kept below, and checks both produce the same charts and stats.
+
+Usage (from backend/):
+    python benchmarks/chart_aggregation.py [--rows 1000000,10000000] [--repeat 3]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('JANITOR_ENABLED', 'false')
+
+
+def legacy_telecom_chart_list(df):
+    """generate_telecom_chart_list before the aggregation engine"""
+    total_records = len(df)
+    leakage_count = len(df[df['Leakage'] == 'Yes'])
+    no_leakage_count = len(df[df['Leakage'] == 'No'])
+    stats = {
+        'total_records': total_records,
+        'leakage_count': leakage_count,
+        'no_leakage_count': no_leakage_count,
+        'data_columns': len(df.columns),
+        'leakage_percentage': round((leakage_count / total_records) * 100, 2),
+        'total_billed': df['Billed_amount'].sum(),
+        'avg_billed': df['Billed_amount'].mean(),
+        'max_billed': df['Billed_amount'].max(),
+        'min_billed': df['Billed_amount'].min(),
+    }
+    chart_list = [{"title": "Overall Leakage Status", "type": "doughnut",
+                   "data": df['Leakage'].value_counts().to_dict()}]
+    anomalies_df = df[df['Leakage'] == 'Yes']
+    chart_list.extend([
+        {"title": "Anomalies by Type", "type": "bar", "data": anomalies_df['Anomaly_type'].value_counts().to_dict()},
+        {"title": "Plan Category Distribution (Anomalies)", "type": "pie",
+         "data": anomalies_df['Plan_category'].value_counts().to_dict()},
+        {"title": "Zone Area Analysis", "type": "horizontalBar", "data": anomalies_df['Zone_area'].value_counts().to_dict()},
+        {"title": "Payment Status Overview", "type": "polarArea",
+         "data": anomalies_df['Payment_status'].value_counts().to_dict()},
+        {"title": "Top Plan Categories (Anomalies)", "type": "bar",
+         "data": anomalies_df['Plan_category'].value_counts().to_dict()},
+    ])
+    return {"charts": chart_list, "stats": stats}
+
+
+def legacy_supermarket_chart_list(df):
+    """generate_supermarket_chart_list before the aggregation engine"""
+    total_records = len(df)
+    anomaly_count = len(df[df['Anomaly_Type_Pred'] != 'No Anomaly'])
+    no_anomaly_count = len(df[df['Anomaly_Type_Pred'] == 'No Anomaly'])
+    stats = {
+        'total_records': total_records,
+        'anomaly_count': anomaly_count,
+        'no_anomaly_count': no_anomaly_count,
+        'data_columns': len(df.columns),
+        'anomaly_percentage': round((anomaly_count / total_records) * 100, 2),
+        'total_sales': df['Billed_Amount'].sum(),
+        'avg_sales': df['Billed_Amount'].mean(),
+        'max_sales': df['Billed_Amount'].max(),
+        'min_sales': df['Billed_Amount'].min(),
+    }
+    chart_list = [
+        {"title": "Overall Anomaly Detection", "type": "doughnut",
+         "data": df['Anomaly_Type_Pred'].value_counts().to_dict()},
+        {"title": "Predicted Leakage Status", "type": "pie", "data": df['Leakage_Flag_Pred'].value_counts().to_dict()},
+    ]
+    anomalies_df = df[df['Anomaly_Type_Pred'] != 'No Anomaly'].copy()
+    chart_list.extend([
+        {"title": "Specific Anomaly Types", "type": "bar",
+         "data": anomalies_df['Anomaly_Type_Pred'].value_counts().to_dict()},
+        {"title": "Customer Type Distribution (Anomalies)", "type": "horizontalBar",
+         "data": anomalies_df['Customer_Type'].value_counts().to_dict()},
+        {"title": "Order Channel Analysis", "type": "polarArea",
+         "data": anomalies_df['Order_Channel'].value_counts().to_dict()},
+        {"title": "Top Product Categories (Anomalies)", "type": "bar",
+         "data": anomalies_df['Product_Category'].value_counts().head(8).to_dict()},
+    ])
+    return {"charts": chart_list, "stats": stats}
+
+
+def _choice(rng, labels, rows, p=None):
+    # astype(str) gives the string dtype read_csv produces for the same pandas version
+    return pd.Series(np.asarray(labels, dtype=object)[rng.choice(len(labels), rows, p=p)]).astype(str)
+
+
+def telecom_frame(rows, rng):
+    leakage = _choice(rng, ['Yes', 'No'], rows, p=[0.57, 0.43])
+    anomaly = _choice(rng, ['Duplicate entries', 'Excess payment', 'Extra data usage', 'Missing charges',
+                            'Wrong plan charge', 'Usage mismatch'], rows)
+    return pd.DataFrame({
+        'Invoice_number': np.arange(rows),
+        'Plan_category': _choice(rng, ['Prepaid', 'Postpaid', 'Data Pack', 'Roaming'], rows),
+        'Zone_area': _choice(rng, [f'Circle-{z}' for z in 'ABCDEFGH'] + ['Metro-A', 'Metro-B', 'Rural-North'], rows),
+        'Payment_status': _choice(rng, ['Paid', 'Unpaid', 'Partially Paid', 'Overdue'], rows),
+        'Billed_amount': rng.gamma(2.0, 400.0, rows).round(2),
+        'Balance_amount': rng.gamma(1.0, 150.0, rows).round(2),
+        'Leakage': leakage,
+        'Anomaly_type': anomaly.where(leakage == 'Yes', 'No anomaly'),
+    })
+
+
+def supermarket_frame(rows, rng):
+    anomaly = _choice(rng, ['No Anomaly', 'Discount Abuse', 'Billing Error', 'Tax Mismatch', 'Unpaid Balance',
+                            'Duplicate Invoice'], rows, p=[0.6, 0.1, 0.1, 0.08, 0.07, 0.05])
+    return pd.DataFrame({
+        'Invoice_Num_Int': np.arange(rows),
+        'Customer_Type': _choice(rng, ['Regular', 'Member', 'VIP', 'New'], rows),
+        'Order_Channel': _choice(rng, ['In-Store', 'Online', 'Phone', 'App'], rows),
+        'Product_Category': _choice(rng, ['Books', 'Grocery', 'Electronics', 'Clothing', 'Home', 'Toys', 'Beauty',
+                                          'Sports', 'Garden', 'Pharmacy', 'Dairy', 'Bakery'], rows),
+        'Billed_Amount': rng.gamma(2.0, 60.0, rows).round(2),
+        'Balance_Amount': rng.gamma(1.0, 10.0, rows).round(2),
+        'Anomaly_Type_Pred': anomaly,
+        'Leakage_Flag_Pred': pd.Series(np.where(anomaly == 'No Anomaly', 'No Leakage', 'Anomaly')).astype(str),
+    })
+
+
+def same_payload(a, b):
+    if len(a['charts']) != len(b['charts']):
+        return False
+    for x, y in zip(a['charts'], b['charts']):
+        if x.get('title') != y.get('title') or x.get('data') != y.get('data'):
+            return False
+    for key, value in a['stats'].items():
+        other = b['stats'].get(key)
+        if isinstance(value, float) or isinstance(other, float):
+            if not math.isclose(value, other, rel_tol=1e-9):
+                return False
+        elif value != other:
+            return False
+    return True
+
+
+def best_of(fn, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard chart-list aggregation')
+    parser.add_argument('--rows', default='1000000,10000000', help='comma separated row counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import app
+
+    cases = [
+        ('telecom', telecom_frame, legacy_telecom_chart_list, app.generate_telecom_chart_list),
+        ('supermarket', supermarket_frame, legacy_supermarket_chart_list, app.generate_supermarket_chart_list),
+    ]
+    rng = np.random.default_rng(7)
+    failed = False
+    print(f"{'domain':<12} {'rows':>11} {'previous':>10} {'single-pass':>12} {'speedup':>8}  match")
+    for rows in (int(value) for value in args.rows.split(',')):
+        for domain, make_frame, legacy, current in cases:
+            df = make_frame(rows, rng)
+            legacy_seconds, expected = best_of(legacy, df, args.repeat)
+            current_seconds, actual = best_of(current, df, args.repeat)
+            match = same_payload(expected, actual)
+            failed = failed or not match
+            print(f"{domain:<12} {rows:>11,} {legacy_seconds:>9.3f}s {current_seconds:>11.3f}s "
+                  f"{legacy_seconds / current_seconds:>7.1f}x  {'✅' if match else '❌'}")
+            del df, expected, actual
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Streamed parquet export check: schema fixed up front vs one full read_csv.
+
+Writes small CSVs whose columns change type between chunks (integers then decimals,
+integers then an empty chunk, empty then text, booleans then an empty chunk,
+zero-padded numbers, ...), streams each as parquet with encode_chunks at a tiny chunk
+size, and checks that every file is written without error and reads back with the
+types and values a single pd.read_csv of the whole file gives.
+
+Usage (from backend/):
+    python benchmarks/export_schema.py [--chunk-rows 2]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+from artifact_export import encode_chunks  # noqa: E402
+
+CASES = {
+    'int then decimal': 'a,b\n1,x\n2,y\n3,z\n7.5,w\n',
+    'int then empty chunk': 'a,b\n1,x\n2,y\n,z\n,w\n',
+    'empty then text': 'a,b\n,x\n,y\nfoo,z\nbar,w\n',
+    'empty then int': 'a,b\n,x\n,y\n3,z\n4,w\n',
+    'bool then empty chunk': 'a,b\nTrue,x\nFalse,y\n,z\n,w\n',
+    'number then text': 'a,b\n001,x\n002,y\nA3,z\nA4,w\n',
+    'all empty': 'a,b\n,x\n,y\n,z\n,w\n',
+}
+
+
+def arrow_kind(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    return 'string'
+
+
+def text_values(series):
+    return [None if pd.isna(value) else str(value) for value in series]
+
+
+def check(name, text, chunk_rows):
+    import pyarrow.parquet as pq
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'export.csv')
+        with open(path, 'w') as f:
+            f.write(text)
+        expected = pd.read_csv(path)
+        try:
+            data = b''.join(encode_chunks(path, 'parquet', None, chunk_rows))
+        except Exception as e:
+            print(f"❌ {name}: streaming failed: {e}")
+            return False
+    streamed = pq.read_table(io.BytesIO(data)).to_pandas()
+    problems = []
+    for column in expected.columns:
+        want, got = arrow_kind(expected[column].dtype), arrow_kind(streamed[column].dtype)
+        if want == 'string':
+            # read_csv leaves mixed columns as Python objects; parquet holds them as text
+            same = text_values(expected[column]) == text_values(streamed[column])
+        else:
+            same = expected[column].equals(streamed[column].astype(expected[column].dtype))
+        if want != got or not same:
+            problems.append(f"{column} is {got}, expected {want}{'' if same else ' (values differ)'}")
+    print(f"{'❌' if problems else '✅'} {name}{': ' + '; '.join(problems) if problems else ''}")
+    return not problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check streamed parquet export types against a full read')
+    parser.add_argument('--chunk-rows', type=int, default=2)
+    args = parser.parse_args()
+
+    results = [check(name, text, args.chunk_rows) for name, text in CASES.items()]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Report figure concurrency stress test: many threads rendering different reports at once.
+
+Builds a set of distinct telecom and supermarket figure specs, renders each once on its
+own as the reference, then renders all of them repeatedly from a thread pool in shuffled
+order, with a tiny thread switch interval to force interleaving. Every threaded PNG must
+be byte-identical to its reference (no panels, titles or colours crossing between
+figures) and no render may fail; pyplot must end with no figures registered. Without
+RENDER_LOCK this fails most runs (mathtext parse errors from the log colorbar labels).
+
+Usage (from backend/):
+    python benchmarks/figure_concurrency.py [--figures 12] [--threads 8] [--rounds 3] [--dpi 100]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import report_figures  # noqa: E402
+
+
+def telecom_spec(index, rng):
+    rows = int(rng.integers(200, 20000))
+    bought = rng.choice([1.0, 2.0, 5.0, 10.0, 20.0], rows)
+    df = pd.DataFrame({
+        'Anomaly_type': rng.choice(['Extra data usage', 'Missing charges', 'Excess payment'][:1 + index % 3], rows),
+        'Zone_area': rng.choice([f'Circle-{z}' for z in 'ABCDEFGH'[:2 + index % 6]], rows),
+        'Balance_amount': rng.gamma(1.0 + index, 150.0, rows).round(2),
+        'Data_bought': bought,
+        'Data_used': np.clip(bought * rng.normal(1.0, 0.3, rows), 0, None).round(2),
+    })
+    return report_figures.telecom_figure_spec(df)
+
+
+def supermarket_spec(index, rng):
+    rows = int(rng.integers(200, 5000))
+    df = pd.DataFrame({
+        'Anomaly_Type_Pred': rng.choice(['Overcharge', 'Undercharge', 'Duplicate'][:1 + index % 3], rows),
+        'Product_Category': rng.choice([f'Category {c}' for c in range(3 + index)], rows),
+        'Balance_Amount': rng.gamma(1.0 + index, 80.0, rows).round(2),
+    })
+    monthly = pd.DataFrame({'value': rng.integers(0, 50 * (index + 1), 12)})
+    return report_figures.supermarket_figure_spec(df, monthly)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress concurrent report figure rendering')
+    parser.add_argument('--figures', type=int, default=12, help='distinct figure specs')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=3, help='times each figure is rendered concurrently')
+    parser.add_argument('--switch-interval', type=float, default=1e-5, help='interpreter thread switch interval (s)')
+    parser.add_argument('--dpi', type=int, default=report_figures.DPI_PRESETS['draft'])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(17)
+    specs = [(telecom_spec if i % 2 else supermarket_spec)(i, rng) for i in range(args.figures)]
+
+    start = time.perf_counter()
+    reference = [report_figures.render_figure(spec, args.dpi) for spec in specs]
+    serial_seconds = time.perf_counter() - start
+    if len(set(reference)) != len(reference):
+        print("❌ Reference figures are not all distinct; cross-talk would go unnoticed")
+        return 1
+
+    # Switch threads far more often than the default 5 ms, so unsafe interleavings actually happen
+    sys.setswitchinterval(args.switch_interval)
+    jobs = list(range(len(specs))) * args.rounds
+    random.Random(5).shuffle(jobs)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(lambda i: report_figures.render_figure(specs[i], args.dpi), jobs))
+    threaded_seconds = time.perf_counter() - start
+
+    mismatches = sum(png != reference[i] for i, png in zip(jobs, results))
+    import matplotlib.pyplot as plt
+    leaked = len(plt.get_fignums())
+
+    print(f"{len(specs)} figures, serial: {serial_seconds:.2f}s ({serial_seconds / len(specs) * 1000:.0f} ms each)")
+    print(f"{len(jobs)} renders on {args.threads} threads: {threaded_seconds:.2f}s "
+          f"({threaded_seconds / len(jobs) * 1000:.0f} ms each)")
+    print(f"{'✅' if not mismatches else '❌'} {mismatches} of {len(jobs)} threaded renders differ from their reference")
+    print(f"{'✅' if not leaked else '❌'} {leaked} figures left open in pyplot")
+    return 1 if mismatches or leaked else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Cold-start benchmark for the Flask app.
+
+Imports app.py in fresh interpreters, reports the median wall time and exits
+non-zero if it exceeds the budget or if any of the lazily loaded report/LLM
+libraries got imported at startup.
+
+Usage (from backend/):
+    python benchmarks/import_time.py [--runs 5] [--budget 2.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported when a report endpoint first needs them
+LAZY_MODULES = [
+    'matplotlib.pyplot',
+    'seaborn',
+    'plotly.graph_objs',
+    'docx',
+    'google.generativeai',
+    'requests',
+    'integrated_analysis',
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure_once():
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # app.py prints model loading status, the probe result is the last line
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cold import time of app.py')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=float(os.getenv('IMPORT_TIME_BUDGET', 2.5)),
+                        help='Maximum allowed median import time in seconds')
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    times = [sample['seconds'] for sample in samples]
+    median = statistics.median(times)
+    eager = sorted({module for sample in samples for module in sample['loaded']})
+
+    print(f"app import time over {args.runs} runs: median {median:.3f}s, "
+          f"min {min(times):.3f}s, max {max(times):.3f}s (budget {args.budget:.3f}s)")
+
+    failed = False
+    if eager:
+        print(f"❌ Imported eagerly at startup: {', '.join(eager)}")
+        failed = True
+    if median > args.budget:
+        print(f"❌ Cold start regressed: {median:.3f}s > {args.budget:.3f}s")
+        failed = True
+    if not failed:
+        print("✅ Cold start within budget")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+JSON response benchmark: Flask's standard encoder vs the orjson-backed FastJSONProvider.
+
+Builds the payloads the heavy endpoints return (dashboard chart lists, generic-dataset
+histograms, /api/results with its plotly figures, a page of /api/session/<id>/rows),
+times producing the full jsonify() response with each provider, and checks both decode
+to the same data. The plotly figure strings are timed separately against
+json.dumps(fig, cls=PlotlyJSONEncoder).
+
+Usage (from backend/):
+    python benchmarks/json_serialization.py [--rows 1000000] [--repeat 20]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('JANITOR_ENABLED', 'false')
+os.environ.setdefault('PREDICTION_CACHE_ENABLED', 'false')
+
+
+def _choice(rng, labels, rows):
+    return pd.Series(np.asarray(labels, dtype=object)[rng.integers(0, len(labels), rows)]).astype(str)
+
+
+def telecom_frame(rows, rng):
+    leakage = _choice(rng, ['Yes', 'No'], rows)
+    return pd.DataFrame({
+        'Invoice_number': np.arange(rows),
+        'Customer_name': _choice(rng, [f'Customer {i}' for i in range(5000)], rows),
+        'Plan_category': _choice(rng, ['Prepaid', 'Postpaid', 'Data Pack', 'Roaming'], rows),
+        'Zone_area': _choice(rng, [f'Circle-{z}' for z in 'ABCDEFGH'], rows),
+        'Payment_status': _choice(rng, ['Paid', 'Unpaid', 'Partially Paid', 'Overdue'], rows),
+        'Billing_date': pd.Series(pd.date_range('2023-01-01', periods=730).strftime('%Y-%m-%d')[
+            rng.integers(0, 730, rows)]),
+        'Billed_amount': rng.gamma(2.0, 400.0, rows).round(2),
+        'Balance_amount': rng.gamma(1.0, 150.0, rows).round(2),
+        'Data_used': rng.gamma(2.0, 5.0, rows).round(2),
+        'Leakage': leakage,
+        'Anomaly_type': _choice(rng, ['Duplicate entries', 'Excess payment', 'Missing charges'], rows)
+        .where(leakage == 'Yes', 'No anomaly'),
+    })
+
+
+def generic_frame(rows, rng, columns=40):
+    data = {f'metric_{i}': rng.lognormal(i % 5, 1.0, rows) for i in range(columns)}
+    data['segment'] = _choice(rng, [f'S{i}' for i in range(30)], rows)
+    return pd.DataFrame(data)
+
+
+def rows_page(df, size=1000):
+    """Records as /api/session/<id>/rows returns them (NumPy scalars left in, as from itertuples)"""
+    page = df.head(size)
+    return {'rows': [dict(zip(page.columns, values)) for values in page.itertuples(index=False)],
+            'total': len(df), 'limit': size, 'offset': 0}
+
+
+def _same(a, b):
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-12) or (math.isnan(a) and math.isnan(b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[key], b[key]) for key in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    # The standard encoder writes NaN where orjson writes null
+    if isinstance(a, float) and math.isnan(a):
+        return b is None
+    return a == b
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON response serialization')
+    parser.add_argument('--rows', type=int, default=1000000, help='rows in the synthetic session frames')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    import plotly.utils
+    from flask.json.provider import DefaultJSONProvider
+
+    import app
+    from fast_json import FastJSONProvider, plotly_json
+
+    rng = np.random.default_rng(3)
+    telecom = telecom_frame(args.rows, rng)
+    generic = generic_frame(min(args.rows, 200000), rng)
+    visualizations = app.generate_telecom_visualizations(telecom)
+    payloads = [
+        ('telecom chart list', app.generate_telecom_chart_list(telecom)),
+        ('generic chart list', app.generate_generic_chart_list(generic)),
+        ('/api/results', {'success': True, 'summary': {'total_records': len(telecom)},
+                          'visualizations': visualizations, 'session_id': 'x' * 36, 'domain': 'telecom'}),
+        ('rows page (1,000)', rows_page(telecom)),
+    ]
+
+    standard = DefaultJSONProvider(app.app)
+    fast = FastJSONProvider(app.app)
+    failed = False
+    print(f"{'payload':<22} {'KB':>7} {'standard':>10} {'orjson':>9} {'speedup':>8}  match")
+    with app.app.app_context():
+        for name, payload in payloads:
+            try:
+                standard_seconds, expected = best_of(lambda: standard.response(payload).get_data(), args.repeat)
+            except TypeError as e:
+                # NumPy integers and the like: the standard encoder can't produce this response at all
+                fast_seconds, actual = best_of(lambda: fast.response(payload).get_data(), args.repeat)
+                print(f"{name:<22} {len(actual) / 1024:>7.0f} {'fails':>10} {fast_seconds * 1000:>7.2f}ms "
+                      f"{'':>8}  ({e})")
+                continue
+            fast_seconds, actual = best_of(lambda: fast.response(payload).get_data(), args.repeat)
+            match = _same(json.loads(expected), json.loads(actual))
+            failed = failed or not match
+            print(f"{name:<22} {len(actual) / 1024:>7.0f} {standard_seconds * 1000:>8.2f}ms "
+                  f"{fast_seconds * 1000:>7.2f}ms {standard_seconds / fast_seconds:>7.1f}x  {'✅' if match else '❌'}")
+
+    import plotly.graph_objs as go
+    figure = go.Figure(data=[go.Bar(x=telecom['Zone_area'].head(50000), y=telecom['Billed_amount'].head(50000))])
+    standard_seconds, expected = best_of(lambda: json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder), args.repeat)
+    fast_seconds, actual = best_of(lambda: plotly_json(figure), args.repeat)
+    match = _same(json.loads(expected), json.loads(actual))
+    failed = failed or not match
+    print(f"{'plotly figure (50k)':<22} {len(actual) / 1024:>7.0f} {standard_seconds * 1000:>8.2f}ms "
+          f"{fast_seconds * 1000:>7.2f}ms {standard_seconds / fast_seconds:>7.1f}x  {'✅' if match else '❌'}")
+    app.figure_cache.shutdown()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
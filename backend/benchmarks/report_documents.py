@@ -0,0 +1,88 @@
+"""
+Word report benchmark: figure format vs document build time and size.
+
+Builds synthetic telecom leakage rows, then for each figure mode renders the report
+figure (uncached) and assembles the Word document with create_word_document, reporting
+render and assembly time, figure bytes and document size. 'legacy' is the full-figure
+300 dpi RGBA PNG the reports embedded before; the other modes are what
+/api/<domain>/generate-report/<id>?quality=...&format=... now produces.
+
+Usage (from backend/):
+    python benchmarks/report_documents.py [--rows 20000] [--repeat 3]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('JANITOR_ENABLED', 'false')
+os.environ.setdefault('PREDICTION_CACHE_ENABLED', 'false')
+os.environ.setdefault('MPLBACKEND', 'Agg')
+# create_word_document asks Gemini for recommendations when a key is set; keep that network call out
+os.environ['GEMINI_API_KEY'] = ''
+
+import report_figures  # noqa: E402
+from benchmarks.report_figures import telecom_leakage_frame  # noqa: E402
+
+
+def legacy_figure(spec):
+    buffer = io.BytesIO()
+    report_figures.draw_figure(spec).savefig(buffer, format='png', dpi=300, bbox_inches='tight')
+    return {'png': io.BytesIO(buffer.getvalue())}
+
+
+def figure(spec, quality, fmt):
+    dpi = report_figures.report_dpi(quality)
+    images = {fmt: io.BytesIO(report_figures.render_figure(spec, dpi, fmt))}
+    if fmt == 'svg':
+        images['png'] = io.BytesIO(report_figures.render_figure(spec, report_figures.report_dpi('draft'), 'png'))
+    return images
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Word report figure formats')
+    parser.add_argument('--rows', type=int, default=20000, help='leakage rows in the report')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    import app
+
+    df = telecom_leakage_frame(args.rows, np.random.default_rng(23))
+    df['Plan_category'] = 'Postpaid'
+    spec = report_figures.telecom_figure_spec(df)
+    content = app.generate_basic_telecom_report(df, df['Balance_amount'].sum() * 87.79, 12.5)
+    modes = [
+        ('legacy png 300dpi', lambda: legacy_figure(spec)),
+        ('png print', lambda: figure(spec, 'print', 'png')),
+        ('png draft', lambda: figure(spec, 'draft', 'png')),
+        ('svg print', lambda: figure(spec, 'print', 'svg')),
+    ]
+    print(f"{'mode':<18} {'render':>8} {'docx':>8} {'figure KB':>10} {'docx KB':>8}")
+    for name, render in modes:
+        render_seconds, images = best_of(render, args.repeat)
+        build_seconds, document = best_of(
+            lambda: app.create_word_document('telecom', df, 0.0, 12.5, content, images), args.repeat)
+        figure_kb = sum(len(image.getvalue()) for image in images.values()) / 1024
+        print(f"{name:<18} {render_seconds:>7.2f}s {build_seconds:>7.3f}s {figure_kb:>10.0f} "
+              f"{len(document.getvalue()) / 1024:>8.0f}")
+    app.figure_cache.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Telecom report figure benchmark: render time of the usage panel as leakage rows grow.
+
+Builds synthetic telecom leakage rows, then times the figure spec and its render at
+draft dpi, once as the density grid used above SCATTER_MAX_POINTS and once forced to
+the plain every-point scatter the report drew before.
+
+Usage (from backend/):
+    python benchmarks/report_figures.py [--rows 10000,100000,1000000] [--dpi 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import report_figures  # noqa: E402
+
+
+def telecom_leakage_frame(rows, rng):
+    bought = rng.choice([1.0, 2.0, 5.0, 10.0, 20.0, 50.0], rows)
+    used = np.clip(bought * rng.normal(1.0, 0.25, rows), 0, None)
+    # A few rows use far more than they paid for
+    heavy = rng.random(rows) < 0.002
+    used[heavy] *= rng.uniform(2, 6, heavy.sum())
+    return pd.DataFrame({
+        'Anomaly_type': pd.Series(rng.choice(['Extra data usage', 'Missing charges', 'Excess payment'], rows)),
+        'Zone_area': pd.Series(rng.choice([f'Circle-{z}' for z in 'ABCDEFGH'], rows)),
+        'Balance_amount': rng.gamma(1.0, 150.0, rows).round(2),
+        'Data_bought': bought,
+        'Data_used': used.round(2),
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark telecom report figure rendering')
+    parser.add_argument('--rows', default='10000,100000,1000000', help='comma separated leakage row counts')
+    parser.add_argument('--dpi', type=int, default=report_figures.DPI_PRESETS['draft'])
+    parser.add_argument('--scatter-limit', type=int, default=1000000,
+                        help='largest row count to also time as a plain scatter')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    limit = report_figures.SCATTER_MAX_POINTS
+    # Warm up matplotlib so the first row count doesn't pay for imports and font loading
+    report_figures.render_figure(report_figures.telecom_figure_spec(telecom_leakage_frame(100, rng)), args.dpi)
+
+    print(f"{'rows':>10} {'mode':>8} {'spec':>8} {'render':>8} {'png KB':>8}")
+    for rows in (int(value) for value in args.rows.split(',')):
+        df = telecom_leakage_frame(rows, rng)
+        modes = [('density', limit)]
+        if rows > limit and rows <= args.scatter_limit:
+            modes.append(('scatter', rows))
+        for mode, max_points in modes:
+            report_figures.SCATTER_MAX_POINTS = max_points
+            spec_seconds, spec = timed(lambda: report_figures.telecom_figure_spec(df))
+            render_seconds, png = timed(lambda: report_figures.render_figure(spec, args.dpi))
+            label = spec['panels'][3]['kind']
+            print(f"{rows:>10,} {label:>8} {spec_seconds:>7.3f}s {render_seconds:>7.3f}s {len(png) / 1024:>8.0f}")
+        report_figures.SCATTER_MAX_POINTS = limit
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
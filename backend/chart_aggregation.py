@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+
+# Declarative dashboard chart lists. Each spec is one chart:
+#   count: column   -> value counts of the column
+#   sum/by          -> sum of a numeric column per value of another (sorted by key, like groupby)
+#   rows            -> 'all' (default) or 'flagged' (the domain's anomaly rows)
+#   top             -> keep the N most frequent values
+#   optional        -> skip the chart when its columns are missing instead of failing
+# 'stats' names the headline numbers for ProgressiveCharts snapshots, matching the keys of
+# the domain's generate_*_chart_list stats: flagged/clean row counts, their percentage, and
+# sum/avg/max/min of the first amount column present.
+TELECOM_CHARTS = {
+    # Rows with Leakage == 'Yes' are the anomalies
+    'flag': ('Leakage', '==', 'Yes'),
+    'charts': [
+        {'title': "Overall Leakage Status", 'type': "doughnut", 'count': 'Leakage'},
+        {'title': "Anomalies by Type", 'type': "bar", 'count': 'Anomaly_type', 'rows': 'flagged'},
+        {'title': "Plan Category Distribution (Anomalies)", 'type': "pie", 'count': 'Plan_category', 'rows': 'flagged'},
+        {'title': "Zone Area Analysis", 'type': "horizontalBar", 'count': 'Zone_area', 'rows': 'flagged'},
+        {'title': "Payment Status Overview", 'type': "polarArea", 'count': 'Payment_status', 'rows': 'flagged'},
+        {'title': "Top Plan Categories (Anomalies)", 'type': "bar", 'count': 'Plan_category', 'rows': 'flagged'},
+    ],
+    'stats': {'flagged': 'leakage_count', 'clean': ('no_leakage_count', 'Leakage', 'No'),
+              'percentage': 'leakage_percentage', 'amount': (('Billed_amount',), 'billed')},
+}
+
+SUPERMARKET_CHARTS = {
+    # Rows with a specific anomaly type are the anomalies
+    'flag': ('Anomaly_Type_Pred', '!=', 'No Anomaly'),
+    'charts': [
+        {'title': "Overall Anomaly Detection", 'type': "doughnut", 'count': 'Anomaly_Type_Pred'},
+        {'title': "Predicted Leakage Status", 'type': "pie", 'count': 'Leakage_Flag_Pred'},
+        {'title': "Specific Anomaly Types", 'type': "bar", 'count': 'Anomaly_Type_Pred', 'rows': 'flagged'},
+        {'title': "Customer Type Distribution (Anomalies)", 'type': "horizontalBar", 'count': 'Customer_Type',
+         'rows': 'flagged'},
+        {'title': "Order Channel Analysis", 'type': "polarArea", 'count': 'Order_Channel', 'rows': 'flagged'},
+        {'title': "Top Product Categories (Anomalies)", 'type': "bar", 'count': 'Product_Category', 'rows': 'flagged',
+         'top': 8},
+    ],
+    'stats': {'flagged': 'anomaly_count', 'clean': ('no_anomaly_count', 'Anomaly_Type_Pred', 'No Anomaly'),
+              'percentage': 'anomaly_percentage', 'amount': (('Billed_Amount', 'Amount'), 'sales')},
+}
+
+
+def _native(values):
+    """numpy/pandas scalars -> plain Python values for JSON keys"""
+    return [value.item() if isinstance(value, np.generic) else value for value in values]
+
+
+class ChartAggregator:
+    """Counts and sums for a set of chart specs from one grouped pass per column.
+
+    Every column is factorized once into integer codes; combined with the 0/1 flag
+    (anomaly) code, a single bincount gives the per-value totals for both all rows and
+    the flagged rows, so no boolean-mask copies of the frame are made. Value counts are
+    ordered like value_counts() (most frequent first); ties keep first-appearance order.
+    """
+
+    def __init__(self, df, flag):
+        self.df = df
+        self._codes = {}
+        self._grouped = {}
+        # The flag comes from the flag column's codes, so that column is hashed only once
+        column, op, value = flag
+        codes, uniques = self._factorize(column)
+        matches = np.flatnonzero(np.asarray(uniques, dtype=object) == value)
+        hit = codes == matches[0] if len(matches) else np.zeros(len(codes), dtype=bool)
+        self.flagged = hit if op == '==' else ~hit
+
+    def _factorize(self, column):
+        if column not in self._codes:
+            self._codes[column] = pd.factorize(self.df[column], sort=False)
+        return self._codes[column]
+
+    def grouped(self, column, weights=None):
+        """(uniques, totals) where totals[:, 0] covers unflagged rows and totals[:, 1] flagged ones"""
+        key = (column, weights)
+        if key not in self._grouped:
+            codes, uniques = self._factorize(column)
+            # Missing values (code -1) land in the first pair of bins, which is dropped
+            combined = (codes + 1) * 2 + self.flagged
+            if weights is not None:
+                w = pd.to_numeric(self.df[weights], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                totals = np.bincount(combined, weights=np.nan_to_num(w), minlength=2 * (len(uniques) + 1))
+            else:
+                totals = np.bincount(combined, minlength=2 * (len(uniques) + 1))
+            self._grouped[key] = (uniques, totals.reshape(-1, 2)[1:])
+        return self._grouped[key]
+
+    def _select(self, totals, rows):
+        return totals[:, 1] if rows == 'flagged' else totals.sum(axis=1)
+
+    def counts(self, column, rows='all', top=None):
+        uniques, totals = self.grouped(column)
+        selected = self._select(totals, rows)
+        order = np.argsort(-selected, kind='stable')
+        order = order[selected[order] > 0]
+        if top is not None:
+            order = order[:top]
+        return dict(zip(_native(np.asarray(uniques)[order]), selected[order].tolist()))
+
+    def sums(self, column, by, rows='all'):
+        uniques, totals = self.grouped(by, weights=column)
+        counts = self._select(self.grouped(by)[1], rows)
+        selected = self._select(totals, rows)
+        keys = np.asarray(uniques)
+        order = np.argsort(keys, kind='stable')
+        order = order[counts[order] > 0]
+        return dict(zip(_native(keys[order]), selected[order].tolist()))
+
+    def flagged_count(self):
+        return int(self.flagged.sum())
+
+    def chart(self, spec):
+        rows = spec.get('rows', 'all')
+        if 'count' in spec:
+            data = self.counts(spec['count'], rows, spec.get('top'))
+        else:
+            data = self.sums(spec['sum'], spec['by'], rows)
+        return {"title": spec['title'], "type": spec['type'], "data": data}
+
+
+def build_chart_list(df, definition):
+    """Chart list for a domain definition (TELECOM_CHARTS / SUPERMARKET_CHARTS).
+
+    Returns (aggregator, charts). As in the original dashboards, when no rows are flagged
+    the charts stop at the first flagged-rows chart with an explanatory entry."""
+    aggregator = ChartAggregator(df, definition['flag'])
+    has_flagged = aggregator.flagged_count() > 0
+    charts = []
+    for spec in definition['charts']:
+        needed = [spec[key] for key in ('count', 'sum', 'by') if key in spec]
+        if spec.get('optional') and any(column not in df.columns for column in needed):
+            continue
+        if spec.get('rows') == 'flagged' and not has_flagged:
+            charts.append({"error": "No specific anomalies found to detail."})
+            break
+        charts.append(aggregator.chart(spec))
+    return aggregator, charts
+
+
+class ProgressiveCharts:
+    """Chart list and headline stats of a domain definition, accumulated chunk by chunk.
+
+    Each scored chunk goes through a ChartAggregator and its per-value (unflagged,
+    flagged) totals are added to running totals, so a snapshot after any chunk equals
+    build_chart_list over every row seen so far; ordering and top-N are applied when the
+    snapshot is taken. Amount stats keep a running sum/count/min/max.
+    """
+
+    def __init__(self, definition, expected_rows=None):
+        self.definition = definition
+        self.expected_rows = expected_rows
+        self.rows = 0
+        self.flagged = 0
+        self.columns = 0
+        self._totals = {}
+        self._amount_column = None
+        self._amount = {'sum': 0.0, 'count': 0, 'max': None, 'min': None}
+
+    @staticmethod
+    def _key(spec):
+        # ChartAggregator.grouped() arguments: (column, weights)
+        return (spec['by'], spec['sum']) if 'sum' in spec else (spec['count'], None)
+
+    def add(self, df):
+        aggregator = ChartAggregator(df, self.definition['flag'])
+        self.rows += len(df)
+        self.flagged += aggregator.flagged_count()
+        self.columns = len(df.columns)
+        keys = []
+        for spec in self.definition['charts']:
+            key = self._key(spec)
+            if any(column is not None and column not in df.columns for column in key):
+                continue
+            # Sum charts also need the per-value row counts; charts sharing a column count it once
+            for needed in ((key[0], None), key):
+                if needed not in keys:
+                    keys.append(needed)
+        for key in keys:
+            uniques, totals = aggregator.grouped(*key)
+            running = self._totals.setdefault(key, {})
+            for value, pair in zip(_native(np.asarray(uniques)), totals):
+                running[value] = running[value] + pair if value in running else pair.copy()
+
+        candidates, _ = self.definition['stats']['amount']
+        if self._amount_column is None:
+            self._amount_column = next((column for column in candidates if column in df.columns), None)
+        if self._amount_column is not None:
+            values = pd.to_numeric(df[self._amount_column], errors='coerce').dropna()
+            if len(values):
+                amount = self._amount
+                amount['sum'] += float(values.sum())
+                amount['count'] += len(values)
+                amount['max'] = max(float(values.max()), amount['max'] if amount['max'] is not None else -np.inf)
+                amount['min'] = min(float(values.min()), amount['min'] if amount['min'] is not None else np.inf)
+        return self
+
+    def _chart(self, spec):
+        rows = spec.get('rows', 'all')
+        if 'count' in spec:
+            running = self._totals.get((spec['count'], None), {})
+            # Insertion order is first appearance, the tie order value_counts() keeps
+            pairs = [(value, int(pair[1] if rows == 'flagged' else pair.sum())) for value, pair in running.items()]
+            pairs = sorted((pair for pair in pairs if pair[1] > 0), key=lambda pair: -pair[1])
+            if spec.get('top') is not None:
+                pairs = pairs[:spec['top']]
+            data = dict(pairs)
+        else:
+            counts = self._totals.get((spec['by'], None), {})
+            running = self._totals.get((spec['by'], spec['sum']), {})
+            data = {}
+            for value in sorted(running):
+                count = counts.get(value)
+                if count is not None and (count[1] if rows == 'flagged' else count.sum()) > 0:
+                    data[value] = float(running[value][1] if rows == 'flagged' else running[value].sum())
+        return {"title": spec['title'], "type": spec['type'], "data": data}
+
+    def snapshot(self):
+        """{'charts', 'stats'} for the rows added so far, plus scored/expected row counts"""
+        charts = []
+        for spec in self.definition['charts']:
+            if spec.get('optional') and self._key(spec) not in self._totals:
+                continue
+            if spec.get('rows') == 'flagged' and not self.flagged:
+                charts.append({"error": "No specific anomalies found to detail."})
+                break
+            charts.append(self._chart(spec))
+
+        names = self.definition['stats']
+        clean_key, clean_column, clean_value = names['clean']
+        clean = self._totals.get((clean_column, None), {}).get(clean_value)
+        stats = {
+            'total_records': self.rows,
+            names['flagged']: self.flagged,
+            clean_key: int(clean.sum()) if clean is not None else 0,
+            'data_columns': self.columns,
+            names['percentage']: round(self.flagged / self.rows * 100, 2) if self.rows else 0.0,
+        }
+        amount = self._amount
+        if self._amount_column is not None and amount['count']:
+            _, suffix = names['amount']
+            stats.update({
+                f'total_{suffix}': amount['sum'],
+                f'avg_{suffix}': amount['sum'] / amount['count'],
+                f'max_{suffix}': amount['max'],
+                f'min_{suffix}': amount['min'],
+            })
+        return {"charts": charts, "stats": stats, "scored_rows": self.rows, "expected_rows": self.expected_rows}
+
+
+def amount_stats(df, column):
+    """sum/mean/max/min of an amount column (NaN-skipping, like the pandas reductions)"""
+    values = df[column]
+    return {'sum': values.sum(), 'mean': values.mean(), 'max': values.max(), 'min': values.min()}
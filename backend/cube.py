@@ -0,0 +1,159 @@
+import os
+import re
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from rollups import LEAKAGE_LABELS, parse_billing_dates, resolve_column
+
+# Cube dimensions -> source column in each domain's processed data ('month' is derived from the billing date)
+CUBE_DIMENSIONS = {
+    'supermarket': {
+        'anomaly_type': 'Anomaly_Type_Pred',
+        'branch': 'Store_Branch',
+        'channel': 'Order_Channel',
+        'product_category': 'Product_Category',
+        'month': 'Billing_Date',
+    },
+    'telecom': {
+        'anomaly_type': 'Anomaly_type',
+        'zone': 'Zone_area',
+        'plan_category': 'Plan_category',
+        'payment_status': 'Payment_status',
+        'month': 'Billing_date',
+    },
+}
+
+CUBE_MEASURES = ('rows', 'leakage_rows', 'balance_sum', 'billed_sum')
+
+# Label for rows where a dimension's column is missing or empty
+MISSING = '(missing)'
+
+MONTH_PATTERN = re.compile(r'\d{4}-(0[1-9]|1[0-2])')
+
+
+def cube_dimensions(domain):
+    return list(CUBE_DIMENSIONS.get(domain, {}))
+
+
+def cube_path(output_folder, session_id):
+    return os.path.join(output_folder, f"{session_id}_cube.csv")
+
+
+def _month_labels(dates):
+    """YYYY-MM label per date (MISSING for NaT). Each distinct date is formatted once;
+    Series.dt.strftime formats row by row and dominated cube builds on large sessions."""
+    codes, uniques = pd.factorize(dates)
+    labels = np.append(pd.DatetimeIndex(uniques).strftime('%Y-%m').to_numpy(dtype=object), MISSING)
+    # NaT gets code -1, which picks the trailing MISSING label
+    return pd.Series(labels[codes], index=dates.index)
+
+
+def build_cube(df, domain):
+    """Collapse a scored session into one row per observed combination of the domain's
+    dimensions, with row/leakage counts and balance/billed sums.
+
+    Only combinations that occur are kept, so the cube never has more cells than the
+    session has rows, and usually far fewer: a few thousand cells answer any roll-up
+    or filter over these dimensions without touching the full data again.
+    """
+    if domain not in CUBE_DIMENSIONS:
+        raise ValueError(f"No cube dimensions defined for domain {domain!r}")
+    columns = set(df.columns)
+    cells = {}
+    for dimension, column in CUBE_DIMENSIONS[domain].items():
+        if column not in columns:
+            cells[dimension] = MISSING
+        elif dimension == 'month':
+            cells[dimension] = _month_labels(parse_billing_dates(df[column]))
+        else:
+            values = df[column].astype(str).where(df[column].notna(), MISSING)
+            cells[dimension] = values.replace('', MISSING)
+    frame = pd.DataFrame(cells, index=df.index)
+
+    leakage_column = resolve_column(domain, 'leakage', columns)
+    frame['leakage_rows'] = df[leakage_column].isin(LEAKAGE_LABELS[domain]).astype(np.int64) if leakage_column else 0
+    for measure in ('balance', 'billed'):
+        column = resolve_column(domain, measure, columns)
+        frame[f'{measure}_sum'] = pd.to_numeric(df[column], errors='coerce').fillna(0.0) if column else 0.0
+
+    grouped = frame.groupby(cube_dimensions(domain), sort=True)
+    return grouped.agg(rows=('leakage_rows', 'size'), leakage_rows=('leakage_rows', 'sum'),
+                       balance_sum=('balance_sum', 'sum'), billed_sum=('billed_sum', 'sum')).reset_index()
+
+
+def write_cube(cells, path):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    cells.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_cube(path):
+    """Read cube cells written by write_cube. Dimension labels come back exactly as
+    written: no NA parsing ('NA', 'None' stay text) and no numeric inference ('001')."""
+    cells = pd.read_csv(path, dtype=str, keep_default_na=False)
+    for column in cells.columns:
+        if column in CUBE_MEASURES:
+            cells[column] = pd.to_numeric(cells[column])
+        else:
+            cells[column] = cells[column].replace('', MISSING)
+    return cells
+
+
+def _records(frame):
+    records = frame.to_dict('records')
+    for record in records:
+        record['rows'] = int(record['rows'])
+        record['leakage_rows'] = int(record['leakage_rows'])
+        record['balance_sum'] = round(float(record['balance_sum']), 2)
+        record['billed_sum'] = round(float(record['billed_sum']), 2)
+        record['leakage_rate'] = round(record['leakage_rows'] / record['rows'] * 100, 2) if record['rows'] else 0.0
+    return records
+
+
+def query_cube(cells, domain, by=(), filters=None, month_from=None, month_to=None, limit=None):
+    """Roll the cube up to the `by` dimensions after filtering on dimension values.
+
+    filters maps dimension -> accepted values; month_from/month_to bound the month
+    dimension (YYYY-MM, inclusive; cells without a month never fall inside a bound).
+    Groups come back ordered by leakage count, at most `limit` of them. Returns (groups, totals of the filtered cells, number of groups).
+    """
+    dimensions = cube_dimensions(domain)
+    filters = {dimension: values for dimension, values in (filters or {}).items() if values}
+    unknown = [dimension for dimension in [*by, *filters] if dimension not in dimensions]
+    if unknown:
+        raise ValueError(f"Unknown cube dimension(s) {', '.join(unknown)}; use: {', '.join(dimensions)}")
+    if len(set(by)) != len(by):
+        raise ValueError("by lists a dimension more than once")
+    for name, bound in (('month_from', month_from), ('month_to', month_to)):
+        if bound and not MONTH_PATTERN.fullmatch(bound):
+            raise ValueError(f"{name} must be a month as YYYY-MM, got {bound!r}")
+
+    keep = np.ones(len(cells), dtype=bool)
+    for dimension, values in filters.items():
+        keep &= cells[dimension].isin(values).to_numpy()
+    if month_from or month_to:
+        # MISSING would otherwise compare as a string against the bounds
+        keep &= (cells['month'] != MISSING).to_numpy()
+    if month_from:
+        keep &= (cells['month'] >= month_from).to_numpy()
+    if month_to:
+        keep &= (cells['month'] <= month_to).to_numpy()
+    selected = cells[keep]
+
+    totals = _records(pd.DataFrame([selected[list(CUBE_MEASURES)].sum()]))[0]
+    if not by:
+        return [], totals, 0
+    groups = selected.groupby(list(by), sort=False)[list(CUBE_MEASURES)].sum().reset_index()
+    groups = groups.sort_values(['leakage_rows', *by], ascending=[False] + [True] * len(by), kind='stable')
+    count = len(groups)
+    if limit is not None:
+        groups = groups.head(limit)
+    return _records(groups), totals, count
+
+
+def dimension_values(cells, domain):
+    """Distinct values of every dimension, for building slicers"""
+    return {dimension: sorted(cells[dimension].unique().tolist()) for dimension in cube_dimensions(domain)}
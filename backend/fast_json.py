@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library encoder is always available
+    orjson = None
+
+
+def _default(value):
+    """Values orjson (or json) can't encode natively, converted the way Flask's encoder would"""
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    # Dates, Decimal, UUID, dataclasses and __html__ objects; raises TypeError for the rest
+    return DefaultJSONProvider.default(value)
+
+
+def _options(sort_keys=False, indent=False):
+    # Dates go through _default so responses keep Flask's HTTP-date format
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return option
+
+
+def dumps_bytes(obj, sort_keys=False):
+    """UTF-8 JSON for obj; NumPy scalars/arrays and pandas missing values are encoded directly.
+    NaN and infinity become null (the standard library would emit invalid JSON)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=_options(sort_keys))
+        except orjson.JSONEncodeError:
+            pass  # let the standard encoder produce (or report) it
+    return json.dumps(obj, default=_default, sort_keys=sort_keys).encode()
+
+
+def dumps(obj, sort_keys=False):
+    return dumps_bytes(obj, sort_keys).decode()
+
+
+def plotly_json(fig):
+    """JSON string of a plotly figure, as json.dumps(fig, cls=PlotlyJSONEncoder) gives"""
+    if orjson is None:
+        import plotly.utils
+        return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+    return dumps(fig.to_plotly_json())
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes jsonify() responses with orjson.
+
+    Responses are built straight from orjson's bytes, with NumPy and pandas values
+    handled natively. Key sorting and debug pretty-printing follow the usual Flask
+    settings. Without orjson, or for objects orjson rejects, it falls back to
+    Flask's own encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            kwargs.setdefault('default', _default)
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is None:
+            return super().response(obj)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = orjson.dumps(obj, default=_default, option=_options(self.sort_keys, indent))
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
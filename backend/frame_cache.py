@@ -0,0 +1,125 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from janitor import resolve_artifact
+from single_flight import SingleFlight
+
+
+def frame_nbytes(df):
+    """Approximate in-memory size of a DataFrame, including string payloads"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class FrameCache:
+    """Byte-bounded LRU cache of parsed session CSVs and subsets derived from them.
+
+    Entries are keyed by artifact path and validated against the file's current
+    location, mtime and size on every lookup, so rewritten, compressed or deleted
+    artifacts are never served stale. Concurrent misses for the same entry share a
+    single parse/build. Cached frames are shared between requests and must be
+    treated as read-only.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, path):
+        resolved = resolve_artifact(path)
+        stat = os.stat(resolved)
+        return resolved, stat.st_mtime_ns, stat.st_size
+
+    def _get(self, key, signature):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != signature:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _put(self, key, signature, df):
+        size = frame_nbytes(df)
+        with self._lock:
+            self.misses += 1
+            if key in self._entries:
+                self._drop(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (signature, df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _load(self, key, signature, build):
+        def load():
+            # A flight that finished just before this one may already have stored it
+            df = self._get(key, signature)
+            if df is None:
+                df = build()
+                self._put(key, signature, df)
+            return df
+        return self._flights.do((key, signature), load)
+
+    def read_csv(self, path):
+        """pd.read_csv(path), served from memory while the file is unchanged"""
+        try:
+            signature = self._signature(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            raise
+        key = (path, None)
+        df = self._get(key, signature)
+        if df is None:
+            df = self._load(key, signature, lambda: pd.read_csv(signature[0]))
+        return df
+
+    def parse(self, path, name, parse):
+        """Return parse(resolved path), cached under name while the file is unchanged;
+        for artifacts that need their own read options instead of a plain pd.read_csv"""
+        try:
+            signature = self._signature(path)
+        except FileNotFoundError:
+            self.invalidate(path)
+            raise
+        key = (path, name)
+        df = self._get(key, signature)
+        if df is None:
+            df = self._load(key, signature, lambda: parse(signature[0]))
+        return df
+
+    def subset(self, path, name, build):
+        """Return build(read_csv(path)), cached under name alongside the parsed file"""
+        df = self.read_csv(path)
+        signature = self._signature(path)
+        key = (path, name)
+        derived = self._get(key, signature)
+        if derived is None:
+            derived = self._load(key, signature, lambda: build(df))
+        return derived
+
+    def invalidate(self, path=None):
+        """Forget every entry for path (or everything)"""
+        with self._lock:
+            for key in [key for key in self._entries if path is None or key[0] == path]:
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'shared_loads': self._flights.shared}
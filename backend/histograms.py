@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BINS = 30
+
+# Quantiles reported with every histogram
+SUMMARY_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Bin edges span these sketch quantiles; the few rows outside are counted as under/overflow
+RANGE_QUANTILES = (0.005, 0.995)
+
+# 'auto' switches to log-spaced bins once positive data spans this many times its low end
+LOG_SCALE_SPAN = 1000.0
+
+
+class QuantileSketch:
+    """Streaming quantile sketch with relative-error guarantees (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so memory depends on the spread of
+    the data (a few hundred buckets at 1% accuracy), not on the row count, and any
+    quantile estimate is within relative_accuracy of a true value. Sketches of
+    separate chunks can be merged.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_magnitude=1e-12):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_magnitude = min_magnitude
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _add(self, store, magnitudes):
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        """Add a chunk of finite values (numpy array)"""
+        values = np.asarray(values, dtype=float)
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        small = np.abs(values) < self.min_magnitude
+        self.zeros += int(small.sum())
+        self._add(self.positive, values[(values > 0) & ~small])
+        self._add(self.negative, -values[(values < 0) & ~small])
+        return self
+
+    def merge(self, other):
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # Most negative first: larger magnitudes come first on the negative side
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return max(-self._value(key), self.min)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return min(self._value(key), self.max)
+        return self.max
+
+
+def _finite_chunks(values, chunk_rows):
+    for start in range(0, len(values), chunk_rows):
+        chunk = values[start:start + chunk_rows]
+        yield chunk[np.isfinite(chunk)]
+
+
+def numeric_histogram(values, bins=DEFAULT_BINS, scale='auto', chunk_rows=1000000):
+    """Fixed-size histogram payload for a numeric column, whatever its length.
+
+    One pass feeds a quantile sketch; bin edges then cover the sketch's 0.5%-99.5%
+    range (fewer bins when a Freedman-Diaconis width says so), linear or log-spaced
+    (scale='log', or 'auto' for wide positive data). A second pass counts rows per
+    bin, with rows outside the edges reported as underflow/overflow.
+    """
+    array = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    sketch = QuantileSketch()
+    total = 0.0
+    for chunk in _finite_chunks(array, chunk_rows):
+        sketch.update(chunk)
+        total += float(chunk.sum())
+
+    payload = {
+        'count': sketch.count,
+        'missing': int(len(array) - sketch.count),
+        'scale': 'linear',
+        'edges': [],
+        'counts': [],
+        'underflow': 0,
+        'overflow': 0,
+    }
+    if not sketch.count:
+        return payload
+
+    low, high = (sketch.quantile(q) for q in RANGE_QUANTILES)
+    if low >= high:
+        low, high = sketch.min, sketch.max
+    constant = low >= high
+    if constant:
+        # Constant column: one bin around the value
+        low, high = low - 0.5, high + 0.5
+
+    use_log = scale == 'log' or (scale == 'auto' and low > 0 and high / low >= LOG_SCALE_SPAN)
+    if use_log and low > 0:
+        payload['scale'] = 'log'
+        edges = np.geomspace(low, high, bins + 1)
+    else:
+        iqr = sketch.quantile(0.75) - sketch.quantile(0.25)
+        width = 2 * iqr / sketch.count ** (1 / 3) if iqr > 0 else 0
+        n_bins = 1 if constant else min(bins, max(1, math.ceil((high - low) / width))) if width else bins
+        edges = np.linspace(low, high, n_bins + 1)
+
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+    for chunk in _finite_chunks(array, chunk_rows):
+        counts += np.histogram(chunk, bins=edges)[0]
+        payload['underflow'] += int((chunk < edges[0]).sum())
+        payload['overflow'] += int((chunk > edges[-1]).sum())
+
+    payload.update({
+        'edges': edges.tolist(),
+        'counts': counts.tolist(),
+        'min': sketch.min,
+        'max': sketch.max,
+        'mean': total / sketch.count,
+        'quantiles': {f"p{round(q * 100)}": sketch.quantile(q) for q in SUMMARY_QUANTILES},
+    })
+    return payload
@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Only worth compressing past a few packets
+MIN_COMPRESS_BYTES = 1024
+
+_COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/csv', 'image/svg+xml')
+
+
+class _CompressedBodies:
+    """Small LRU of compressed bodies by (etag, encoding), so immutable payloads are compressed once"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compress):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        body = compress()
+        with self._lock:
+            self._entries[key] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+
+def _pick_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def register_http_caching(app, cache_control):
+    """Add strong ETags, conditional GET (304) and gzip/brotli compression to an app.
+
+    cache_control maps endpoint names to the Cache-Control value they get; only those
+    endpoints are validated. Compression applies to every sizeable text/JSON response.
+    Each content encoding gets its own ETag (<hash>-gzip / <hash>-br) since the bytes differ.
+    """
+    compressed_bodies = _CompressedBodies()
+
+    @app.after_request
+    def cache_and_compress(response):
+        if (request.method not in ('GET', 'HEAD') or response.status_code != 200 or response.direct_passthrough
+                or response.is_streamed or 'Content-Encoding' in response.headers):
+            return response
+
+        endpoint_cache_control = cache_control.get(request.endpoint)
+        body = response.get_data()
+        compressible = response.mimetype in _COMPRESSIBLE_MIMETYPES and len(body) >= MIN_COMPRESS_BYTES
+        if endpoint_cache_control is None and not compressible:
+            return response
+
+        encoding = _pick_encoding() if compressible else None
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        if compressible:
+            response.vary.add('Accept-Encoding')
+
+        if endpoint_cache_control is not None:
+            response.headers['Cache-Control'] = endpoint_cache_control
+            representation_etag = f"{etag}-{encoding}" if encoding else etag
+            response.set_etag(representation_etag)
+            if representation_etag in request.if_none_match:
+                response.status_code = 304
+                response.set_data(b'')
+                # A 304 carries no body, so no length or encoding headers for it
+                response.headers.pop('Content-Length', None)
+                return response
+
+        if encoding:
+            if endpoint_cache_control is not None:
+                # Validated payloads are re-requested verbatim, so keep their compressed form
+                response.set_data(compressed_bodies.get((etag, encoding), lambda: _compress(body, encoding)))
+            else:
+                response.set_data(_compress(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,193 @@
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+
+# Session artifacts are named "<session uuid>_<...>" in uploads/ and outputs/
+_SESSION_PREFIX = re.compile(r'^([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})_')
+
+# Extensions worth gzipping; docx/xlsx are already zip containers
+_COMPRESSIBLE = ('.csv',)
+
+# Files SQLite keeps next to a database while it is open
+_SQLITE_SIDECARS = ('-wal', '-shm', '-journal')
+
+
+def session_id_from_filename(filename):
+    match = _SESSION_PREFIX.match(os.path.basename(filename))
+    return match.group(1) if match else None
+
+
+def compressed_path(path):
+    return path + '.gz'
+
+
+def resolve_artifact(path):
+    """Return the path of an artifact as stored on disk, following janitor compression"""
+    if not os.path.exists(path) and os.path.exists(compressed_path(path)):
+        return compressed_path(path)
+    return path
+
+
+def open_artifact(path):
+    """Open an artifact for binary reading, transparently decompressing it if the janitor gzipped it"""
+    path = resolve_artifact(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        # Windows refuses to delete files another request still has open; retry next sweep
+        print(f"❌ Janitor could not remove {path}: {e}")
+        return False
+
+
+class ArtifactJanitor:
+    """Background cleanup of session artifacts in the upload and output folders.
+
+    Each sweep:
+      - expires sessions not used for ttl_seconds (files deleted, session marked expired),
+      - expires least-recently-used sessions until the folders fit quota_bytes,
+      - optionally gzips CSVs of sessions idle for compress_after_seconds.
+    Files without a known session (e.g. half-finished uploads) are aged by mtime and
+    never touched within grace_seconds. protected_paths (SQLite databases kept in these
+    folders) are never touched, nor are their -wal/-shm/-journal files.
+    """
+
+    def __init__(self, results_store, folders, ttl_seconds=None, quota_bytes=None,
+                 compress_after_seconds=None, interval_seconds=600, grace_seconds=900, protected_paths=()):
+        self.results_store = results_store
+        self.folders = folders
+        self.protected = {os.path.realpath(path) + suffix
+                          for path in protected_paths for suffix in ('', *_SQLITE_SIDECARS)}
+        self.ttl_seconds = ttl_seconds
+        self.quota_bytes = quota_bytes
+        self.compress_after_seconds = compress_after_seconds
+        self.interval_seconds = interval_seconds
+        self.grace_seconds = grace_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='artifact-janitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ Janitor sweep failed: {e}")
+
+    def _scan(self):
+        """Return {session_id or None: [(path, size, mtime), ...]}"""
+        groups = {}
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if not entry.is_file() or os.path.realpath(entry.path) in self.protected:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                groups.setdefault(session_id_from_filename(entry.name), []).append(
+                    (entry.path, stat.st_size, stat.st_mtime)
+                )
+        return groups
+
+    def run_once(self, now=None):
+        now = now or time.time()
+        activity = self.results_store.activity()
+        groups = self._scan()
+        stats = {'expired_sessions': 0, 'deleted_files': 0, 'compressed_files': 0, 'freed_bytes': 0}
+
+        # Eviction units: a whole session, or a single file nobody owns (aged by mtime)
+        units = []
+        for session_id, files in groups.items():
+            if session_id is not None and session_id in activity:
+                units.append((activity[session_id], session_id, files))
+            else:
+                units.extend((mtime, None, [(path, size, mtime)]) for path, size, mtime in files)
+        units.sort(key=lambda unit: unit[0])
+
+        total_bytes = sum(size for _, _, files in units for _, size, _ in files)
+        kept = []
+        for last_used, session_id, files in units:
+            idle = now - last_used
+            evictable = session_id is not None or idle > self.grace_seconds
+            over_ttl = self.ttl_seconds is not None and idle > self.ttl_seconds
+            over_quota = self.quota_bytes is not None and total_bytes > self.quota_bytes
+            if evictable and (over_ttl or over_quota):
+                total_bytes -= self._evict(session_id, files, stats)
+            else:
+                kept.append((last_used, session_id, files))
+
+        # Sessions that expired by TTL but have no files left still need marking
+        if self.ttl_seconds is not None:
+            for session_id, last_used in activity.items():
+                if session_id not in groups and now - last_used > self.ttl_seconds:
+                    self.results_store.expire(session_id)
+                    stats['expired_sessions'] += 1
+
+        if self.compress_after_seconds is not None:
+            for last_used, session_id, files in kept:
+                if session_id is not None and now - last_used > self.compress_after_seconds:
+                    self._compress_session(session_id, files, stats)
+
+        if any(stats.values()):
+            print(f"Janitor: expired {stats['expired_sessions']} sessions, deleted {stats['deleted_files']} files, "
+                  f"compressed {stats['compressed_files']} files, freed {stats['freed_bytes'] / 1e6:.1f} MB")
+        return stats
+
+    def _evict(self, session_id, files, stats):
+        freed = 0
+        if session_id is not None:
+            # Mark first so requests stop handing out paths that are about to disappear
+            self.results_store.expire(session_id)
+            stats['expired_sessions'] += 1
+        for path, size, _ in files:
+            if _remove(path):
+                freed += size
+                stats['deleted_files'] += 1
+        stats['freed_bytes'] += freed
+        return freed
+
+    def _compress_session(self, session_id, files, stats):
+        for path, size, _ in files:
+            if not path.endswith(_COMPRESSIBLE):
+                continue
+            target = compressed_path(path)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            try:
+                with open(path, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                os.replace(tmp, target)
+            except FileNotFoundError:
+                # Another worker's janitor got there first
+                _remove(tmp)
+                continue
+            # Point the session at the compressed copy before the original goes away
+            session = self.results_store.get(session_id, touch=False)
+            if session and session.get('processed_data_path') == path:
+                self.results_store.update(session_id, processed_data_path=target)
+            if _remove(path):
+                stats['compressed_files'] += 1
+                stats['freed_bytes'] += size - os.path.getsize(target)
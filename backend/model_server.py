@@ -0,0 +1,295 @@
+"""
+Local model server shared by all web workers on a host.
+
+Each WSGI worker that imports app.py normally unpickles both pipelines and runs
+its own XGBoost thread pool. With INFERENCE_BACKEND=server the workers instead
+send rows to this process, which holds one copy of the models. Column data and
+predictions travel through a shared-memory block; the socket only carries the
+block name, the column layout and the category values of string columns.
+
+Start it once per host (from backend/):
+    python model_server.py [--backend joblib|onnx] [--threads 4]
+
+Connections are authenticated with MODEL_SERVER_AUTHKEY, or for local sockets with a
+random key kept in cache/model_server.key (readable by this user only). Messages are
+pickles, so a TCP address (MODEL_SERVER_ADDRESS=host:port) requires MODEL_SERVER_AUTHKEY.
+"""
+import argparse
+import os
+import secrets
+import sys
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Client, Listener
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+MODEL_PATHS = {
+    'joblib': {
+        'supermarket': os.path.join('model', 'super_market', 'saved_models', 'trained_pipeline.pkl'),
+        'telecom': os.path.join('model', 'Telecom', 'saved_model', 'telecom_pipeline.pkl'),
+    },
+    'onnx': {
+        'supermarket': os.path.join('model', 'super_market', 'saved_models', 'trained_pipeline.onnx'),
+        'telecom': os.path.join('model', 'Telecom', 'saved_model', 'telecom_pipeline.onnx'),
+    },
+}
+
+_ALIGNMENT = 64
+
+
+def default_address():
+    if sys.platform == 'win32':
+        return r'\\.\pipe\leakage-model-server'
+    return os.path.join('cache', 'model_server.sock')
+
+
+def parse_address(value):
+    """'host:port' becomes a TCP address, anything else is a Unix socket path or Windows pipe name"""
+    value = value or default_address()
+    host, sep, port = value.rpartition(':')
+    if sep and port.isdigit() and not value.startswith('\\\\'):
+        return (host or '127.0.0.1', int(port))
+    return value
+
+
+AUTHKEY_PATH = os.path.join('cache', 'model_server.key')
+
+
+def _key_file():
+    """The shared local key, created (mode 0600) by whichever process needs it first"""
+    try:
+        with open(AUTHKEY_PATH, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(AUTHKEY_PATH), exist_ok=True)
+    tmp_path = f"{AUTHKEY_PATH}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(secrets.token_hex(32).encode())
+    try:
+        # link fails if another process got there first; both then use the existing key
+        os.link(tmp_path, AUTHKEY_PATH)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp_path)
+    with open(AUTHKEY_PATH, 'rb') as f:
+        return f.read()
+
+
+def _authkey(address):
+    key = os.getenv('MODEL_SERVER_AUTHKEY')
+    if key:
+        return key.encode()
+    if isinstance(address, tuple):
+        # Anyone who can reach the port could send pickles, i.e. run code in this process
+        raise ValueError("MODEL_SERVER_AUTHKEY must be set when the model server uses a TCP address")
+    return _key_file()
+
+
+def _attach(name):
+    """Open an existing shared-memory block without letting this process's resource tracker own it"""
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _plan_columns(X, columns):
+    """Split X into fixed-width arrays for shared memory plus a small layout description"""
+    arrays, layout, offset = [], [], 0
+    for column in columns:
+        series = X[column]
+        if pd.api.types.is_numeric_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.to_numpy()
+            categories = None
+        else:
+            # Strings can't live in shared memory, so send integer codes and the distinct values
+            values, categories = pd.factorize(series)
+            values = values.astype(np.int32)
+            categories = np.asarray(categories, dtype=object)
+        layout.append({'name': column, 'dtype': values.dtype.str, 'offset': offset, 'categories': categories})
+        arrays.append(values)
+        offset = _aligned(offset + values.nbytes)
+    return arrays, layout, offset
+
+
+def _frame_from_block(buf, layout, n_rows):
+    data = {}
+    for spec in layout:
+        values = np.ndarray((n_rows,), dtype=np.dtype(spec['dtype']), buffer=buf, offset=spec['offset'])
+        if spec['categories'] is not None:
+            # Code -1 marks a missing value; the appended NaN is picked up by that index
+            values = np.append(spec['categories'], np.nan)[values]
+        data[spec['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+class RemotePipeline:
+    """Client-side stand-in for a pipeline hosted by the model server (only predict is supported)"""
+
+    def __init__(self, domain, address=None):
+        self.domain = domain
+        self.address = parse_address(address or os.getenv('MODEL_SERVER_ADDRESS'))
+        self._local = threading.local()
+        info = self._call({'op': 'info', 'domain': domain})
+        self.version = info['version']
+        self.n_outputs_ = info['n_outputs']
+        # Only the columns the model reads are shipped, and the prediction cache hashes the same set
+        self.feature_names_in_ = np.array(info['feature_names'], dtype=object)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = Client(self.address, authkey=_authkey(self.address))
+            self._local.conn = conn
+        return conn
+
+    def _call(self, message):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send(message)
+                reply = conn.recv()
+                break
+            except (EOFError, OSError):
+                # The server restarted or dropped the connection: reconnect once
+                self._local.conn = None
+                if attempt:
+                    raise
+        if not reply.get('ok'):
+            raise Exception(f"Model server error: {reply.get('error')}")
+        return reply
+
+    def predict(self, X):
+        n_rows = len(X)
+        if n_rows == 0:
+            return np.empty((0, self.n_outputs_), dtype=np.int64)
+
+        arrays, layout, output_offset = _plan_columns(X, list(self.feature_names_in_))
+        shm = SharedMemory(create=True, size=output_offset + n_rows * self.n_outputs_ * 8)
+        try:
+            for values, spec in zip(arrays, layout):
+                np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=spec['offset'])[:] = values
+            self._call({
+                'op': 'predict',
+                'domain': self.domain,
+                'shm': shm.name,
+                'n_rows': n_rows,
+                'layout': layout,
+                'output_offset': output_offset,
+            })
+            output = np.ndarray((n_rows, self.n_outputs_), dtype=np.int64, buffer=shm.buf, offset=output_offset)
+            result = output.copy()
+            del output
+            return result
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class ModelServer:
+    """Holds one copy of each domain pipeline and scores requests from any number of workers"""
+
+    def __init__(self, backend='joblib', threads=None):
+        from prediction_cache import model_feature_columns, model_fingerprint
+
+        self.models = {}
+        for domain, path in MODEL_PATHS[backend].items():
+            try:
+                if backend == 'onnx':
+                    from onnx_backend import OnnxPipeline
+                    pipeline = OnnxPipeline(path, intra_op_threads=threads)
+                    version, n_outputs = pipeline.version, pipeline.n_outputs_
+                    features = list(pipeline.feature_names_in_)
+                else:
+                    import joblib
+                    from shadow_scoring import limit_model_threads
+                    pipeline = joblib.load(path)
+                    if threads:
+                        limit_model_threads(pipeline, threads)
+                    version, n_outputs = model_fingerprint(path), len(pipeline.steps[-1][1].estimators_)
+                    features = model_feature_columns(pipeline, pd.DataFrame(columns=pipeline.feature_names_in_))
+                self.models[domain] = {'pipeline': pipeline, 'version': version,
+                                       'n_outputs': n_outputs, 'feature_names': features}
+                print(f"✅ {domain} model loaded ({backend} backend, version {version})")
+            except Exception as e:
+                print(f"❌ Error loading {domain} model: {e}")
+
+    def handle(self, message):
+        model = self.models.get(message.get('domain'))
+        if model is None:
+            return {'ok': False, 'error': f"Model not loaded: {message.get('domain')}"}
+        if message['op'] == 'info':
+            return {'ok': True, 'version': model['version'], 'n_outputs': model['n_outputs'],
+                    'feature_names': model['feature_names']}
+        if message['op'] == 'predict':
+            shm = _attach(message['shm'])
+            X = output = None
+            try:
+                X = _frame_from_block(shm.buf, message['layout'], message['n_rows'])
+                output = np.ndarray((message['n_rows'], model['n_outputs']), dtype=np.int64,
+                                    buffer=shm.buf, offset=message['output_offset'])
+                output[:] = model['pipeline'].predict(X)
+            finally:
+                # Views into the block must be released before it can be closed
+                X = output = None
+                shm.close()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown op: {message['op']}"}
+
+    def _serve_connection(self, conn):
+        with conn:
+            while True:
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self.handle(message)
+                except Exception as e:
+                    reply = {'ok': False, 'error': str(e)}
+                conn.send(reply)
+
+    def serve_forever(self, address, authkey):
+        if isinstance(address, str) and not address.startswith('\\\\') and os.path.exists(address):
+            os.unlink(address)
+        with Listener(address, authkey=authkey) as listener:
+            print(f"✅ Model server listening on {address}")
+            while True:
+                conn = listener.accept()
+                # One thread per web worker connection; XGBoost/onnxruntime release the GIL while scoring
+                threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the leakage pipelines to local web workers')
+    parser.add_argument('--address', default=os.getenv('MODEL_SERVER_ADDRESS'),
+                        help='Unix socket path, Windows pipe name or host:port (default: cache/model_server.sock)')
+    parser.add_argument('--backend', choices=['joblib', 'onnx'], default=os.getenv('MODEL_SERVER_BACKEND', 'joblib'))
+    parser.add_argument('--threads', type=int, default=None, help='Cap on model threads per request')
+    args = parser.parse_args()
+
+    address = parse_address(args.address)
+    try:
+        authkey = _authkey(address)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if isinstance(address, str) and not address.startswith('\\\\'):
+        os.makedirs(os.path.dirname(address) or '.', exist_ok=True)
+    ModelServer(args.backend, args.threads).serve_forever(address, authkey)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
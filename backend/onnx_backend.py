@@ -0,0 +1,236 @@
+"""
+ONNX export and onnxruntime inference for the saved leakage pipelines.
+
+Export the pickled pipelines (run from backend/):
+    python onnx_backend.py export
+Check the ONNX graphs against the joblib pipelines on the sample datasets:
+    python onnx_backend.py verify
+
+Exporting needs skl2onnx and onnxmltools; serving only needs onnxruntime.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from prediction_cache import model_fingerprint
+
+SAMPLE_DATASETS = {
+    'supermarket': os.path.join('model', 'super_market', 'datasets', 'input_datasupermarket.csv'),
+    'telecom': os.path.join('model', 'Telecom', 'dataset', 'telecom_input.csv'),
+}
+
+TARGET_OPSET = {'': 15, 'ai.onnx.ml': 3}
+
+
+def _column_inputs(column_transformer):
+    """Return (column, is_string) for every column the ColumnTransformer reads, in graph input order"""
+    from sklearn.preprocessing import OneHotEncoder
+
+    inputs = []
+    for _, transformer, columns in column_transformer.transformers_:
+        if transformer == 'drop':
+            continue
+        is_string = isinstance(transformer, OneHotEncoder)
+        for column in columns:
+            inputs.append((column, is_string))
+    return inputs
+
+
+def _booster_input(features, sparse):
+    """Nodes and initializers that turn the ColumnTransformer output into what XGBoost sees.
+
+    sklearn scales in float64 and XGBoost casts to float32 afterwards, so the graph
+    does the same; scaling in float32 flips splits on values that sit right on a
+    threshold. The sklearn pipelines also hand XGBoost a sparse matrix, where every
+    zero counts as a missing value, so zeros become NaN before the cast.
+    """
+    from onnx import TensorProto, helper
+
+    nodes = []
+    initializers = []
+    if sparse:
+        initializers = [
+            helper.make_tensor('booster_input_zero', TensorProto.DOUBLE, [], [0.0]),
+            helper.make_tensor('booster_input_nan', TensorProto.DOUBLE, [], [float('nan')]),
+        ]
+        nodes += [
+            helper.make_node('Equal', [features, 'booster_input_zero'], ['booster_input_is_zero']),
+            helper.make_node('Where', ['booster_input_is_zero', 'booster_input_nan', features], ['booster_input_missing']),
+        ]
+        features = 'booster_input_missing'
+    nodes.append(helper.make_node('Cast', [features], ['booster_input'], to=TensorProto.FLOAT))
+    return nodes, initializers, 'booster_input'
+
+
+def export_pipeline(pipeline, output_path):
+    """Convert a ColumnTransformer + MultiOutputClassifier(XGBClassifier) pipeline into one ONNX graph.
+
+    The graph takes one [N, 1] string or double input per model column and exposes output_<i>_label /
+    output_<i>_probabilities for every classifier output, in pipeline.predict order.
+    """
+    import onnx
+    from onnx import TensorProto, helper
+    from onnxmltools.convert import convert_xgboost
+    from onnxmltools.convert.common.data_types import FloatTensorType as XgbFloatTensorType
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import DoubleTensorType, StringTensorType
+
+    column_transformer = pipeline.steps[0][1]
+    classifier = pipeline.steps[-1][1]
+    columns = _column_inputs(column_transformer)
+
+    initial_types = [
+        (column, StringTensorType([None, 1]) if is_string else DoubleTensorType([None, 1]))
+        for column, is_string in columns
+    ]
+    preprocess = convert_sklearn(column_transformer, initial_types=initial_types, target_opset=TARGET_OPSET)
+    n_features = preprocess.graph.output[0].type.tensor_type.shape.dim[1].dim_value
+
+    graph = onnx.GraphProto()
+    graph.CopyFrom(preprocess.graph)
+    graph.name = 'leakage_pipeline'
+    features = graph.output[0].name
+    del graph.output[:]
+
+    nodes, initializers, features = _booster_input(features, getattr(column_transformer, 'sparse_output_', False))
+    graph.node.extend(nodes)
+    graph.initializer.extend(initializers)
+
+    opset_imports = {opset.domain: opset.version for opset in preprocess.opset_import}
+    opset_imports[''] = max(opset_imports.get('', 0), TARGET_OPSET[''])
+    for i, estimator in enumerate(classifier.estimators_):
+        prefix = f'output_{i}_'
+        booster = convert_xgboost(
+            estimator,
+            initial_types=[('features', XgbFloatTensorType([None, n_features]))],
+            target_opset=TARGET_OPSET[''],
+        )
+        booster = onnx.compose.add_prefix(booster, prefix)
+        for node in booster.graph.node:
+            node.input[:] = [features if name == f'{prefix}features' else name for name in node.input]
+            graph.node.append(node)
+        graph.initializer.extend(booster.graph.initializer)
+        for output in booster.graph.output:
+            graph.output.append(output)
+        for opset in booster.opset_import:
+            opset_imports[opset.domain] = max(opset_imports.get(opset.domain, 0), opset.version)
+
+    # Expose the labels in the same [N, n_outputs] layout as pipeline.predict
+    label_outputs = [output.name for output in graph.output if output.name.endswith('_label')]
+    for name in label_outputs:
+        graph.node.append(helper.make_node('Unsqueeze', [name, 'label_axis'], [f'{name}_column']))
+    graph.initializer.append(helper.make_tensor('label_axis', TensorProto.INT64, [1], [1]))
+    graph.node.append(helper.make_node('Concat', [f'{name}_column' for name in label_outputs], ['labels'], axis=1))
+    graph.output.append(helper.make_tensor_value_info('labels', TensorProto.INT64, [None, len(label_outputs)]))
+
+    model = helper.make_model(
+        graph,
+        opset_imports=[helper.make_opsetid(domain, version) for domain, version in opset_imports.items()],
+        producer_name='ai-revenue-leakage-detection',
+    )
+    # Keep the IR version the converters chose so older onnxruntime builds can load the graph
+    model.ir_version = preprocess.ir_version
+    onnx.checker.check_model(model)
+    onnx.save(model, output_path)
+    return output_path
+
+
+class OnnxPipeline:
+    """onnxruntime-backed stand-in for a fitted sklearn pipeline (only predict is supported)"""
+
+    def __init__(self, model_path, intra_op_threads=None, batch_rows=1024):
+        import onnxruntime as rt
+
+        options = rt.SessionOptions()
+        options.graph_optimization_level = rt.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = rt.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.version = model_fingerprint(model_path)
+        # The graph densifies the one-hot features (tens of thousands of columns for
+        # telecom ids), so rows are scored in batches to bound memory
+        self.batch_rows = batch_rows
+
+        self._inputs = []
+        for graph_input in self.session.get_inputs():
+            self._inputs.append((graph_input.name, graph_input.type == 'tensor(string)'))
+        # Lets the prediction cache hash only the columns the graph reads
+        self.feature_names_in_ = np.array([name for name, _ in self._inputs], dtype=object)
+        labels = next(output for output in self.session.get_outputs() if output.name == 'labels')
+        self.n_outputs_ = labels.shape[1]
+
+    def predict(self, X):
+        feeds = {}
+        for column, is_string in self._inputs:
+            values = X[column].to_numpy().reshape(-1, 1)
+            feeds[column] = values.astype(str).astype(object) if is_string else values.astype(np.float64)
+
+        labels = []
+        for start in range(0, max(len(X), 1), self.batch_rows):
+            batch = {name: values[start:start + self.batch_rows] for name, values in feeds.items()}
+            labels.append(self.session.run(['labels'], batch)[0])
+        return np.concatenate(labels)
+
+
+def _model_paths():
+    import app
+    return {
+        'supermarket': (app.SUPERMARKET_MODEL_PATH, app.SUPERMARKET_ONNX_MODEL_PATH),
+        'telecom': (app.TELECOM_MODEL_PATH, app.TELECOM_ONNX_MODEL_PATH),
+    }
+
+
+def _load_sample(domain):
+    import pandas as pd
+    import app
+
+    df = pd.read_csv(SAMPLE_DATASETS[domain])
+    if domain == 'supermarket':
+        X, _ = app.preprocess_data(df)
+    else:
+        X, _ = app.preprocess_telecom_data(df)
+    return X
+
+
+def verify(domain, min_agreement=1.0):
+    """Compare ONNX labels with the joblib pipeline on the domain's sample dataset"""
+    import joblib
+
+    pickle_path, onnx_path = _model_paths()[domain]
+    X = _load_sample(domain)
+    expected = np.asarray(joblib.load(pickle_path).predict(X))
+    actual = OnnxPipeline(onnx_path).predict(X)
+
+    agreement = (expected == actual).all(axis=1).mean()
+    per_output = ', '.join(f'{(expected[:, i] == actual[:, i]).mean():.4%}' for i in range(expected.shape[1]))
+    ok = agreement >= min_agreement
+    print(f"{'✅' if ok else '❌'} {domain}: {agreement:.4%} of {len(X):,} rows match (per output: {per_output})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export and verify ONNX versions of the leakage pipelines')
+    parser.add_argument('command', choices=['export', 'verify'])
+    parser.add_argument('--domain', choices=['supermarket', 'telecom'], action='append',
+                        help='Restrict to one domain (default: both)')
+    parser.add_argument('--min-agreement', type=float, default=1.0,
+                        help='Fraction of rows that must match the joblib pipeline in verify')
+    args = parser.parse_args()
+    domains = args.domain or ['supermarket', 'telecom']
+
+    if args.command == 'export':
+        import joblib
+        for domain in domains:
+            pickle_path, onnx_path = _model_paths()[domain]
+            export_pipeline(joblib.load(pickle_path), onnx_path)
+            print(f"✅ Exported {domain} pipeline to {onnx_path}")
+        return 0
+
+    results = [verify(domain, args.min_agreement) for domain in domains]
+    return 0 if all(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
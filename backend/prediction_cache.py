@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# Second 16-byte hash key so each row gets a 128-bit fingerprint instead of 64 bits
+_SECONDARY_HASH_KEY = 'leakage-cachekey'
+
+
+def model_fingerprint(path):
+    """Return a short content hash of a saved model file, used as the model version"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def model_feature_columns(pipeline, X):
+    """Return the input columns the pipeline actually reads.
+
+    Columns that the ColumnTransformer drops (ids, raw dates, ...) are left out so
+    they don't break cache hits for otherwise identical rows.
+    """
+    steps = getattr(pipeline, 'steps', None) or []
+    for _, step in steps:
+        transformers = getattr(step, 'transformers_', None)
+        if transformers is None:
+            continue
+        if getattr(step, 'remainder', 'drop') != 'drop':
+            break
+        columns = []
+        for _, transformer, cols in transformers:
+            if transformer == 'drop' or isinstance(cols, slice):
+                continue
+            for col in np.atleast_1d(cols):
+                if isinstance(col, str) and col in X.columns and col not in columns:
+                    columns.append(col)
+        if columns:
+            return columns
+        break
+
+    feature_names = getattr(pipeline, 'feature_names_in_', None)
+    if feature_names is not None and all(col in X.columns for col in feature_names):
+        return list(feature_names)
+    return list(X.columns)
+
+
+def row_keys(X):
+    """Hash every row of X into a pair of signed 64-bit integers"""
+    primary = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    secondary = pd.util.hash_pandas_object(X, index=False, hash_key=_SECONDARY_HASH_KEY).to_numpy()
+    return primary.view(np.int64), secondary.view(np.int64)
+
+
+class PredictionCache:
+    """Persistent, size-bounded LRU cache of per-row model outputs.
+
+    Rows are keyed by a hash of their model-relevant feature values plus the model
+    version, so a retrained pipeline never serves stale predictions.
+    """
+
+    def __init__(self, db_path, max_entries=1000000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS predictions (
+                    model_version TEXT NOT NULL,
+                    key_hi INTEGER NOT NULL,
+                    key_lo INTEGER NOT NULL,
+                    prediction TEXT NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (model_version, key_hi, key_lo)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def predict(self, pipeline, X, model_version):
+        """Return pipeline.predict(X), running the model only on rows not already cached"""
+        if len(X) == 0:
+            return pipeline.predict(X)
+
+        features = X[model_feature_columns(pipeline, X)]
+        key_hi, key_lo = row_keys(features)
+
+        # Identical rows inside one upload only need a single lookup/prediction
+        row_to_unique, unique_index = pd.MultiIndex.from_arrays([key_hi, key_lo]).factorize()
+        unique_keys = list(zip(unique_index.get_level_values(0).tolist(), unique_index.get_level_values(1).tolist()))
+
+        cached = self._lookup(model_version, unique_keys)
+        unique_preds = [cached.get(key) for key in unique_keys]
+        missing = [i for i, pred in enumerate(unique_preds) if pred is None]
+
+        dtype = None
+        if missing:
+            # Factorize codes follow first appearance, so this is the first row of each key
+            first_rows = np.unique(row_to_unique, return_index=True)[1]
+            fresh = np.asarray(pipeline.predict(X.iloc[first_rows[missing]]))
+            fresh_list = fresh.tolist()
+            for i, pred in zip(missing, fresh_list):
+                unique_preds[i] = pred
+            self._store(model_version, [unique_keys[i] for i in missing], fresh_list)
+            dtype = fresh.dtype
+
+        print(f"Prediction cache: {len(unique_keys) - len(missing)} of {len(unique_keys)} unique rows served from cache")
+        return np.asarray(unique_preds, dtype=dtype)[row_to_unique]
+
+    def _lookup(self, model_version, unique_keys):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (key_hi INTEGER, key_lo INTEGER)")
+            conn.execute("DELETE FROM wanted")
+            conn.executemany("INSERT INTO wanted VALUES (?, ?)", unique_keys)
+            rows = conn.execute("""
+                SELECT p.key_hi, p.key_lo, p.prediction FROM predictions p
+                JOIN wanted w ON p.key_hi = w.key_hi AND p.key_lo = w.key_lo
+                WHERE p.model_version = ?
+            """, (model_version,)).fetchall()
+            # Touch hits so they move to the most-recently-used end
+            conn.executemany(
+                "UPDATE predictions SET last_used = ? WHERE model_version = ? AND key_hi = ? AND key_lo = ?",
+                ((now, model_version, hi, lo) for hi, lo, _ in rows)
+            )
+        return {(hi, lo): json.loads(pred) for hi, lo, pred in rows}
+
+    def _store(self, model_version, keys, predictions):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                (
+                    (model_version, hi, lo, json.dumps(pred), now)
+                    for (hi, lo), pred in zip(keys, predictions)
+                )
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drop least-recently-used rows once the cache grows past max_entries"""
+        total = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        excess = total - self.max_entries
+        if excess > 0:
+            conn.execute("""
+                DELETE FROM predictions WHERE (model_version, key_hi, key_lo) IN (
+                    SELECT model_version, key_hi, key_lo FROM predictions ORDER BY last_used LIMIT ?
+                )
+            """, (excess,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM predictions")
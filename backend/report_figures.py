@@ -0,0 +1,357 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from rollups import parse_billing_dates
+from single_flight import SingleFlight
+
+# Bump when render_figure changes how a spec is drawn, so cached figures are redrawn
+FIGURE_STYLE_VERSION = '3'
+
+# Report figure resolutions, in pixels per inch: 'print' is what the reports always used
+DPI_PRESETS = {'draft': 100, 'print': 300}
+
+# Formats a figure can be rendered in: palette PNG, or SVG (vector, dense panels rasterized)
+FIGURE_FORMATS = ('png', 'svg')
+
+FIGURE_SIZE = (15, 12)
+# Width the figure is placed at in Word reports; a print figure needs no more pixels than this fills
+REPORT_FIGURE_WIDTH_INCHES = 6
+
+HISTOGRAM_BINS = 20
+
+# Scatter panels with more points than this are drawn as a binned density grid
+SCATTER_MAX_POINTS = 5000
+DENSITY_BINS = 120
+# Points furthest from the diagonal stay visible as markers over the density grid
+DENSITY_OUTLIERS = 200
+
+# matplotlib shares non-reentrant state between figures (the mathtext parser behind
+# log-scale tick labels, text layout caches), so threads in one process draw one at a time
+RENDER_LOCK = threading.Lock()
+
+
+def _labels(values):
+    return [str(value) for value in values]
+
+
+def _counts_panel(kind, series, title, top=None, xlabel=None):
+    counts = series.value_counts()
+    if top is not None:
+        counts = counts.head(top)
+    panel = {'kind': kind, 'title': title, 'labels': _labels(counts.index), 'values': counts.to_numpy().tolist()}
+    if xlabel:
+        panel['xlabel'] = xlabel
+    return panel
+
+
+def _histogram_panel(series):
+    values = np.asarray(series, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {'kind': 'text', 'title': 'Distribution of Leakage Amounts', 'text': 'No leakage amounts available'}
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {'kind': 'hist', 'title': 'Distribution of Leakage Amounts', 'xlabel': 'Balance Amount ($)',
+            'ylabel': 'Frequency', 'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+def _trend_panel(values):
+    return {'kind': 'line', 'title': 'Monthly Leakage Trend', 'xlabel': 'Month', 'ylabel': 'Number of Leakages',
+            'values': [float(value) for value in values]}
+
+
+def _usage_panel(bought, used):
+    """Data used vs bought: a plain scatter for small inputs, otherwise a 2D count grid.
+
+    Above SCATTER_MAX_POINTS the rows are binned with histogram2d into a fixed
+    DENSITY_BINS x DENSITY_BINS grid, and the DENSITY_OUTLIERS rows furthest from the
+    used == bought line are kept as points, so spec size and render time no longer grow
+    with the row count and the interesting mismatches stay visible."""
+    panel = {'title': 'Data Usage vs Data Bought', 'xlabel': 'Data Bought (GB)', 'ylabel': 'Data Used (GB)'}
+    finite = np.isfinite(bought) & np.isfinite(used)
+    bought, used = bought[finite], used[finite]
+    panel['diagonal'] = float(bought.max()) if len(bought) else 0.0
+    if len(bought) <= SCATTER_MAX_POINTS:
+        panel.update(kind='scatter', x=bought, y=used)
+        return panel
+
+    counts, x_edges, y_edges = np.histogram2d(bought, used, bins=DENSITY_BINS)
+    deviation = np.abs(used - bought)
+    outliers = np.argpartition(deviation, -DENSITY_OUTLIERS)[-DENSITY_OUTLIERS:]
+    panel.update(kind='density', points=int(len(bought)), counts=counts, x_edges=x_edges, y_edges=y_edges,
+                 outlier_x=bought[outliers], outlier_y=used[outliers])
+    return panel
+
+
+def supermarket_figure_spec(leakage_data, monthly_leakages=None):
+    """Aggregated, picklable description of the supermarket report figure.
+
+    Only the numbers the panels draw are kept (value counts, histogram bins, monthly
+    totals), so the spec is small, hashes to the same key for the same inputs, and can
+    be shipped to a render process."""
+    panels = [None, None, None, None]
+    if 'Anomaly_Type_Pred' in leakage_data.columns:
+        panels[0] = _counts_panel('pie', leakage_data['Anomaly_Type_Pred'], 'Distribution of Anomaly Types')
+    if 'Store_Branch' in leakage_data.columns:
+        panels[1] = _counts_panel('barh', leakage_data['Store_Branch'], 'Top 10 Branches with Leakages', top=10,
+                                  xlabel='Number of Leakages')
+    if 'Balance_Amount' in leakage_data.columns:
+        panels[2] = _histogram_panel(leakage_data['Balance_Amount'])
+    if monthly_leakages is not None:
+        panels[3] = _trend_panel(monthly_leakages['value'].to_numpy())
+    elif 'Billing_Date' in leakage_data.columns:
+        dates = parse_billing_dates(leakage_data['Billing_Date']).dropna()
+        if len(dates):
+            panels[3] = _trend_panel(dates.dt.to_period('M').value_counts().sort_index().to_numpy())
+        else:
+            panels[3] = {'kind': 'text', 'title': 'Date Analysis', 'text': 'Date analysis not available'}
+    return {'title': 'Supermarket Revenue Leakage Analysis', 'panels': panels}
+
+
+def telecom_figure_spec(leakage_data):
+    """Aggregated, picklable description of the telecom report figure"""
+    panels = [None, None, None, None]
+    if 'Anomaly_type' in leakage_data.columns:
+        panels[0] = _counts_panel('pie', leakage_data['Anomaly_type'], 'Distribution of Anomaly Types')
+    if 'Zone_area' in leakage_data.columns:
+        panels[1] = _counts_panel('barh', leakage_data['Zone_area'], 'Top 10 Zones with Leakages', top=10,
+                                  xlabel='Number of Leakages')
+    if 'Balance_amount' in leakage_data.columns:
+        panels[2] = _histogram_panel(leakage_data['Balance_amount'])
+    if 'Data_used' in leakage_data.columns and 'Data_bought' in leakage_data.columns:
+        panels[3] = _usage_panel(pd.to_numeric(leakage_data['Data_bought'], errors='coerce').to_numpy(dtype=float),
+                                 pd.to_numeric(leakage_data['Data_used'], errors='coerce').to_numpy(dtype=float))
+    else:
+        panels[3] = {'kind': 'text', 'title': 'Data Usage Analysis', 'text': 'Data usage analysis not available'}
+    return {'title': 'Telecom Revenue Leakage Analysis', 'panels': panels}
+
+
+def _encode(value):
+    """JSON stand-ins for numpy values; arrays are represented by a hash of their bytes"""
+    if isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        return {'dtype': str(array.dtype), 'shape': list(array.shape),
+                'sha256': hashlib.sha256(array.tobytes()).hexdigest()}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot hash {type(value).__name__} in a figure spec")
+
+
+def figure_key(spec, dpi, fmt='png'):
+    payload = json.dumps({'style': FIGURE_STYLE_VERSION, 'dpi': dpi, 'format': fmt, 'spec': spec},
+                         sort_keys=True, default=_encode)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _draw_panel(ax, panel):
+    kind = panel['kind']
+    if kind == 'pie':
+        ax.pie(panel['values'], labels=panel['labels'], autopct='%1.1f%%', startangle=90)
+    elif kind == 'barh':
+        positions = range(len(panel['values']))
+        ax.barh(positions, panel['values'])
+        ax.set_yticks(positions)
+        ax.set_yticklabels(panel['labels'])
+    elif kind == 'hist':
+        # Pre-binned counts drawn as the same bars ax.hist would draw for the raw values
+        edges = np.asarray(panel['edges'])
+        ax.hist(edges[:-1], bins=edges, weights=panel['counts'], alpha=0.7, color='red', edgecolor='black')
+    elif kind == 'line':
+        ax.plot(range(len(panel['values'])), panel['values'], marker='o', linewidth=2)
+        ax.tick_params(axis='x', rotation=45)
+    elif kind == 'scatter':
+        # Dense point clouds and meshes stay raster in SVG output, everything else is vector
+        ax.scatter(panel['x'], panel['y'], alpha=0.6, rasterized=True)
+        ax.plot([0, panel['diagonal']], [0, panel['diagonal']], 'r--', alpha=0.8)
+    elif kind == 'density':
+        from matplotlib.colors import LogNorm
+        counts = np.ma.masked_equal(panel['counts'].T, 0)
+        mesh = ax.pcolormesh(panel['x_edges'], panel['y_edges'], counts, norm=LogNorm(), cmap='viridis',
+                             rasterized=True)
+        ax.figure.colorbar(mesh, ax=ax, label=f"Rows per cell ({panel['points']:,} total)")
+        ax.scatter(panel['outlier_x'], panel['outlier_y'], s=8, color='black', alpha=0.6, label='Largest mismatches')
+        ax.plot([0, panel['diagonal']], [0, panel['diagonal']], 'r--', alpha=0.8)
+        ax.legend(loc='upper left')
+    elif kind == 'text':
+        ax.text(0.5, 0.5, panel['text'], ha='center', va='center', transform=ax.transAxes)
+    ax.set_title(panel['title'])
+    if panel.get('xlabel'):
+        ax.set_xlabel(panel['xlabel'])
+    if panel.get('ylabel'):
+        ax.set_ylabel(panel['ylabel'])
+
+
+def report_dpi(quality):
+    """Render dpi that gives DPI_PRESETS[quality] pixels per inch once the figure is scaled
+    down to REPORT_FIGURE_WIDTH_INCHES on the report page"""
+    return round(DPI_PRESETS[quality] * REPORT_FIGURE_WIDTH_INCHES / FIGURE_SIZE[0])
+
+
+def new_figure(nrows=1, ncols=1, figsize=FIGURE_SIZE):
+    """A figure with its own Agg canvas, never registered with pyplot, styled per axes.
+
+    pyplot keeps the current figure, style and palette in process-wide state; figures
+    built here don't touch it: the report palette goes on each axes' colour cycle
+    instead of the global rcParams, and the figure is freed with its last reference
+    (no plt.close). Drawing still isn't thread-safe (see RENDER_LOCK).
+    """
+    import seaborn as sns
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(nrows, ncols)
+    palette = sns.color_palette("husl")
+    for ax in np.ravel(axes):
+        ax.set_prop_cycle(color=palette)
+    return fig, axes
+
+
+def draw_figure(spec):
+    """Matplotlib figure for a 2x2 report figure spec (laid out, so hold RENDER_LOCK when threaded)"""
+    fig, axes = new_figure(2, 2)
+    fig.suptitle(spec['title'], fontsize=16, fontweight='bold')
+    for ax, panel in zip(axes.flat, spec['panels']):
+        if panel is not None:
+            _draw_panel(ax, panel)
+    fig.tight_layout()
+    return fig
+
+
+def _palette_png(png):
+    """Re-encode an RGBA chart PNG with a 256 colour palette. Charts are mostly flat fills
+    and anti-aliased edges, so this looks the same at a fraction of the size."""
+    from PIL import Image
+    image = Image.open(io.BytesIO(png)).convert('RGB')
+    buffer = io.BytesIO()
+    image.quantize(256).save(buffer, format='png', optimize=True)
+    return buffer.getvalue()
+
+
+def render_figure(spec, dpi, fmt='png'):
+    """Draw a 2x2 report figure spec to PNG or SVG bytes. dpi sets the PNG size, and the
+    resolution of rasterized panels in SVG. Threads take turns drawing (RENDER_LOCK);
+    separate processes render in parallel."""
+    if fmt not in FIGURE_FORMATS:
+        raise ValueError(f"Figure format must be one of: {', '.join(FIGURE_FORMATS)}")
+    buffer = io.BytesIO()
+    with RENDER_LOCK:
+        fig = draw_figure(spec)
+        fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    if fmt == 'png':
+        return _palette_png(buffer.getvalue())
+    return buffer.getvalue()
+
+
+class FigureCache:
+    """Content-addressed cache of rendered report figures.
+
+    A figure is keyed by a hash of its spec (the aggregated numbers it draws), the
+    style version, the dpi and the format, so any session whose leakage rows aggregate
+    to the same panels reuses one file, and repeat reports skip matplotlib altogether;
+    concurrent requests for one key share a render. With workers > 0 misses are drawn in
+    spawned worker processes, in parallel and off the request thread's interpreter lock;
+    workers=0 draws in the calling threads, one at a time under RENDER_LOCK. Files beyond
+    max_bytes are removed least recently used first.
+    """
+
+    def __init__(self, cache_dir, workers=1, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.renders = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key, fmt='png'):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn: forking a threaded Flask process can copy held locks into the child
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _render(self, spec, dpi, fmt):
+        if not self.workers:
+            return render_figure(spec, dpi, fmt)
+        try:
+            return self._executor().submit(render_figure, spec, dpi, fmt).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next figure
+            with self._pool_lock:
+                self._pool = None
+            print("❌ Figure render process failed, rendering in-process")
+            return render_figure(spec, dpi, fmt)
+
+    def render(self, spec, dpi, fmt='png'):
+        """Image bytes for a figure spec at the given dpi and format, from the cache when possible"""
+        key = figure_key(spec, dpi, fmt)
+        path = self.path(key, fmt)
+        try:
+            with open(path, 'rb') as f:
+                image = f.read()
+            # mtime doubles as the last-use time for eviction
+            os.utime(path)
+            with self._lock:
+                self.hits += 1
+            return image
+        except FileNotFoundError:
+            pass
+        return self._flights.do(key, lambda: self._render_to(path, spec, dpi, fmt))
+
+    def _render_to(self, path, spec, dpi, fmt):
+        image = self._render(spec, dpi, fmt)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(image)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.renders += 1
+        self._evict()
+        return image
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        try:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(tuple(f'.{fmt}' for fmt in FIGURE_FORMATS)):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(path)
+                total -= size
+        except OSError as e:
+            print(f"❌ Figure cache cleanup failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'renders': self.renders, 'shared_renders': self._flights.shared,
+                    'workers': self.workers}
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -1,6 +1,7 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 from datetime import datetime
 from docx import Document
 from docx.shared import Inches
@@ -10,9 +11,52 @@ import sys
 import google.generativeai as genai
 import time
 
-# Set style for plots
-sns.set(style="whitegrid")
-plt.rcParams['figure.figsize'] = (12, 6)
+# Shared with the backend (already on the path when imported from app.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rollups import parse_billing_dates
+
+# Seaborn's "whitegrid" look, applied to each new axes instead of the global rcParams,
+# so drawing these charts never changes the style of other figures in the process
+GRID_COLOR = '.8'
+TEXT_COLOR = '.15'
+
+
+def new_figure(figsize=(12, 6)):
+    """A whitegrid-styled figure and axes on their own Agg canvas, outside pyplot"""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_prop_cycle(color=sns.color_palette('deep'))
+    ax.set_facecolor('white')
+    for spine in ax.spines.values():
+        spine.set_edgecolor(GRID_COLOR)
+    ax.grid(True, color=GRID_COLOR, linestyle='-')
+    ax.set_axisbelow(True)
+    ax.tick_params(length=0, labelsize=11, colors=TEXT_COLOR)
+    ax.xaxis.label.set_color(TEXT_COLOR)
+    ax.yaxis.label.set_color(TEXT_COLOR)
+    ax.title.set_color(TEXT_COLOR)
+    return fig, ax
+
+
+def rotate_xticks(ax):
+    for label in ax.get_xticklabels():
+        label.set(rotation=45, ha='right')
+
+
+def dollars(value):
+    return f'${value:,.0f}'
+
+
+def draw_labelled_bars(ax, values, colors, label):
+    """Bar per category of a value series, each labelled with label(value)"""
+    positions = range(len(values))
+    ax.bar(positions, values.values, color=colors[:len(values)], alpha=0.8)
+    ax.set_xticks(positions, values.index, rotation=45, ha='right')
+    ax.grid(True, alpha=0.3, axis='y')
+    for i, v in enumerate(values.values):
+        ax.text(i, v + max(values.values) * 0.01, label(v), ha='center', va='bottom', fontweight='bold')
+
 
 class IntegratedAnalyzer:
     def __init__(self):
@@ -22,7 +66,25 @@ class IntegratedAnalyzer:
             '3': 'anomaly_data.csv (with Gemini API)',
             '4': 'telecom_anomaly_data.csv (with Gemini API)'
         }
+        # Monthly series already computed for a frame, so charts and recommendations share them.
+        # Entries keep the frame itself and are only used for that same object, so a later
+        # frame that happens to get a recycled id() never picks up another frame's totals.
+        self._monthly_totals = {}
         
+    def monthly_totals(self, df, value_column, date_column='Billing_Date'):
+        """Month-end sums of value_column, computed once per frame and column.
+        Dates are parsed into a local series, so shared (cached) frames are never modified."""
+        key = (id(df), date_column, value_column)
+        entry = self._monthly_totals.get(key)
+        if entry is None or entry[0] is not df:
+            dates = df[date_column]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = parse_billing_dates(dates)
+            values = pd.Series(df[value_column].to_numpy(), index=pd.DatetimeIndex(dates))
+            entry = (df, values[values.index.notna()].resample('ME').sum())
+            self._monthly_totals[key] = entry
+        return entry[1]
+
     def display_menu(self):
         """Display the file selection menu."""
         print("\n" + "="*60)
@@ -395,47 +457,44 @@ Statistical Metrics (Balance Amount) in INR:
         try:
             # Monthly sales trend
             if 'Billing_Date' in df.columns and 'Billed_Amount' in df.columns:
-                monthly_sales = df.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Billed_Amount'].sum()
+                monthly_sales = self.monthly_totals(df, 'Billed_Amount')
                 
-                plt.figure(figsize=(14, 8))
-                ax = plt.gca()
-                monthly_sales.plot(kind='line', marker='o', linewidth=3, markersize=8, color='#2E86AB')
-                plt.title('Monthly Sales Trend', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Date', fontsize=12, fontweight='bold')
-                plt.ylabel('Total Sales Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(rotation=45, ha='right')
-                plt.grid(True, alpha=0.3)
-                plt.tight_layout()
+                fig, ax = new_figure(figsize=(14, 8))
+                monthly_sales.plot(ax=ax, kind='line', marker='o', linewidth=3, markersize=8, color='#2E86AB')
+                ax.set_title('Monthly Sales Trend', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Date', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Total Sales Amount ($)', fontsize=12, fontweight='bold')
+                rotate_xticks(ax)
+                ax.grid(True, alpha=0.3)
+                fig.tight_layout()
                 
                 # Add value labels on points
                 for i, v in enumerate(monthly_sales):
                     if not pd.isna(v):
-                        plt.annotate(f'${v:,.0f}', (monthly_sales.index[i], v), 
+                        ax.annotate(f'${v:,.0f}', (monthly_sales.index[i], v), 
                                    textcoords="offset points", xytext=(0,10), 
                                    ha='center', fontsize=9)
                 
-                plt.savefig(f'{output_dir}/monthly_sales_trend.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.savefig(f'{output_dir}/monthly_sales_trend.png', dpi=300, bbox_inches='tight')
             
             # Payment status distribution
             if 'Payment_Status' in df.columns:
                 payment_status = df['Payment_Status'].value_counts()
                 colors = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D']
                 
-                plt.figure(figsize=(12, 8))
-                wedges, texts, autotexts = plt.pie(payment_status.values, labels=payment_status.index, 
+                fig, ax = new_figure(figsize=(12, 8))
+                wedges, texts, autotexts = ax.pie(payment_status.values, labels=payment_status.index, 
                                                   autopct='%1.1f%%', startangle=90, colors=colors,
                                                   explode=[0.05] * len(payment_status))
-                plt.title('Payment Status Distribution', fontsize=16, fontweight='bold', pad=20)
+                ax.set_title('Payment Status Distribution', fontsize=16, fontweight='bold', pad=20)
                 
                 # Enhance text appearance
                 for autotext in autotexts:
                     autotext.set_color('white')
                     autotext.set_fontweight('bold')
                 
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/payment_status_distribution.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/payment_status_distribution.png', dpi=300, bbox_inches='tight')
                 
         except Exception as e:
             print(f"Error generating sales visualizations: {str(e)}")
@@ -448,50 +507,39 @@ Statistical Metrics (Balance Amount) in INR:
         try:
             # Monthly revenue trend
             if 'Billing_Date' in df.columns and 'Billed_amount' in df.columns:
-                monthly_revenue = df.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Billed_amount'].sum()
+                monthly_revenue = self.monthly_totals(df, 'Billed_amount')
                 
-                plt.figure(figsize=(14, 8))
-                ax = plt.gca()
-                monthly_revenue.plot(kind='line', marker='o', linewidth=3, markersize=8, color='#A23B72')
-                plt.title('Monthly Revenue Trend', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Date', fontsize=12, fontweight='bold')
-                plt.ylabel('Revenue ($)', fontsize=12, fontweight='bold')
-                plt.xticks(rotation=45, ha='right')
-                plt.grid(True, alpha=0.3)
-                plt.tight_layout()
+                fig, ax = new_figure(figsize=(14, 8))
+                monthly_revenue.plot(ax=ax, kind='line', marker='o', linewidth=3, markersize=8, color='#A23B72')
+                ax.set_title('Monthly Revenue Trend', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Date', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Revenue ($)', fontsize=12, fontweight='bold')
+                rotate_xticks(ax)
+                ax.grid(True, alpha=0.3)
+                fig.tight_layout()
                 
                 # Add value labels on points
                 for i, v in enumerate(monthly_revenue):
                     if not pd.isna(v):
-                        plt.annotate(f'${v:,.0f}', (monthly_revenue.index[i], v), 
+                        ax.annotate(f'${v:,.0f}', (monthly_revenue.index[i], v), 
                                    textcoords="offset points", xytext=(0,10), 
                                    ha='center', fontsize=9)
                 
-                plt.savefig(f'{output_dir}/monthly_revenue_trend.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.savefig(f'{output_dir}/monthly_revenue_trend.png', dpi=300, bbox_inches='tight')
             
             # Anomaly distribution
             if 'Anomaly_type' in df.columns:
                 anomaly_distribution = df['Anomaly_type'].value_counts()
                 colors = ['#2E86AB', '#A23B72', '#F18F01', '#C73E1D', '#8B4513', '#228B22']
                 
-                plt.figure(figsize=(14, 8))
-                bars = plt.bar(range(len(anomaly_distribution)), anomaly_distribution.values, 
-                              color=colors[:len(anomaly_distribution)], alpha=0.8)
-                plt.title('Distribution of Anomaly Types', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Anomaly Type', fontsize=12, fontweight='bold')
-                plt.ylabel('Count', fontsize=12, fontweight='bold')
-                plt.xticks(range(len(anomaly_distribution)), anomaly_distribution.index, rotation=45, ha='right')
-                plt.grid(True, alpha=0.3, axis='y')
+                fig, ax = new_figure(figsize=(14, 8))
+                draw_labelled_bars(ax, anomaly_distribution, colors, str)
+                ax.set_title('Distribution of Anomaly Types', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Anomaly Type', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Count', fontsize=12, fontweight='bold')
                 
-                # Add value labels on bars
-                for i, v in enumerate(anomaly_distribution.values):
-                    plt.text(i, v + max(anomaly_distribution.values) * 0.01, str(v), 
-                            ha='center', va='bottom', fontweight='bold')
-                
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/anomaly_distribution.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/anomaly_distribution.png', dpi=300, bbox_inches='tight')
                 
         except Exception as e:
             print(f"Error generating telecom visualizations: {str(e)}")
@@ -536,7 +584,7 @@ Statistical Metrics (Balance Amount) in INR:
                 doc.add_heading('Sales Performance Optimization', level=3)
                 
                 # Monthly analysis
-                monthly_sales = df.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Billed_Amount'].sum()
+                monthly_sales = self.monthly_totals(df, 'Billed_Amount')
                 if len(monthly_sales) > 1:
                     recent_months = monthly_sales.tail(3)
                     avg_recent = recent_months.mean()
@@ -870,78 +918,58 @@ Statistical Metrics (Balance Amount) in INR:
             # Leakage by anomaly type
             if 'Anomaly_Type_Pred' in leakage_data.columns:
                 anomaly_counts = leakage_data['Anomaly_Type_Pred'].value_counts()
-                plt.figure(figsize=(12, 8))
+                fig, ax = new_figure(figsize=(12, 8))
                 colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
                 
-                bars = plt.bar(range(len(anomaly_counts)), anomaly_counts.values, 
-                              color=colors[:len(anomaly_counts)], alpha=0.8)
-                plt.title('Revenue Leakage by Anomaly Type', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Anomaly Type', fontsize=12, fontweight='bold')
-                plt.ylabel('Number of Cases', fontsize=12, fontweight='bold')
-                plt.xticks(range(len(anomaly_counts)), anomaly_counts.index, rotation=45, ha='right')
-                plt.grid(True, alpha=0.3, axis='y')
-                
-                # Add value labels on bars
-                for i, v in enumerate(anomaly_counts.values):
-                    plt.text(i, v + max(anomaly_counts.values) * 0.01, str(v), 
-                            ha='center', va='bottom', fontweight='bold')
+                draw_labelled_bars(ax, anomaly_counts, colors, str)
+                ax.set_title('Revenue Leakage by Anomaly Type', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Anomaly Type', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Number of Cases', fontsize=12, fontweight='bold')
                 
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/leakage_by_anomaly_type.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/leakage_by_anomaly_type.png', dpi=300, bbox_inches='tight')
             
             # Leakage by store branch
             if 'Store_Branch' in leakage_data.columns:
                 branch_leakage = leakage_data.groupby('Store_Branch')['Balance_Amount'].sum().sort_values(ascending=False)
-                plt.figure(figsize=(14, 8))
+                fig, ax = new_figure(figsize=(14, 8))
                 colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
                 
-                bars = plt.bar(range(len(branch_leakage)), branch_leakage.values, 
-                              color=colors[:len(branch_leakage)], alpha=0.8)
-                plt.title('Revenue Leakage by Store Branch', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Store Branch', fontsize=12, fontweight='bold')
-                plt.ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(range(len(branch_leakage)), branch_leakage.index, rotation=45, ha='right')
-                plt.grid(True, alpha=0.3, axis='y')
+                draw_labelled_bars(ax, branch_leakage, colors, dollars)
+                ax.set_title('Revenue Leakage by Store Branch', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Store Branch', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
                 
-                # Add value labels on bars
-                for i, v in enumerate(branch_leakage.values):
-                    plt.text(i, v + max(branch_leakage.values) * 0.01, f'${v:,.0f}', 
-                            ha='center', va='bottom', fontweight='bold')
-                
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/leakage_by_store_branch.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/leakage_by_store_branch.png', dpi=300, bbox_inches='tight')
             
             # Monthly leakage trend
             if 'Billing_Date' in leakage_data.columns:
-                leakage_data['Billing_Date'] = pd.to_datetime(leakage_data['Billing_Date'], format='%d-%m-%Y', errors='coerce')
-                monthly_leakage = leakage_data.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Balance_Amount'].sum()
+                monthly_leakage = self.monthly_totals(leakage_data, 'Balance_Amount')
                 
-                plt.figure(figsize=(14, 8))
-                monthly_leakage.plot(kind='line', marker='o', linewidth=3, markersize=8, color='#FF6B6B')
-                plt.title('Monthly Revenue Leakage Trend', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Date', fontsize=12, fontweight='bold')
-                plt.ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(rotation=45, ha='right')
-                plt.grid(True, alpha=0.3)
-                plt.tight_layout()
+                fig, ax = new_figure(figsize=(14, 8))
+                monthly_leakage.plot(ax=ax, kind='line', marker='o', linewidth=3, markersize=8, color='#FF6B6B')
+                ax.set_title('Monthly Revenue Leakage Trend', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Date', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
+                rotate_xticks(ax)
+                ax.grid(True, alpha=0.3)
+                fig.tight_layout()
                 
                 # Add value labels on points
                 for i, v in enumerate(monthly_leakage):
                     if not pd.isna(v):
-                        plt.annotate(f'${v:,.0f}', (monthly_leakage.index[i], v), 
+                        ax.annotate(f'${v:,.0f}', (monthly_leakage.index[i], v), 
                                    textcoords="offset points", xytext=(0,10), 
                                    ha='center', fontsize=9)
                 
-                plt.savefig(f'{output_dir}/monthly_leakage_trend.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.savefig(f'{output_dir}/monthly_leakage_trend.png', dpi=300, bbox_inches='tight')
             
             # Leakage vs Total Sales comparison
             if 'Billing_Date' in full_df.columns and 'Billed_Amount' in full_df.columns:
-                full_df['Billing_Date'] = pd.to_datetime(full_df['Billing_Date'], format='%d-%m-%Y', errors='coerce')
-                monthly_sales = full_df.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Billed_Amount'].sum()
-                monthly_leakage = leakage_data.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Balance_Amount'].sum()
+                # monthly_totals parses the dates itself; full_df may be a shared frame, so it isn't modified
+                monthly_sales = self.monthly_totals(full_df, 'Billed_Amount')
+                monthly_leakage = self.monthly_totals(leakage_data, 'Balance_Amount')
                 
                 # Align the data
                 comparison_data = pd.DataFrame({
@@ -949,17 +977,16 @@ Statistical Metrics (Balance Amount) in INR:
                     'Revenue Leakage': monthly_leakage
                 }).fillna(0)
                 
-                plt.figure(figsize=(14, 8))
-                ax = comparison_data.plot(kind='bar', width=0.8, alpha=0.8)
-                plt.title('Monthly Sales vs Revenue Leakage', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Date', fontsize=12, fontweight='bold')
-                plt.ylabel('Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(rotation=45, ha='right')
-                plt.legend()
-                plt.grid(True, alpha=0.3, axis='y')
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/sales_vs_leakage_comparison.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig, ax = new_figure(figsize=(14, 8))
+                comparison_data.plot(ax=ax, kind='bar', width=0.8, alpha=0.8)
+                ax.set_title('Monthly Sales vs Revenue Leakage', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Date', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Amount ($)', fontsize=12, fontweight='bold')
+                rotate_xticks(ax)
+                ax.legend()
+                ax.grid(True, alpha=0.3, axis='y')
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/sales_vs_leakage_comparison.png', dpi=300, bbox_inches='tight')
                 
         except Exception as e:
             print(f"Error generating sales API visualizations: {str(e)}")
@@ -973,95 +1000,66 @@ Statistical Metrics (Balance Amount) in INR:
             # Leakage by anomaly type
             if 'Anomaly_type' in leakage_data.columns:
                 anomaly_counts = leakage_data['Anomaly_type'].value_counts()
-                plt.figure(figsize=(12, 8))
+                fig, ax = new_figure(figsize=(12, 8))
                 colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
                 
-                bars = plt.bar(range(len(anomaly_counts)), anomaly_counts.values, 
-                              color=colors[:len(anomaly_counts)], alpha=0.8)
-                plt.title('Revenue Leakage by Anomaly Type', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Anomaly Type', fontsize=12, fontweight='bold')
-                plt.ylabel('Number of Cases', fontsize=12, fontweight='bold')
-                plt.xticks(range(len(anomaly_counts)), anomaly_counts.index, rotation=45, ha='right')
-                plt.grid(True, alpha=0.3, axis='y')
-                
-                # Add value labels on bars
-                for i, v in enumerate(anomaly_counts.values):
-                    plt.text(i, v + max(anomaly_counts.values) * 0.01, str(v), 
-                            ha='center', va='bottom', fontweight='bold')
+                draw_labelled_bars(ax, anomaly_counts, colors, str)
+                ax.set_title('Revenue Leakage by Anomaly Type', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Anomaly Type', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Number of Cases', fontsize=12, fontweight='bold')
                 
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/leakage_by_anomaly_type.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/leakage_by_anomaly_type.png', dpi=300, bbox_inches='tight')
             
             # Leakage by zone area
             if 'Zone_area' in leakage_data.columns:
                 zone_leakage = leakage_data.groupby('Zone_area')['Balance_amount'].sum().sort_values(ascending=False)
-                plt.figure(figsize=(14, 8))
+                fig, ax = new_figure(figsize=(14, 8))
                 colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD']
                 
-                bars = plt.bar(range(len(zone_leakage)), zone_leakage.values, 
-                              color=colors[:len(zone_leakage)], alpha=0.8)
-                plt.title('Revenue Leakage by Zone Area', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Zone Area', fontsize=12, fontweight='bold')
-                plt.ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(range(len(zone_leakage)), zone_leakage.index, rotation=45, ha='right')
-                plt.grid(True, alpha=0.3, axis='y')
+                draw_labelled_bars(ax, zone_leakage, colors, dollars)
+                ax.set_title('Revenue Leakage by Zone Area', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Zone Area', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
                 
-                # Add value labels on bars
-                for i, v in enumerate(zone_leakage.values):
-                    plt.text(i, v + max(zone_leakage.values) * 0.01, f'${v:,.0f}', 
-                            ha='center', va='bottom', fontweight='bold')
-                
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/leakage_by_zone_area.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/leakage_by_zone_area.png', dpi=300, bbox_inches='tight')
             
             # Monthly leakage trend
             if 'Billing_Date' in leakage_data.columns:
-                monthly_leakage = leakage_data.groupby(pd.Grouper(key='Billing_Date', freq='ME'))['Balance_amount'].sum()
+                monthly_leakage = self.monthly_totals(leakage_data, 'Balance_amount')
                 
-                plt.figure(figsize=(14, 8))
-                monthly_leakage.plot(kind='line', marker='o', linewidth=3, markersize=8, color='#FF6B6B')
-                plt.title('Monthly Revenue Leakage Trend', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Date', fontsize=12, fontweight='bold')
-                plt.ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(rotation=45, ha='right')
-                plt.grid(True, alpha=0.3)
-                plt.tight_layout()
+                fig, ax = new_figure(figsize=(14, 8))
+                monthly_leakage.plot(ax=ax, kind='line', marker='o', linewidth=3, markersize=8, color='#FF6B6B')
+                ax.set_title('Monthly Revenue Leakage Trend', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Date', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
+                rotate_xticks(ax)
+                ax.grid(True, alpha=0.3)
+                fig.tight_layout()
                 
                 # Add value labels on points
                 for i, v in enumerate(monthly_leakage):
                     if not pd.isna(v):
-                        plt.annotate(f'${v:,.0f}', (monthly_leakage.index[i], v), 
+                        ax.annotate(f'${v:,.0f}', (monthly_leakage.index[i], v), 
                                    textcoords="offset points", xytext=(0,10), 
                                    ha='center', fontsize=9)
                 
-                plt.savefig(f'{output_dir}/monthly_leakage_trend.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.savefig(f'{output_dir}/monthly_leakage_trend.png', dpi=300, bbox_inches='tight')
             
             # Plan category leakage analysis
             if 'Plan_category' in leakage_data.columns:
                 plan_leakage = leakage_data.groupby('Plan_category')['Balance_amount'].sum().sort_values(ascending=False)
-                plt.figure(figsize=(12, 8))
+                fig, ax = new_figure(figsize=(12, 8))
                 colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']
                 
-                bars = plt.bar(range(len(plan_leakage)), plan_leakage.values, 
-                              color=colors[:len(plan_leakage)], alpha=0.8)
-                plt.title('Revenue Leakage by Plan Category', fontsize=16, fontweight='bold', pad=20)
-                plt.xlabel('Plan Category', fontsize=12, fontweight='bold')
-                plt.ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
-                plt.xticks(range(len(plan_leakage)), plan_leakage.index, rotation=45, ha='right')
-                plt.grid(True, alpha=0.3, axis='y')
-                plt.tight_layout()
-                
-                # Add value labels on bars
-                for i, v in enumerate(plan_leakage.values):
-                    plt.text(i, v + max(plan_leakage.values) * 0.01, f'${v:,.0f}', 
-                            ha='center', va='bottom', fontweight='bold')
+                draw_labelled_bars(ax, plan_leakage, colors, dollars)
+                ax.set_title('Revenue Leakage by Plan Category', fontsize=16, fontweight='bold', pad=20)
+                ax.set_xlabel('Plan Category', fontsize=12, fontweight='bold')
+                ax.set_ylabel('Total Leakage Amount ($)', fontsize=12, fontweight='bold')
                 
-                plt.tight_layout()
-                plt.savefig(f'{output_dir}/leakage_by_plan_category.png', dpi=300, bbox_inches='tight')
-                plt.close()
+                fig.tight_layout()
+                fig.savefig(f'{output_dir}/leakage_by_plan_category.png', dpi=300, bbox_inches='tight')
                 
         except Exception as e:
             print(f"Error generating telecom API visualizations: {str(e)}")
@@ -0,0 +1,253 @@
+import argparse
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Rollup dimensions/measures -> candidate columns in each domain's processed data (first match wins)
+ROLLUP_COLUMNS = {
+    'supermarket': {
+        'date': ['Billing_Date'],
+        'zone': ['Store_Branch'],
+        'anomaly_type': ['Anomaly_Type_Pred'],
+        'channel': ['Order_Channel'],
+        'leakage': ['Leakage_Flag_Pred'],
+        'balance': ['Balance_Amount'],
+        'billed': ['Billed_Amount'],
+    },
+    'telecom': {
+        'date': ['Billing_date'],
+        'zone': ['Zone_area'],
+        'anomaly_type': ['Anomaly_type'],
+        'channel': ['Plan_name'],
+        'leakage': ['Leakage'],
+        'balance': ['Balance_amount'],
+        'billed': ['Billed_amount'],
+    },
+}
+
+# Prediction labels that count as leakage in each domain
+LEAKAGE_LABELS = {'supermarket': ('Anomaly',), 'telecom': ('Yes',)}
+
+DIMENSIONS = ('zone', 'anomaly_type', 'channel')
+
+# granularity -> SQL expression turning an ISO day into its bucket
+GRANULARITIES = {
+    'day': "day",
+    'week': "date(day, '-6 days', 'weekday 1')",
+    'month': "substr(day, 1, 7)",
+}
+
+MEASURES = ("SUM(rows) AS rows, SUM(leakage_rows) AS leakage_rows, "
+            "SUM(balance_sum) AS balance_sum, SUM(billed_sum) AS billed_sum")
+
+
+def parse_billing_dates(values):
+    """Parse billing dates that arrive either as ISO (YYYY-MM-DD, e.g. processed outputs)
+    or day-first (DD-MM-YYYY, raw uploads). A plain dayfirst parse would swap the month
+    and day of ambiguous ISO dates, so ISO is tried first. Unparseable values become NaT."""
+    values = pd.Series(values)
+    dates = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates.loc[retry] = pd.to_datetime(values[retry], format='mixed', dayfirst=True, errors='coerce')
+    return dates
+
+
+def resolve_column(domain, name, columns):
+    for candidate in ROLLUP_COLUMNS.get(domain, {}).get(name, []):
+        if candidate in columns:
+            return candidate
+    return None
+
+
+def session_rollup(df, domain):
+    """Collapse one scored session into daily rows of (day, zone, anomaly_type, channel) with
+    counts, leakage counts and balance/billed sums. Rows without a readable date are dropped."""
+    columns = set(df.columns)
+    date_column = resolve_column(domain, 'date', columns)
+    if date_column is None:
+        return pd.DataFrame(columns=['day', *DIMENSIONS, 'rows', 'leakage_rows', 'balance_sum', 'billed_sum'])
+
+    frame = pd.DataFrame({
+        'day': parse_billing_dates(df[date_column]).dt.strftime('%Y-%m-%d')
+    })
+    for dimension in DIMENSIONS:
+        column = resolve_column(domain, dimension, columns)
+        # Missing dimensions roll up under '' so every domain shares one table layout
+        frame[dimension] = df[column].fillna('').astype(str) if column else ''
+    leakage_column = resolve_column(domain, 'leakage', columns)
+    frame['leakage_rows'] = df[leakage_column].isin(LEAKAGE_LABELS.get(domain, ())).astype(int) if leakage_column else 0
+    for measure in ('balance', 'billed'):
+        column = resolve_column(domain, measure, columns)
+        frame[f'{measure}_sum'] = pd.to_numeric(df[column], errors='coerce').fillna(0.0) if column else 0.0
+
+    frame = frame.dropna(subset=['day'])
+    grouped = frame.groupby(['day', *DIMENSIONS], sort=False)
+    return grouped.agg(rows=('day', 'size'), leakage_rows=('leakage_rows', 'sum'),
+                       balance_sum=('balance_sum', 'sum'), billed_sum=('billed_sum', 'sum')).reset_index()
+
+
+class LeakageRollups:
+    """Daily leakage rollups across every scored session, kept next to the sessions table.
+
+    Each finished upload adds its counts into rows keyed by (domain, day, zone,
+    anomaly_type, channel), so trend and comparison queries read a few thousand
+    pre-aggregated rows instead of every processed CSV. Sessions are applied at most
+    once, and rollups outlive the janitor's expiry of the session artifacts.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS leakage_rollups (
+                    domain TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    zone TEXT NOT NULL,
+                    anomaly_type TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    rows INTEGER NOT NULL,
+                    leakage_rows INTEGER NOT NULL,
+                    balance_sum REAL NOT NULL,
+                    billed_sum REAL NOT NULL,
+                    PRIMARY KEY (domain, day, zone, anomaly_type, channel)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_rollups_zone_day ON leakage_rollups (domain, zone, day)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rollup_sessions (
+                    session_id TEXT PRIMARY KEY,
+                    domain TEXT,
+                    applied_at REAL NOT NULL,
+                    rows INTEGER NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def apply_session(self, session_id, domain, df):
+        """Add a scored session to the rollups; returns False if it was already applied"""
+        rollup = session_rollup(df, domain)
+        records = [
+            (domain, row.day, row.zone, row.anomaly_type, row.channel,
+             int(row.rows), int(row.leakage_rows), float(row.balance_sum), float(row.billed_sum))
+            for row in rollup.itertuples(index=False)
+        ]
+        with self._connect() as conn:
+            applied = conn.execute(
+                "INSERT OR IGNORE INTO rollup_sessions (session_id, domain, applied_at, rows) VALUES (?, ?, ?, ?)",
+                (session_id, domain, time.time(), int(rollup['rows'].sum()) if len(rollup) else 0)
+            ).rowcount
+            if not applied:
+                return False
+            conn.executemany(
+                "INSERT INTO leakage_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (domain, day, zone, anomaly_type, channel) DO UPDATE SET "
+                "rows = rows + excluded.rows, leakage_rows = leakage_rows + excluded.leakage_rows, "
+                "balance_sum = balance_sum + excluded.balance_sum, billed_sum = billed_sum + excluded.billed_sum",
+                records
+            )
+        return True
+
+    def _filters(self, domain, filters, date_from, date_to):
+        where, params = ["domain = ?"], [domain]
+        for dimension in DIMENSIONS:
+            values = [value for value in (filters.get(dimension) or []) if value != '']
+            if values:
+                where.append(f"{dimension} IN ({', '.join(['?'] * len(values))})")
+                params.extend(values)
+        if date_from:
+            where.append("day >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("day <= ?")
+            params.append(date_to)
+        return ' AND '.join(where), params
+
+    def trend(self, domain, granularity='day', filters=None, date_from=None, date_to=None):
+        """Totals per day/week/month for the matching zone/anomaly_type/channel values"""
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+        where, params = self._filters(domain, filters or {}, date_from, date_to)
+        bucket = GRANULARITIES[granularity]
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"SELECT {bucket} AS period, {MEASURES} FROM leakage_rollups WHERE {where} "
+                f"GROUP BY period ORDER BY period", params
+            )
+            return _records(cursor)
+
+    def compare(self, domain, by, filters=None, date_from=None, date_to=None, granularity=None):
+        """Totals per value of one dimension, optionally split by period as well"""
+        if by not in DIMENSIONS:
+            raise ValueError(f"by must be one of: {', '.join(DIMENSIONS)}")
+        if granularity is not None and granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+        where, params = self._filters(domain, filters or {}, date_from, date_to)
+        group = by if granularity is None else f"{by}, period"
+        period = "" if granularity is None else f"{GRANULARITIES[granularity]} AS period, "
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"SELECT {by} AS value, {period}{MEASURES} FROM leakage_rollups WHERE {where} "
+                f"GROUP BY {group} ORDER BY {'leakage_rows DESC, value' if granularity is None else 'value, period'}",
+                params
+            )
+            return _records(cursor)
+
+    def applied_sessions(self):
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT session_id FROM rollup_sessions")}
+
+
+def _records(cursor):
+    names = [description[0] for description in cursor.description]
+    records = []
+    for row in cursor.fetchall():
+        record = dict(zip(names, row))
+        record['leakage_rate'] = round(record['leakage_rows'] / record['rows'] * 100, 2) if record['rows'] else 0.0
+        record['balance_sum'] = round(record['balance_sum'], 2)
+        record['billed_sum'] = round(record['billed_sum'], 2)
+        records.append(record)
+    return records
+
+
+def backfill(store, rollups, read_csv=pd.read_csv):
+    """Roll up stored sessions scored before rollups existed (or while they failed)"""
+    from janitor import resolve_artifact
+
+    applied = rollups.applied_sessions()
+    count = 0
+    for session_id in list(store.activity()):
+        if session_id in applied:
+            continue
+        session = store.get(session_id, touch=False)
+        path = (session or {}).get('processed_data_path')
+        if not path:
+            continue
+        try:
+            if rollups.apply_session(session_id, session.get('domain'), read_csv(resolve_artifact(path))):
+                count += 1
+        except Exception as e:
+            print(f"❌ Could not roll up session {session_id}: {e}")
+    return count
+
+
+if __name__ == '__main__':
+    from session_store import SessionStore
+
+    parser = argparse.ArgumentParser(description="Add stored sessions that are missing from the leakage rollups")
+    parser.add_argument('--db', default='outputs/sessions.sqlite', help="sessions database (default: %(default)s)")
+    options = parser.parse_args()
+    added = backfill(SessionStore(options.db), LeakageRollups(options.db))
+    print(f"✅ Rolled up {added} sessions")
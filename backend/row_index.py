@@ -0,0 +1,240 @@
+import base64
+import json
+import os
+import sqlite3
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from rollups import parse_billing_dates
+from single_flight import KeyedLocks
+
+# Friendly filter names -> candidate columns in each domain's processed data (first match wins)
+DOMAIN_COLUMNS = {
+    'supermarket': {
+        'anomaly_type': ['Anomaly_Type_Pred'],
+        'leakage': ['Leakage_Flag_Pred'],
+        'branch': ['Store_Branch'],
+        'zone': ['Store_Branch'],
+        'date': ['Billing_Date'],
+        'amount': ['Balance_Amount'],
+    },
+    'telecom': {
+        'anomaly_type': ['Anomaly_type'],
+        'leakage': ['Leakage'],
+        'branch': ['Zone_area'],
+        'zone': ['Zone_area'],
+        'date': ['Billing_date'],
+        'amount': ['Balance_amount'],
+    },
+}
+
+# Extra numeric columns worth an index for range filters and sorting
+INDEXED_AMOUNT_COLUMNS = ['Balance_Amount', 'Billed_Amount', 'Paid_Amount',
+                          'Balance_amount', 'Billed_amount', 'Paid_amount']
+
+# Normalized ISO date column added to every index so date ranges compare correctly
+DATE_COLUMN = '_date'
+
+MAX_PAGE_SIZE = 1000
+
+_build_locks = KeyedLocks()
+
+
+def row_index_path(output_folder, session_id):
+    return os.path.join(output_folder, f"{session_id}_rows.sqlite")
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _resolve(domain, alias, columns):
+    for candidate in DOMAIN_COLUMNS.get(domain, {}).get(alias, []):
+        if candidate in columns:
+            return candidate
+    return None
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def build_row_index(df, db_path, domain, chunk_rows=50000):
+    """Write a processed session frame into an indexed SQLite file for row queries"""
+    columns = list(df.columns)
+    date_source = _resolve(domain, 'date', columns)
+    tmp = f"{db_path}.{uuid.uuid4().hex}.tmp"
+    conn = sqlite3.connect(tmp)
+    try:
+        # Scratch file until the rename below, so durability settings don't matter
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        definitions = ', '.join(f"{_quote(column)} {_sql_type(df[column].dtype)}" for column in columns)
+        conn.execute(f"CREATE TABLE rows (row_id INTEGER PRIMARY KEY, {definitions}, {DATE_COLUMN} TEXT)")
+        placeholders = ', '.join(['?'] * (len(columns) + 2))
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            if date_source:
+                dates = parse_billing_dates(chunk[date_source])
+                dates = dates.dt.strftime('%Y-%m-%d').astype(object).where(dates.notna(), None)
+            else:
+                dates = pd.Series([None] * len(chunk), index=chunk.index, dtype=object)
+            values = chunk.astype(object).where(chunk.notna(), None)
+            values.insert(0, '__row_id', np.arange(start, start + len(chunk)))
+            values[DATE_COLUMN] = dates
+            conn.executemany(f"INSERT INTO rows VALUES ({placeholders})",
+                             (tuple(v.item() if isinstance(v, np.generic) else v for v in row)
+                              for row in values.itertuples(index=False, name=None)))
+
+        indexed = {_resolve(domain, alias, columns) for alias in ('anomaly_type', 'leakage', 'zone', 'branch')}
+        indexed.update(column for column in INDEXED_AMOUNT_COLUMNS if column in columns)
+        indexed.add(DATE_COLUMN)
+        for i, column in enumerate(sorted(c for c in indexed if c)):
+            conn.execute(f"CREATE INDEX idx_rows_{i} ON rows ({_quote(column)}, row_id)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('domain', ?), ('columns', ?)", (domain, json.dumps(columns)))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp, db_path)
+    return db_path
+
+
+def ensure_row_index(db_path, domain, load_frame):
+    """Build the row index unless it already exists; load_frame() supplies the processed frame"""
+    with _build_locks.hold(db_path):
+        if not os.path.exists(db_path):
+            build_row_index(load_frame(), db_path, domain)
+    return db_path
+
+
+def _encode_cursor(sort, value, row_id):
+    raw = json.dumps({'sort': sort, 'value': value, 'row_id': row_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def query_rows(db_path, args):
+    """Filter, sort and page a session's rows.
+
+    Filters: anomaly_type, leakage, zone/branch (comma lists), any text column by name,
+    min_<column>/max_<column> (min_amount/max_amount target the domain's balance column),
+    date_from/date_to (ISO dates). Sorting: sort=<column> or sort=-<column>. Paging:
+    limit (max 1000) plus the opaque next_cursor from the previous page. Raises ValueError.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        domain = meta['domain']
+        columns = json.loads(meta['columns'])
+        types = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(rows)")}
+
+        where, params = [], []
+        for name, raw in args.items():
+            if name in ('sort', 'limit', 'cursor', 'with_total', 'date_from', 'date_to') or raw == '':
+                continue
+            if name.startswith(('min_', 'max_')):
+                target = name[4:]
+                column = _resolve(domain, 'amount', columns) if target == 'amount' else target
+                if column not in columns or types[column] == 'TEXT':
+                    raise ValueError(f"Unknown numeric column for {name}")
+                try:
+                    bound = float(raw)
+                except ValueError:
+                    raise ValueError(f"{name} must be a number")
+                where.append(f"{_quote(column)} {'>=' if name.startswith('min_') else '<='} ?")
+                params.append(bound)
+                continue
+            column = _resolve(domain, name, columns) if name in DOMAIN_COLUMNS.get(domain, {}) else name
+            if column not in columns:
+                raise ValueError(f"Unknown filter: {name}")
+            values = _split(raw)
+            where.append(f"{_quote(column)} IN ({', '.join(['?'] * len(values))})")
+            params.extend(values)
+
+        for name, op in (('date_from', '>='), ('date_to', '<=')):
+            if args.get(name):
+                where.append(f"{DATE_COLUMN} {op} ?")
+                params.append(args[name])
+
+        sort = args.get('sort') or 'row_id'
+        descending = sort.startswith('-')
+        sort_column = sort.lstrip('-')
+        if sort_column != 'row_id' and sort_column not in columns:
+            raise ValueError(f"Unknown sort column: {sort_column}")
+
+        try:
+            limit = min(max(int(args.get('limit', 100)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+
+        count_where = list(where)
+        count_params = list(params)
+
+        # Keyset pagination on (sort column, row_id); NULLs sort first ascending, last descending
+        if args.get('cursor'):
+            cursor = _decode_cursor(args['cursor'])
+            if cursor.get('sort') != sort:
+                raise ValueError("Cursor belongs to a different sort order")
+            last_value, last_id = cursor['value'], cursor['row_id']
+            if sort_column == 'row_id':
+                where.append("row_id < ?" if descending else "row_id > ?")
+                params.append(last_id)
+            else:
+                quoted = _quote(sort_column)
+                if last_value is None:
+                    clause = f"({quoted} IS NULL AND row_id > ?)"
+                    if not descending:
+                        clause = f"({clause} OR {quoted} IS NOT NULL)"
+                    where.append(clause)
+                    params.append(last_id)
+                else:
+                    op = '<' if descending else '>'
+                    clause = f"({quoted} {op} ? OR ({quoted} = ? AND row_id > ?))"
+                    if descending:
+                        clause = f"({clause} OR {quoted} IS NULL)"
+                    where.append(clause)
+                    params.extend([last_value, last_value, last_id])
+
+        if sort_column == 'row_id':
+            order = f"row_id {'DESC' if descending else 'ASC'}"
+        else:
+            order = f"{_quote(sort_column)} {'DESC' if descending else 'ASC'}, row_id ASC"
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+        selected = ', '.join(['row_id'] + [_quote(column) for column in columns])
+        cursor_rows = conn.execute(
+            f"SELECT {selected} FROM rows{where_sql} ORDER BY {order} LIMIT ?", params + [limit + 1]
+        ).fetchall()
+
+        has_more = len(cursor_rows) > limit
+        cursor_rows = cursor_rows[:limit]
+        names = ['row_id'] + columns
+        rows = [dict(zip(names, row)) for row in cursor_rows]
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = _encode_cursor(sort, last.get(sort_column) if sort_column != 'row_id' else None, last['row_id'])
+
+        result = {'rows': rows, 'columns': names, 'next_cursor': next_cursor, 'limit': limit}
+        if args.get('with_total', '').lower() in ('1', 'true'):
+            count_sql = f" WHERE {' AND '.join(count_where)}" if count_where else ""
+            result['total'] = conn.execute(f"SELECT COUNT(*) FROM rows{count_sql}", count_params).fetchone()[0]
+        return result
+    finally:
+        conn.close()
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+import fast_json
+
+# Events after which a job publishes nothing more
+TERMINAL_EVENTS = ('done', 'failed')
+
+
+class _Job:
+    def __init__(self, job_id, domain):
+        self.job_id = job_id
+        self.domain = domain
+        self.created = time.time()
+        self.seq = 0
+        self.event = 'queued'
+        self.data = {'stage': 'queued'}
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.event in TERMINAL_EVENTS
+
+
+class ScoringJobs:
+    """Progress of background upload scoring jobs, for server-sent event streams.
+
+    Each job keeps only its latest event (queued / progress snapshot / done / failed)
+    with a sequence number. Subscribers block until the sequence moves past what they
+    last saw, so a slow or late client skips straight to the newest snapshot instead
+    of replaying every chunk. Jobs live in this process's memory (the finished results
+    go to the session store as usual); the oldest finished jobs are dropped beyond
+    max_jobs.
+    """
+
+    def __init__(self, max_jobs=200):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, job_id, domain):
+        job = _Job(job_id, domain)
+        with self._lock:
+            self._jobs[job_id] = job
+            finished = [key for key, old in self._jobs.items() if old.finished]
+            while len(self._jobs) > self.max_jobs and finished:
+                del self._jobs[finished.pop(0)]
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def publish(self, job_id, event, data):
+        job = self.get(job_id)
+        if job is None:
+            return
+        with job.changed:
+            job.seq += 1
+            job.event = event
+            job.data = data
+            job.changed.notify_all()
+
+    def status(self, job_id):
+        """Latest {'job_id', 'domain', 'event', 'seq', 'data'} of a job, or None"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with job.changed:
+            return {'job_id': job.job_id, 'domain': job.domain, 'event': job.event, 'seq': job.seq, 'data': job.data}
+
+    def stream(self, job_id, last_seq=0, heartbeat_seconds=15):
+        """Server-sent event lines for a job: the latest event whenever it changes, comment
+        heartbeats while nothing happens, and the end of the stream after done/failed"""
+        job = self.get(job_id)
+        if job is None:
+            return
+        # Tell EventSource how long to wait before reconnecting after a dropped stream
+        yield "retry: 2000\n\n"
+        while True:
+            with job.changed:
+                if job.seq <= last_seq and not job.finished:
+                    job.changed.wait(heartbeat_seconds)
+                if job.seq <= last_seq:
+                    if job.finished:
+                        return
+                    event = None
+                else:
+                    last_seq, event, data = job.seq, job.event, job.data
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {last_seq}\nevent: {event}\ndata: {fast_json.dumps(data)}\n\n"
+            if event in TERMINAL_EVENTS:
+                return
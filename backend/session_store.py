@@ -0,0 +1,263 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+import fast_json
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SessionStore:
+    """Durable store of upload results, shared by every worker on the host.
+
+    Sessions live in SQLite (WAL mode, so readers never block the writer) with
+    indexes on session id and on (domain, timestamp), which makes "latest session
+    for a domain" and paginated listings index lookups. Supports the dict-style
+    access the endpoints used with the old in-memory results_store.
+
+    Reads record last_accessed for the artifact janitor; sessions it expires keep
+    a stub row so endpoints can tell "expired" (410) from "never existed" (404).
+    Precomputed chart payloads are kept as ready-to-send JSON in their own column;
+    shadow scoring comparisons get their own table, since they may finish before the
+    session row is written.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    domain TEXT,
+                    timestamp REAL NOT NULL,
+                    summary TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    last_accessed REAL,
+                    expired_at REAL,
+                    charts TEXT,
+                    charts_version TEXT
+                )
+            """)
+            # Databases created by older versions lack the lifecycle and chart columns
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            for column, column_type in (('last_accessed', 'REAL'), ('expired_at', 'REAL'),
+                                        ('charts', 'TEXT'), ('charts_version', 'TEXT')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_domain_timestamp ON sessions (domain, timestamp)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions (timestamp)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shadow_scores (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, session_id, data):
+        # Upsert rather than REPLACE so a session's precomputed charts survive updates
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (session_id, domain, timestamp, summary, data, last_accessed, expired_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL) "
+                "ON CONFLICT (session_id) DO UPDATE SET domain = excluded.domain, timestamp = excluded.timestamp, "
+                "summary = excluded.summary, data = excluded.data, last_accessed = excluded.last_accessed, "
+                "expired_at = NULL",
+                (
+                    session_id,
+                    data.get('domain'),
+                    data.get('timestamp') or time.time(),
+                    json.dumps(data.get('summary', {}), default=_json_default),
+                    json.dumps(data, default=_json_default),
+                    time.time()
+                )
+            )
+
+    def get(self, session_id, default=None, touch=True):
+        """Return the stored results of an active session; touch=False leaves last_accessed alone"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expired_at IS NULL", (session_id,)
+            ).fetchone()
+            if row and touch:
+                conn.execute("UPDATE sessions SET last_accessed = ? WHERE session_id = ?", (time.time(), session_id))
+        return json.loads(row[0]) if row else default
+
+    def summary(self, session_id):
+        """Return {'summary', 'domain', 'timestamp'} without loading the stored visualizations"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT summary, domain, timestamp FROM sessions WHERE session_id = ? AND expired_at IS NULL",
+                (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'summary': json.loads(row[0]), 'domain': row[1], 'timestamp': row[2]}
+
+    def latest(self, domain=None):
+        """Return the most recent session (optionally for one domain), or None"""
+        query = "SELECT data FROM sessions WHERE expired_at IS NULL"
+        params = ()
+        if domain is not None:
+            query += " AND domain = ?"
+            params = (domain,)
+        with self._connect() as conn:
+            row = conn.execute(query + " ORDER BY timestamp DESC LIMIT 1", params).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_sessions(self, domain=None, limit=100, offset=0):
+        """Return (page of session summaries, newest first, total matching sessions)"""
+        where = " WHERE expired_at IS NULL"
+        params = ()
+        if domain is not None:
+            where += " AND domain = ?"
+            params = (domain,)
+        with self._connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM sessions" + where, params).fetchone()[0]
+            rows = conn.execute(
+                "SELECT session_id, domain, timestamp, summary FROM sessions" + where +
+                " ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+                params + (limit, offset)
+            ).fetchall()
+        sessions = []
+        for session_id, session_domain, timestamp, summary in rows:
+            summary = json.loads(summary)
+            sessions.append({
+                'session_id': session_id,
+                'domain': session_domain,
+                'timestamp': timestamp,
+                'total_records': summary.get('total_records', 0),
+                'anomaly_count': summary.get('anomaly_count', 0)
+            })
+        return sessions, total
+
+    def put_charts(self, session_id, charts, version):
+        """Store a chart payload (dict) for a session as serialized JSON, served as is by the chart endpoints"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sessions SET charts = ?, charts_version = ? WHERE session_id = ?",
+                (fast_json.dumps(charts, sort_keys=True), version, session_id)
+            )
+
+    def get_charts(self, session_id):
+        """Return (charts JSON text, version) of an active session; (None, None) if not computed"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT charts, charts_version FROM sessions WHERE session_id = ? AND expired_at IS NULL",
+                (session_id,)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE sessions SET last_accessed = ? WHERE session_id = ?", (time.time(), session_id))
+        return tuple(row) if row else (None, None)
+
+    def latest_charts(self, domain):
+        """Return (session_id, charts JSON text, version) of the newest active session in a domain, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT session_id, charts, charts_version FROM sessions WHERE expired_at IS NULL AND domain = ? "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (domain,)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE sessions SET last_accessed = ? WHERE session_id = ?", (time.time(), row[0]))
+        return tuple(row) if row else None
+
+    def put_shadow(self, session_id, record):
+        """Store the shadow scoring comparison of a session"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO shadow_scores (session_id, data) VALUES (?, ?)",
+                         (session_id, json.dumps(record, default=_json_default)))
+
+    def get_shadow(self, session_id):
+        """Return the shadow scoring comparison of an active session, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT shadow_scores.data FROM shadow_scores JOIN sessions USING (session_id) "
+                "WHERE session_id = ? AND expired_at IS NULL",
+                (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, session_id, **fields):
+        """Set top-level fields of an active session without marking it as used"""
+        with self._connect() as conn:
+            # Take the write lock before reading so concurrent updates can't drop each other's fields
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expired_at IS NULL", (session_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[0])
+            data.update(fields)
+            conn.execute("UPDATE sessions SET data = ? WHERE session_id = ?",
+                         (json.dumps(data, default=_json_default), session_id))
+        return True
+
+    def activity(self):
+        """Return {session_id: last_accessed} for every active session"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT session_id, COALESCE(last_accessed, timestamp) FROM sessions WHERE expired_at IS NULL"
+            ).fetchall()
+        return dict(rows)
+
+    def expire(self, session_id):
+        """Mark a session expired and drop its stored results, keeping a stub for 410 responses"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE sessions SET expired_at = ?, data = '{}', charts = NULL, charts_version = NULL "
+                "WHERE session_id = ? AND expired_at IS NULL",
+                (time.time(), session_id)
+            )
+            conn.execute("DELETE FROM shadow_scores WHERE session_id = ?", (session_id,))
+
+    def is_expired(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT expired_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None and row[0] is not None
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM shadow_scores WHERE session_id = ?", (session_id,))
+
+    def __contains__(self, session_id):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM sessions WHERE session_id = ? AND expired_at IS NULL", (session_id,)
+            ).fetchone() is not None
+
+    def __getitem__(self, session_id):
+        data = self.get(session_id)
+        if data is None:
+            raise KeyError(session_id)
+        return data
+
+    def __setitem__(self, session_id, data):
+        self.put(session_id, data)
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions WHERE expired_at IS NULL").fetchone()[0]
@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+
+from prediction_cache import model_fingerprint
+
+
+def limit_model_threads(pipeline, n_jobs):
+    """Cap the thread count of every fitted estimator so shadow scoring doesn't starve live requests"""
+    for _, step in getattr(pipeline, 'steps', []):
+        for estimator in getattr(step, 'estimators_', None) or [step]:
+            if 'n_jobs' in getattr(estimator, 'get_params', dict)():
+                estimator.set_params(n_jobs=n_jobs)
+
+
+def compare_predictions(primary, candidate, leakage_col, anomaly_col):
+    """Agreement rates and label flips between two decoded prediction frames"""
+    leakage_same = primary[leakage_col].to_numpy() == candidate[leakage_col].to_numpy()
+    anomaly_same = primary[anomaly_col].to_numpy() == candidate[anomaly_col].to_numpy()
+    total = len(primary)
+
+    # Flips are grouped by the label the live model gave, e.g. {'Overcharge': {'No Anomaly': 3}}
+    anomaly_flips = {}
+    flipped = primary.loc[~anomaly_same, anomaly_col].astype(str)
+    for (live, shadow), count in flipped.groupby([flipped, candidate.loc[~anomaly_same, anomaly_col].astype(str)]).size().items():
+        anomaly_flips.setdefault(live, {})[shadow] = int(count)
+
+    leakage_flips = {}
+    flipped = primary.loc[~leakage_same, leakage_col].astype(str)
+    for (live, shadow), count in flipped.groupby([flipped, candidate.loc[~leakage_same, leakage_col].astype(str)]).size().items():
+        leakage_flips[f'{live} -> {shadow}'] = int(count)
+
+    return {
+        'total_records': total,
+        'agreement_rate': round(float((leakage_same & anomaly_same).mean()) * 100, 4) if total else 100.0,
+        'leakage_agreement_rate': round(float(leakage_same.mean()) * 100, 4) if total else 100.0,
+        'anomaly_agreement_rate': round(float(anomaly_same.mean()) * 100, 4) if total else 100.0,
+        'leakage_flips': leakage_flips,
+        'anomaly_flips': anomaly_flips,
+        'anomaly_flip_count': int((~anomaly_same).sum()),
+        'leakage_flip_count': int((~leakage_same).sum())
+    }
+
+
+class ShadowScorer:
+    """Scores a candidate pipeline on live uploads in a background thread.
+
+    The request path only hands over the already preprocessed X and the live
+    predictions; the candidate is loaded on first use and run off-thread. Finished
+    comparisons are saved in the session store (so they survive restarts) and
+    appended to a JSON-lines log; only the most recent max_results sessions are
+    also kept in memory. Each queued comparison holds its upload's X and predictions,
+    so at most max_pending are queued or running; uploads beyond that are not shadow
+    scored.
+    """
+
+    def __init__(self, candidate_paths, decoders, log_path, store=None, n_jobs=1, max_results=1000,
+                 max_pending=4):
+        self.candidate_paths = {domain: path for domain, path in candidate_paths.items() if path}
+        self.decoders = decoders
+        self.log_path = log_path
+        self.store = store
+        self.n_jobs = n_jobs
+        self.max_results = max_results
+        self.results = OrderedDict()
+        self._candidates = {}
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        # One worker keeps at most one shadow prediction competing with live traffic
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow-scoring')
+
+    def enabled(self, domain):
+        return domain in self.candidate_paths
+
+    def submit(self, session_id, domain, X, primary_predictions):
+        """Queue a shadow comparison; returns immediately. X must not be mutated afterwards.
+        Returns None (and skips the session) when shadow scoring is off for the domain or
+        its backlog is full."""
+        if not self.enabled(domain):
+            return None
+        if not self._pending.acquire(blocking=False):
+            print(f"❌ Shadow scoring backlog full, skipping {session_id}")
+            self._remember(session_id, {'status': 'skipped', 'domain': domain, 'error': 'shadow scoring backlog full'})
+            return None
+        self._remember(session_id, {'status': 'pending', 'domain': domain})
+        try:
+            return self._executor.submit(self._score, session_id, domain, X, primary_predictions)
+        except Exception:
+            self._pending.release()
+            raise
+
+    def _remember(self, session_id, record):
+        with self._lock:
+            self.results[session_id] = record
+            self.results.move_to_end(session_id)
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+
+    def get(self, session_id):
+        with self._lock:
+            if session_id in self.results:
+                self.results.move_to_end(session_id)
+                return self.results[session_id]
+        # Sessions scored before a restart, or evicted from memory
+        return self.store.get_shadow(session_id) if self.store is not None else None
+
+    def _candidate(self, domain):
+        if domain not in self._candidates:
+            path = self.candidate_paths[domain]
+            pipeline = joblib.load(path)
+            limit_model_threads(pipeline, self.n_jobs)
+            self._candidates[domain] = (pipeline, model_fingerprint(path))
+            print(f"✅ Shadow candidate for {domain} loaded from {path}")
+        return self._candidates[domain]
+
+    def _score(self, session_id, domain, X, primary_predictions):
+        try:
+            start = time.perf_counter()
+            pipeline, version = self._candidate(domain)
+            candidate_predictions = self.decoders[domain](pipeline.predict(X))
+            leakage_col, anomaly_col = primary_predictions.columns[:2]
+            record = compare_predictions(primary_predictions, candidate_predictions, leakage_col, anomaly_col)
+            record.update({
+                'status': 'complete',
+                'session_id': session_id,
+                'domain': domain,
+                'candidate_version': version,
+                'scoring_seconds': round(time.perf_counter() - start, 3),
+                'timestamp': time.time()
+            })
+            if self.store is not None:
+                self.store.put_shadow(session_id, record)
+            self._remember(session_id, record)
+            with self._lock:
+                with open(self.log_path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+            print(f"Shadow scoring {session_id}: {record['agreement_rate']}% agreement with candidate {version}")
+        except Exception as e:
+            print(f"❌ Shadow scoring failed for {session_id}: {e}")
+            self._remember(session_id, {'status': 'failed', 'domain': domain, 'error': str(e)})
+        finally:
+            self._pending.release()
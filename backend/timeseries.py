@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from rollups import LEAKAGE_LABELS, parse_billing_dates, resolve_column
+
+# granularity -> (resample rule, period label format); weeks start on Monday
+GRANULARITIES = {
+    'day': ('D', '%Y-%m-%d'),
+    'week': ('W-MON', '%Y-%m-%d'),
+    'month': ('MS', '%Y-%m'),
+}
+
+# metric -> (measure column alias or None to count rows, leakage rows only)
+METRICS = {
+    'records': (None, False),
+    'billed': ('billed', False),
+    'leakage_count': (None, True),
+    'leakage_amount': ('balance', True),
+}
+
+DEFAULT_POINTS = 500
+MAX_POINTS = 5000
+
+
+def resample_metric(df, domain, metric, granularity):
+    """Resample one metric of a processed session frame to day/week/month periods.
+
+    Returns a DataFrame of (period, value) sorted by period, with empty periods
+    between the first and last date filled with 0. Raises ValueError for an
+    unknown metric/granularity or when the frame has no usable date column.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of: {', '.join(METRICS)}")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    columns = set(df.columns)
+    date_column = resolve_column(domain, 'date', columns)
+    if date_column is None:
+        raise ValueError("This session has no billing date column")
+    measure, leakage_only = METRICS[metric]
+
+    dates = parse_billing_dates(df[date_column])
+    keep = dates.notna().to_numpy()
+    if leakage_only:
+        leakage_column = resolve_column(domain, 'leakage', columns)
+        if leakage_column is None:
+            raise ValueError("This session has no leakage predictions")
+        keep = keep & df[leakage_column].isin(LEAKAGE_LABELS.get(domain, ())).to_numpy()
+
+    if measure is None:
+        values = np.ones(int(keep.sum()))
+    else:
+        measure_column = resolve_column(domain, measure, columns)
+        if measure_column is None:
+            raise ValueError(f"This session has no {measure} amount column")
+        values = pd.to_numeric(df[measure_column], errors='coerce').fillna(0.0).to_numpy()[keep]
+
+    rule, label = GRANULARITIES[granularity]
+    # Left-closed, left-labelled bins: weeks run Monday to Sunday and are labelled by their Monday
+    series = pd.Series(values, index=pd.DatetimeIndex(dates[keep])).resample(rule, label='left', closed='left').sum()
+    return pd.DataFrame({'period': series.index.strftime(label), 'value': series.to_numpy()})
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the shape of (x, y).
+
+    Always keeps the first and last point; each bucket in between keeps the point forming
+    the largest triangle with the previously kept point and the next bucket's average.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = a = 0
+    for i in range(threshold - 2):
+        next_start = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        average_x = x[next_start:next_end].mean()
+        average_y = y[next_start:next_end].mean()
+
+        start = int(math.floor(i * every)) + 1
+        end = next_start
+        areas = np.abs((x[a] - average_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (average_y - y[a]))
+        a = start + int(areas.argmax())
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+def downsample(series, points):
+    """Keep at most `points` rows of a resampled (period, value) frame using LTTB on period order"""
+    if len(series) <= points:
+        return series
+    return series.iloc[lttb(np.arange(len(series)), series['value'].to_numpy(), points)]